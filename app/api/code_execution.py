@@ -1,14 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+import time
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Body, Header, Request
 from typing import List, Dict, Any, Optional
 
 from app.schemas.code_execution import (
     CodeExecutionRequest,
     CodeExecutionResponse,
     TestCase,
+    TestCaseType,
     ProgrammingLanguage,
-    ExecutionStatus
+    ExecutionStatus,
+    ResponseDetail,
+    CompileProfile,
+    PriorityClass,
+    DatasetCreateRequest,
+    DatasetInfo,
+    JobInfo,
+    JobStatus
 )
+from app.api.responses import encode_response
 from app.services.code_execution_service import CodeExecutionService
+from app.services.dataset_store import dataset_store
+from app.services.problem_store import problem_store
+from app.services.job_queue import DEADLINE_EXCEEDED_ERROR, Job, get_job_queue
+from app.core.config import settings
+from app.executors.sandbox import sandbox_registry
+from app.executors.stages import compile_pool
+from app.executors.affinity import core_allocator
+from app.services.scheduler import DeadlineExceededError, execution_scheduler
+from app.services.single_flight import single_flight
+from app.services.calibration import speed_calibrator
+from app.services.tenants import AuthenticationError, QuotaExceededError, Tenant, tenant_registry
 
 router = APIRouter(
     prefix="/code",
@@ -20,6 +42,126 @@ router = APIRouter(
 )
 
 
+def _to_test_cases(raw_test_cases: List[Dict[str, Any]]) -> List[TestCase]:
+    """将请求中的测试用例转换为 TestCase"""
+    return [
+        TestCase(
+            input=tc.get("input"),
+            # 标准输入/输出测试用例兼容 {"input", "output"} 格式
+            expected_output=tc.get("expected_output", tc.get("output")),
+            description=tc.get("description"),
+            type=tc.get("type") or TestCaseType.FUNCTION
+        )
+        for tc in raw_test_cases
+    ]
+
+
+async def get_tenant(authorization: Optional[str] = Header(None)) -> Tenant:
+    """
+    按 Authorization: Bearer <api_key> 请求头确定请求所属的租户
+
+    Raises:
+        HTTPException: API 密钥缺失或无效时返回 401
+    """
+    try:
+        return tenant_registry.authenticate(authorization)
+    except AuthenticationError as exc:
+        raise HTTPException(status_code=401, detail=str(exc), headers={"WWW-Authenticate": "Bearer"})
+
+
+async def _run_until_disconnect(http_request: Request, awaitable):
+    """
+    等待执行完成，客户端断开连接时取消执行
+
+    取消会结束正在运行的沙箱进程组，避免客户端已经离开后继续占用执行资源。
+
+    Args:
+        http_request: HTTP 请求
+        awaitable: 执行代码的协程
+
+    Returns:
+        协程的返回值
+
+    Raises:
+        ConnectionAbortedError: 客户端已断开连接
+    """
+    if settings.DISCONNECT_POLL_INTERVAL <= 0:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ConnectionAbortedError("客户端已断开连接")
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def _resolve_request(request: CodeExecutionRequest, tenant: Tenant) -> Dict[str, Any]:
+    """
+    确定请求使用的测试用例和设置
+
+    如果提供了自定义测试用例，则使用自定义测试用例，否则使用已上传的测试数据集或问题登记的测试用例；
+    使用问题登记的测试用例时，请求未指定的设置使用问题的默认设置。
+
+    Args:
+        request: 代码执行请求
+        tenant: 请求所属的租户
+
+    Returns:
+        Dict[str, Any]: CodeExecutionService.run_tests 的参数
+
+    Raises:
+        LookupError: 测试数据集不存在，或者没有提供测试用例且问题未登记
+    """
+    test_cases = None
+    comparator = request.comparator
+    comparator_options = request.comparator_options
+    time_limit = request.time_limit
+    compile_profile = request.compile_profile
+    if request.test_cases:
+        test_cases = _to_test_cases(request.test_cases)
+    elif request.dataset_id:
+        try:
+            test_cases = await asyncio.to_thread(dataset_store.open, request.dataset_id)
+        except KeyError:
+            raise LookupError(f"测试数据集不存在: {request.dataset_id}")
+    else:
+        problem = await asyncio.to_thread(problem_store.get, request.problem_id)
+        if problem is not None:
+            test_cases = problem.test_cases
+            # 请求未指定时使用问题的默认设置
+            if comparator is None:
+                comparator = problem.info.comparator
+                comparator_options = comparator_options or problem.info.comparator_options
+            time_limit = time_limit or problem.info.time_limit
+            compile_profile = compile_profile or problem.info.compile_profile
+    if not test_cases:
+        raise LookupError(f"未提供测试用例，且问题未登记: {request.problem_id}")
+
+    return {
+        "code": request.code,
+        "language": request.language,
+        "test_cases": test_cases,
+        "problem_id": request.problem_id,
+        "stop_on_first_failure": request.stop_on_first_failure,
+        "time_limit": time_limit,
+        "time_budget": request.time_budget,
+        "comparator": comparator,
+        "comparator_options": comparator_options,
+        "response_detail": request.response_detail,
+        "compile_profile": compile_profile,
+        "profile": request.profile,
+        "priority": request.priority,
+        "deadline": request.deadline,
+        "tenant": tenant.name,
+    }
+
+
 @router.post(
     "/execute", 
     response_model=CodeExecutionResponse,
@@ -28,6 +170,7 @@ router = APIRouter(
     response_description="代码执行结果，包含测试通过情况、执行时间和内存使用等信息"
 )
 async def execute_code(
+    http_request: Request,
     request: CodeExecutionRequest = Body(
         ...,
         example={
@@ -42,50 +185,56 @@ async def execute_code(
                 }
             ]
         }
-    )
+    ),
+    tenant: Tenant = Depends(get_tenant)
 ):
     """
     执行代码并运行测试
     
     - **code**: 用户提交的代码
     - **language**: 编程语言（python, javascript, java, cpp, go, rust）
-    - **problem_id**: 问题ID
-    - **test_cases**: 测试用例列表
+    - **problem_id**: 问题ID，未提供 test_cases 和 dataset_id 时使用 /problems 登记的测试用例和默认设置
+    - **test_cases**: 测试用例列表，type 为 stdin_stdout 时以标准输入/输出方式运行（支持所有语言）
+    - **dataset_id**: 已通过 /code/datasets 上传的测试数据集ID，未提供 test_cases 时使用
+    - **stop_on_first_failure**: 第一个测试用例失败后停止执行
+    - **time_limit**: 单个测试用例的时间限制(秒)
+    - **time_budget**: 整个提交的时间预算(秒)
+    - **comparator**: 输出比较方式（exact, whitespace, float, unordered, token）
+    - **response_detail**: 响应详细程度（full, failures_only, verdict_only），不为 full 时省略值为 null 的字段
+    - **compile_profile**: 编译配置（fast_compile, optimized, debug），默认由服务端按测试用例数选择
+    - **priority**: 调度优先级（interactive, batch），批量评测应使用 batch
+    - **deadline**: 截止时间（Unix 时间戳，秒），开始执行前已过期时返回 deadline_exceeded 状态
+    - **profile**: 对用户代码进行采样性能分析，响应的 profile 字段返回热点函数和热点行（只支持 Python 函数测试用例）
+    
+    配置了 API_KEYS 时按请求头 Authorization: Bearer <api_key> 确定租户，密钥无效时返回 401，
+    租户的 CPU 时间配额已用尽时返回 429。
+    
+    请求头 Accept 包含 application/msgpack 且服务端安装了 msgpack 时，响应使用 msgpack 编码。
     
     返回:
     - 测试结果，包含通过情况、执行时间和内存使用等信息
     """
+    exclude_none = request.response_detail != ResponseDetail.FULL
     try:
-        # 如果提供了自定义测试用例，则使用自定义测试用例
-        if request.test_cases:
-            test_cases = [
-                TestCase(
-                    input=tc.get("input"),
-                    expected_output=tc.get("expected_output"),
-                    description=tc.get("description")
-                )
-                for tc in request.test_cases
-            ]
-            
-            # 运行测试
-            return await CodeExecutionService.run_tests(
-                code=request.code,
-                language=request.language,
-                test_cases=test_cases
-            )
-        else:
-            # 如果没有提供测试用例，则返回错误
-            return CodeExecutionResponse(
-                status=ExecutionStatus.INTERNAL_ERROR,
-                message="未提供测试用例"
-            )
-            
+        try:
+            options = await _resolve_request(request, tenant)
+        except LookupError as exc:
+            # 测试数据集不存在，或者没有提供测试用例且问题未登记
+            response = CodeExecutionResponse(status=ExecutionStatus.INTERNAL_ERROR, message=exc.args[0])
+            return encode_response(http_request, response, exclude_none=exclude_none)
+        
+        # 运行测试，客户端断开连接时取消
+        response = await _run_until_disconnect(http_request, CodeExecutionService.run_tests(**options))
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
     except Exception as exc:
         # 处理执行过程中的异常
-        return CodeExecutionResponse(
+        response = CodeExecutionResponse(
             status=ExecutionStatus.INTERNAL_ERROR,
             message=f"执行代码时发生错误: {str(exc)}"
         )
+    
+    return encode_response(http_request, response, exclude_none=exclude_none)
 
 
 @router.post(
@@ -143,14 +292,24 @@ async def run_single_test(
     response_description="代码执行结果，包含输出、执行时间和内存使用"
 )
 async def run_code(
+    http_request: Request,
     code: str = Body(..., description="用户提交的代码", example="print('Hello, World!')"),
-    language: ProgrammingLanguage = Body(..., description="编程语言")
+    language: ProgrammingLanguage = Body(..., description="编程语言"),
+    compile_profile: Optional[CompileProfile] = Body(None, description="编译配置（fast_compile, optimized, debug）"),
+    priority: Optional[PriorityClass] = Body(None, description="调度优先级（interactive, batch）"),
+    deadline: Optional[float] = Body(None, description="截止时间（Unix 时间戳，秒）"),
+    tenant: Tenant = Depends(get_tenant)
 ):
     """
     直接执行代码
     
     - **code**: 用户提交的代码
     - **language**: 编程语言（python, javascript, java, cpp, go, rust）
+    - **compile_profile**: 编译配置（fast_compile, optimized, debug），默认由服务端选择
+    - **priority**: 调度优先级（interactive, batch），默认为 interactive
+    - **deadline**: 截止时间（Unix 时间戳，秒），开始执行前已过期时返回 504
+    
+    API 密钥无效时返回 401，租户的 CPU 时间配额已用尽时返回 429。
     
     返回:
     - **output**: 执行结果
@@ -158,10 +317,17 @@ async def run_code(
     - **memory_usage**: 内存使用(KB)
     """
     try:
-        # 直接执行代码
-        output, execution_time, memory_usage = await CodeExecutionService.direct_execute_code(
-            code=code,
-            language=language
+        # 直接执行代码，客户端断开连接时取消
+        output, execution_time, memory_usage = await _run_until_disconnect(
+            http_request,
+            CodeExecutionService.direct_execute_code(
+                code=code,
+                language=language,
+                compile_profile=compile_profile,
+                priority=priority,
+                deadline=deadline,
+                tenant=tenant.name
+            )
         )
         
         # 返回结果
@@ -171,9 +337,309 @@ async def run_code(
             "memory_usage": memory_usage
         }
         
+    except DeadlineExceededError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
     except Exception as exc:
         # 处理执行过程中的异常
         raise HTTPException(
             status_code=500,
             detail=f"执行代码时发生错误: {str(exc)}"
-        ) 
\ No newline at end of file
+        )
+
+
+def _job_info(job: Job) -> JobInfo:
+    """将任务队列中的任务转换为 JobInfo"""
+    result = None
+    if job.status == JobStatus.SUCCEEDED:
+        result = CodeExecutionResponse.model_validate(job.result)
+    elif job.error == DEADLINE_EXCEEDED_ERROR:
+        result = CodeExecutionResponse(status=ExecutionStatus.DEADLINE_EXCEEDED, message=job.error)
+    return JobInfo(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=result,
+        error=None if job.status == JobStatus.SUCCEEDED else job.error
+    )
+
+
+async def _get_tenant_job(job_id: str, tenant: Tenant, wait: float = 0.0) -> Job:
+    """
+    查询租户的异步任务
+
+    Raises:
+        HTTPException: 任务不存在或不属于该租户时返回 404
+    """
+    job = await CodeExecutionService.get_job(job_id, wait)
+    if job is None or job.kind != "run_tests" or job.tenant != tenant.name:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return job
+
+
+@router.post(
+    "/jobs",
+    response_model=JobInfo,
+    status_code=202,
+    summary="提交异步测试任务",
+    description="接收与 /code/execute 相同的请求，立即返回任务ID，不等待执行结果",
+    response_description="任务信息"
+)
+async def submit_job(
+    request: CodeExecutionRequest,
+    tenant: Tenant = Depends(get_tenant)
+):
+    """
+    提交异步测试任务
+    
+    请求格式与 /code/execute 相同。任务保存在任务队列（JOB_QUEUE_PATH）中，API 进程重启后仍可查询，
+    通过 GET /code/jobs/{job_id} 查询状态和结果，通过 DELETE /code/jobs/{job_id} 取消。
+    
+    测试数据集不存在，或者没有提供测试用例且问题未登记时返回 404，租户的 CPU 时间配额已用尽时返回 429。
+    
+    返回:
+    - 任务信息，状态为 queued
+    """
+    try:
+        options = await _resolve_request(request, tenant)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    try:
+        job_id = await CodeExecutionService.submit_tests(**options)
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    return _job_info(await _get_tenant_job(job_id, tenant))
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobInfo,
+    summary="查询异步测试任务",
+    description="查询异步测试任务的状态和结果，wait 大于 0 时任务结束前最多等待 wait 秒（长轮询）",
+    response_description="任务信息"
+)
+async def get_job(
+    job_id: str,
+    wait: float = 0.0,
+    tenant: Tenant = Depends(get_tenant)
+):
+    """
+    查询异步测试任务
+    
+    - **job_id**: 任务ID
+    - **wait**: 任务未结束时最多等待的秒数，上限为 JOB_LONG_POLL_MAX
+    
+    返回:
+    - **status**: queued, running, succeeded, failed 或 cancelled
+    - **result**: 任务成功时为执行结果；开始执行前截止时间已过时为 deadline_exceeded 状态的执行结果
+    - **error**: 任务失败或取消的原因
+    """
+    wait = min(max(wait, 0.0), settings.JOB_LONG_POLL_MAX)
+    return _job_info(await _get_tenant_job(job_id, tenant, wait))
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    response_model=JobInfo,
+    summary="取消异步测试任务",
+    description="取消排队中或运行中的异步测试任务",
+    response_description="取消后的任务信息"
+)
+async def cancel_job(
+    job_id: str,
+    tenant: Tenant = Depends(get_tenant)
+):
+    """
+    取消异步测试任务
+    
+    排队中的任务不再执行；运行中的任务在执行它的 worker 下一次续约（JOB_HEARTBEAT_INTERVAL）时停止执行，
+    之后上报的结果被丢弃。任务已经结束时返回 409。
+    
+    - **job_id**: 任务ID
+    """
+    await _get_tenant_job(job_id, tenant)
+    if not await CodeExecutionService.cancel_job(job_id):
+        raise HTTPException(status_code=409, detail=f"任务已经结束: {job_id}")
+    return _job_info(await _get_tenant_job(job_id, tenant))
+
+
+@router.get(
+    "/workers",
+    response_model=Dict[str, Any],
+    summary="查询执行 worker",
+    description="分布式执行模式下，列出已注册的 worker 及其心跳状态",
+    response_description="执行模式和 worker 列表"
+)
+async def list_workers():
+    """
+    查询执行 worker
+    
+    返回:
+    - **mode**: 执行模式（local 或 distributed）
+    - **workers**: worker 列表，alive 表示最近一次心跳未超过可见性超时
+    """
+    if settings.EXECUTION_MODE != "distributed":
+        return {"mode": settings.EXECUTION_MODE, "workers": []}
+    
+    workers = await asyncio.to_thread(get_job_queue().list_workers)
+    now = time.time()
+    for worker in workers:
+        worker["alive"] = now - worker["last_heartbeat"] < settings.JOB_VISIBILITY_TIMEOUT
+    return {"mode": settings.EXECUTION_MODE, "workers": workers}
+
+
+@router.get(
+    "/scheduler",
+    response_model=Dict[str, Any],
+    summary="查询调度状态",
+    description="返回本节点的执行槽位使用情况，各优先级的请求数、丢弃数和延迟分位数，各租户的请求数和 CPU 时间，以及相同请求的合并统计",
+    response_description="调度状态"
+)
+async def scheduler_status():
+    """
+    查询调度状态
+    
+    返回:
+    - **capacity**: 执行槽位数（只用于运行阶段，编译期间不占用）
+    - **interactive_reserved**: 只留给 interactive 请求的槽位数
+    - **running**: 正在执行的请求数
+    - **classes**: 各优先级的 submitted、completed、dropped（截止时间已过被丢弃）、queued、running，
+      以及最近请求的排队时间 queue_wait_ms 和执行时间 execution_ms 的 p50、p95、p99
+    - **tenants**: 各租户的 weight、max_concurrency、cpu_quota，queued、running、completed，
+      以及 TENANT_CPU_QUOTA_WINDOW 内在本节点消耗的 CPU 时间 cpu_used(秒)
+    - **compile**: 编译池的 capacity、running、queued、completed、failed（编译错误）、timeouts（编译超时），
+      以及最近编译的排队时间 queue_wait_ms 和编译时间 compile_ms 的 p50、p95、p99
+    - **coalescing**: 指纹相同的并发请求的合并统计：inflight（正在进行的共享执行数）、executions（实际执行数）、
+      coalesced（合并到已有执行的请求数）、abandoned（等待者全部离开而取消的执行数）
+    """
+    return {
+        **execution_scheduler.report(),
+        "compile": compile_pool.report(),
+        "coalescing": single_flight.report(),
+    }
+
+
+@router.get(
+    "/calibration",
+    response_model=Dict[str, Any],
+    summary="查询执行速度校准",
+    description="返回本节点各语言校准负载的执行时间和速度系数，测试结果的归一化时间按此系数计算",
+    response_description="各语言的校准结果"
+)
+async def calibration_status():
+    """
+    查询执行速度校准
+    
+    返回各语言的:
+    - **calibration_ms**: 最近一次校准时校准负载的执行时间(毫秒)，已扣除进程启动时间
+    - **startup_ms**: 最近一次校准时的进程启动时间(毫秒)，标准输入/输出测试归一化前扣除
+    - **reference_ms**: 参照节点上校准负载的执行时间(毫秒)，见 CALIBRATION_REFERENCE_MS
+    - **speed_factor**: 速度系数 calibration_ms / reference_ms，大于 1 表示本节点比参照节点慢
+    - **calibrated_at**: 最近一次成功校准的时间戳
+    - **error**: 最近一次校准失败的错误信息
+    
+    分布式模式下 API 节点不执行代码，各 worker 的校准结果见 /code/workers。
+    """
+    return speed_calibrator.report()
+
+
+@router.get(
+    "/sandboxes",
+    response_model=Dict[str, Any],
+    summary="查询沙箱状态",
+    description="返回本节点正在使用的工作目录数、泄漏进程和工作目录的清理统计，以及 CPU 绑定的使用情况",
+    response_description="沙箱状态"
+)
+async def sandbox_status():
+    """
+    查询沙箱状态
+    
+    返回:
+    - **active_workspaces**: 正在使用的工作目录数
+    - **sweeps**: 清理次数
+    - **killed_processes**: 累计结束的泄漏进程数
+    - **removed_workspaces**: 累计删除的泄漏工作目录数
+    - **zombie_processes**: 最近一次清理时仍未被回收的僵尸进程数
+    - **last_sweep**: 最近一次清理的时间戳
+    - **cpu_pinning**: CPU 绑定的设置和使用情况：enabled、reserved_cpus（留给本进程的 CPU）、
+      sandbox_cpus（分配给沙箱的 CPU）、free、waiting（等待物理核的进程数）、leases、waits
+    """
+    return {**sandbox_registry.report(), "cpu_pinning": core_allocator.report()}
+
+
+@router.post(
+    "/datasets",
+    response_model=DatasetInfo,
+    summary="上传测试数据集",
+    description="上传测试用例，返回以内容哈希标识的数据集ID，之后的执行请求通过 dataset_id 引用",
+    response_description="测试数据集信息"
+)
+async def create_dataset(request: DatasetCreateRequest, tenant: Tenant = Depends(get_tenant)):
+    """
+    上传测试数据集
+    
+    内容相同的测试用例总是得到相同的数据集ID，重复上传不会重复保存。
+    上传过的租户都记录为数据集的所有者。
+    
+    - **test_cases**: 测试用例列表，格式与 /code/execute 的 test_cases 相同
+    
+    返回:
+    - **dataset_id**: 数据集ID
+    - **count**: 测试用例数量
+    - **type**: 测试用例类型
+    - **size**: 数据集文件大小(字节)
+    """
+    try:
+        dataset = await asyncio.to_thread(dataset_store.put, _to_test_cases(request.test_cases), tenant.name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return DatasetInfo(dataset_id=dataset.id, count=len(dataset), type=dataset.type, size=dataset.size)
+
+
+@router.get(
+    "/datasets/{dataset_id}",
+    response_model=DatasetInfo,
+    summary="查询测试数据集",
+    description="查询测试数据集是否存在及其信息，可用于上传前检查",
+    response_description="测试数据集信息"
+)
+async def get_dataset(dataset_id: str, tenant: Tenant = Depends(get_tenant)):
+    """
+    查询测试数据集
+    
+    - **dataset_id**: 数据集ID
+    """
+    try:
+        return await asyncio.to_thread(dataset_store.info, dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"测试数据集不存在: {dataset_id}")
+
+
+@router.delete(
+    "/datasets/{dataset_id}",
+    response_model=Dict[str, Any],
+    summary="删除测试数据集",
+    description="删除测试数据集，正在执行的测试不受影响",
+    response_description="删除结果"
+)
+async def delete_dataset(dataset_id: str, tenant: Tenant = Depends(get_tenant)):
+    """
+    删除测试数据集
+    
+    只移除请求所属的租户，其他租户也上传过相同内容时数据集继续保留。
+    数据集不属于该租户时返回 403。
+    
+    - **dataset_id**: 数据集ID
+    """
+    try:
+        deleted = await asyncio.to_thread(dataset_store.delete, dataset_id, tenant.name)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    except KeyError:
+        deleted = False
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"测试数据集不存在: {dataset_id}")
+    return {"dataset_id": dataset_id, "deleted": True}
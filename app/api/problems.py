@@ -0,0 +1,144 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Optional
+
+from app.api.code_execution import get_tenant
+from app.schemas.code_execution import Problem, ProblemInfo, TestCase
+from app.services.problem_store import problem_store
+from app.services.problem_stats import problem_stats
+from app.services.tenants import Tenant
+
+router = APIRouter(
+    prefix="/problems",
+    tags=["problems"],
+    responses={
+        401: {"description": "API 密钥缺失或无效"},
+        403: {"description": "问题属于其他租户"},
+        404: {"description": "问题不存在"},
+        500: {"description": "服务器内部错误"}
+    },
+)
+
+
+@router.post(
+    "",
+    response_model=ProblemInfo,
+    status_code=201,
+    summary="创建问题",
+    description="登记问题及其测试用例，之后的代码执行请求只需提供 problem_id",
+    response_description="问题信息"
+)
+async def create_problem(problem: Problem, tenant: Tenant = Depends(get_tenant)):
+    """
+    创建问题
+
+    测试用例保存为测试数据集，内容相同的测试用例在问题之间共享。
+    问题可以指定默认的比较方式、比较器参数和单个测试用例的时间限制。
+    请求所属的租户记录为问题的所有者，只有所有者可以更新或删除问题。
+    """
+    try:
+        return await asyncio.to_thread(problem_store.save, problem, True, tenant.name)
+    except ValueError as exc:
+        raise HTTPException(status_code=409 if "已存在" in str(exc) else 400, detail=str(exc))
+
+
+@router.get(
+    "",
+    response_model=List[ProblemInfo],
+    summary="列出问题",
+    description="按问题ID排序列出问题，不包含测试用例",
+    response_description="问题信息列表"
+)
+async def list_problems(
+    offset: int = Query(0, ge=0, description="跳过的问题数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的最大问题数"),
+    tag: Optional[str] = Query(None, description="只返回带有该标签的问题"),
+    tenant: Tenant = Depends(get_tenant)
+):
+    """列出问题"""
+    return await asyncio.to_thread(problem_store.list, offset, limit, tag)
+
+
+@router.get(
+    "/{problem_id}",
+    response_model=ProblemInfo,
+    summary="查询问题",
+    description="查询问题信息，不包含测试用例",
+    response_description="问题信息"
+)
+async def get_problem(problem_id: str, tenant: Tenant = Depends(get_tenant)):
+    """查询问题"""
+    loaded = await asyncio.to_thread(problem_store.get, problem_id)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail=f"问题不存在: {problem_id}")
+    return loaded.info
+
+
+@router.get(
+    "/{problem_id}/test_cases",
+    response_model=List[TestCase],
+    summary="查询问题的测试用例",
+    description="分页读取问题登记的测试用例",
+    response_description="测试用例列表"
+)
+async def get_problem_test_cases(
+    problem_id: str,
+    offset: int = Query(0, ge=0, description="跳过的测试用例数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的最大测试用例数"),
+    tenant: Tenant = Depends(get_tenant)
+):
+    """查询问题的测试用例"""
+    loaded = await asyncio.to_thread(problem_store.get, problem_id)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail=f"问题不存在: {problem_id}")
+    test_cases = loaded.test_cases
+    return [test_cases[i] for i in range(offset, min(offset + limit, len(test_cases)))]
+
+
+@router.put(
+    "/{problem_id}",
+    response_model=ProblemInfo,
+    summary="更新问题",
+    description="替换问题及其测试用例，不存在时创建",
+    response_description="问题信息"
+)
+async def update_problem(problem_id: str, problem: Problem, tenant: Tenant = Depends(get_tenant)):
+    """更新问题，问题属于其他租户时返回 403"""
+    if problem.id != problem_id:
+        raise HTTPException(status_code=400, detail="路径中的问题ID与请求体不一致")
+    try:
+        return await asyncio.to_thread(problem_store.save, problem, False, tenant.name)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.delete(
+    "/{problem_id}",
+    response_model=Dict[str, Any],
+    summary="删除问题",
+    description="删除问题，没有其他问题使用的测试数据一并删除",
+    response_description="删除结果"
+)
+async def delete_problem(problem_id: str, tenant: Tenant = Depends(get_tenant)):
+    """删除问题，问题属于其他租户时返回 403"""
+    try:
+        deleted = await asyncio.to_thread(problem_store.delete, problem_id, tenant.name)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"问题不存在: {problem_id}")
+    return {"id": problem_id, "deleted": True}
+
+
+@router.get(
+    "/{problem_id}/stats",
+    response_model=Dict[str, Dict[str, int]],
+    summary="查询问题的测试用例统计",
+    description="当前进程内各测试用例的执行次数和失败次数，用于失败即停止模式下的测试用例排序",
+    response_description="测试用例标识到执行次数和失败次数的映射"
+)
+async def get_problem_stats(problem_id: str, tenant: Tenant = Depends(get_tenant)):
+    """查询问题的测试用例统计"""
+    return problem_stats.snapshot(problem_id)
@@ -0,0 +1,66 @@
+"""
+响应编码
+
+大批量评测的响应体可能达到数十 MB，FastAPI 默认会先按 response_model 重新校验返回值，
+再用 jsonable_encoder 和标准库 json 序列化，CPU 开销很大。
+这里直接由 pydantic-core 把模型序列化为 JSON 字节（普通对象使用 orjson），
+或者在客户端通过 Accept 请求时使用 msgpack 编码，跳过重复校验。
+"""
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class MsgPackResponse(Response):
+    """msgpack 编码的响应"""
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """客户端是否通过 Accept 请求头要求 msgpack 编码"""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def encode_response(request: Request, content: Any, exclude_none: bool = False) -> Response:
+    """
+    按 Accept 请求头编码响应
+
+    Args:
+        request: HTTP 请求
+        content: 响应内容，可以是 pydantic 模型或者可以 JSON 序列化的对象
+        exclude_none: 是否省略值为 None 的字段
+
+    Returns:
+        Response: 客户端接受 msgpack 且已安装 msgpack 时为 msgpack 响应，否则为 JSON 响应
+    """
+    if accepts_msgpack(request):
+        if isinstance(content, BaseModel):
+            content = content.model_dump(mode="json", exclude_none=exclude_none)
+        return MsgPackResponse(content)
+    
+    if isinstance(content, BaseModel):
+        body = content.model_dump_json(exclude_none=exclude_none)
+    elif orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+    return Response(body, media_type="application/json")
@@ -1,5 +1,5 @@
 import os
-from typing import ClassVar, Dict, Any
+from typing import ClassVar, Dict, Any, List, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -39,7 +39,188 @@ class Settings(BaseSettings):
     
     # 数据库设置 (示例)
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
-    
+
+    # 执行限制
+    # 单次进程执行的默认超时时间（秒），用于直接执行代码
+    EXECUTION_TIMEOUT: float = 30.0
+    # 运行测试时单个测试用例的默认时间限制（秒），由测试代码在进程内强制执行
+    TEST_TIME_LIMIT: float = 5.0
+    # 运行测试时整个提交的默认时间预算（秒），由执行器强制执行
+    SUBMISSION_TIME_BUDGET: float = 60.0
+    # 请求可以指定的单个测试用例时间限制和提交时间预算的上限（秒）
+    MAX_TEST_TIME_LIMIT: float = 60.0
+    MAX_SUBMISSION_TIME_BUDGET: float = 600.0
+    # 执行器在提交时间预算之外为进程启动和结果输出预留的时间（秒）
+    SUBMISSION_TIMEOUT_GRACE: float = 2.0
+    # 内存限制（MB）
+    MEMORY_LIMIT: int = 512
+    # 未通过的测试用例返回实际输出的最大长度（字符数），超过时只返回差异摘要
+    OUTPUT_ECHO_LIMIT: int = 65536
+    # 标准输入/输出测试用例的并发进程数，0 表示使用 CPU 核数
+    STDIN_CASE_CONCURRENCY: int = 0
+    # 函数测试进程在测试用例执行期间异常退出后，在新进程中继续执行剩余测试用例的最大次数，0 表示不继续
+    HARNESS_MAX_RESTARTS: int = 3
+
+    # 编译设置
+    # 本进程同时进行的编译数，0 表示使用 CPU 核数；编译期间不占用执行槽位（见 SCHEDULER_CONCURRENCY）
+    COMPILE_CONCURRENCY: int = 0
+    # 单次编译的超时时间（秒）
+    COMPILE_TIMEOUT: float = 60.0
+    # 编译器进程的内存限制（MB），0 表示不限制；Java、Kotlin 和 Go 的编译器不受此限制
+    COMPILE_MEMORY_LIMIT: int = 2048
+
+    # 调度设置
+    # 本进程同时执行的请求数，0 表示使用 CPU 核数
+    SCHEDULER_CONCURRENCY: int = 0
+    # 只留给 interactive 请求的执行槽位数
+    SCHEDULER_INTERACTIVE_RESERVED: int = 1
+    # 未指定优先级的请求使用的优先级（interactive 或 batch）
+    DEFAULT_PRIORITY: str = "interactive"
+    # 计算各优先级延迟分位数时保留的最近请求数
+    SCHEDULER_METRICS_WINDOW: int = 1000
+    # 指纹相同的并发请求是否共享同一次执行
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # 租户设置
+    # API 密钥到租户名的映射，请求头 Authorization: Bearer <api_key> 中的密钥必须在此登记；
+    # 为空时不校验 API 密钥，所有请求属于 DEFAULT_TENANT
+    API_KEYS: Dict[str, str] = {}
+    # 配置了 API_KEYS 时是否拒绝没有 API 密钥的请求，不拒绝时这些请求属于 DEFAULT_TENANT
+    REQUIRE_API_KEY: bool = False
+    # 没有 API 密钥的请求所属的租户
+    DEFAULT_TENANT: str = "default"
+    # 各租户的调度设置，例如 {"team-a": {"weight": 2, "max_concurrency": 4, "cpu_quota": 3600}}：
+    # weight 为公平调度的权重（默认 1），max_concurrency 为同时执行的请求数上限（0 表示不限制），
+    # cpu_quota 为 TENANT_CPU_QUOTA_WINDOW 内可以消耗的 CPU 时间（秒，0 表示不限制）
+    TENANTS: Dict[str, Dict[str, float]] = {}
+    # 统计 CPU 时间配额的滑动窗口（秒）
+    TENANT_CPU_QUOTA_WINDOW: float = 3600.0
+
+    # 沙箱设置
+    # 编译和运行工作目录所在的目录，默认为系统临时目录
+    SANDBOX_DIR: Optional[str] = None
+    # 清理泄漏的进程和工作目录的间隔（秒），0 表示不清理
+    SANDBOX_SWEEP_INTERVAL: float = 60.0
+    # 直接执行代码时检查客户端是否断开连接的间隔（秒），断开后结束执行
+    DISCONNECT_POLL_INTERVAL: float = 1.0
+    # 是否为每个运行中的沙箱进程绑定独占的物理核，使执行时间在负载下可以复现
+    CPU_PINNING_ENABLED: bool = False
+    # 开启 CPU 绑定时留给 API 进程（或 worker 进程）本身的物理核数，编译器不受此限制，使用全部 CPU
+    CPU_PINNING_RESERVED_CORES: int = 1
+    # 运行时自身是多线程的语言（Java、Kotlin、Go）的进程绑定的物理核数
+    CPU_PINNING_RUNTIME_CORES: int = 2
+
+    # 执行模式: local 在 API 进程内执行；distributed 将任务投递到队列，由独立 worker 执行
+    EXECUTION_MODE: str = "local"
+
+    # 任务队列设置
+    # 队列后端: sqlite 或者 "模块路径:类名" 形式的自定义实现
+    JOB_QUEUE_BACKEND: str = "sqlite"
+    JOB_QUEUE_PATH: str = "./data/job_queue.db"
+    # 任务被领取后的可见性超时（秒），超时未续约的任务会被重新投递
+    JOB_VISIBILITY_TIMEOUT: float = 60.0
+    # worker 续约任务和上报心跳的间隔（秒）
+    JOB_HEARTBEAT_INTERVAL: float = 10.0
+    # 单个任务的最大投递次数
+    JOB_MAX_ATTEMPTS: int = 3
+    # API 节点轮询任务结果、独立 worker 轮询新任务的间隔（秒）
+    JOB_POLL_INTERVAL: float = 0.2
+    # API 进程内的 worker 轮询新任务的间隔（秒），本进程提交的任务会直接唤醒 worker，轮询只用于领取重新投递的任务
+    JOB_IDLE_POLL_INTERVAL: float = 5.0
+    # API 节点等待任务结果的最长时间（秒）
+    JOB_RESULT_TIMEOUT: float = 1200.0
+    # 查询异步任务时长轮询的最长等待时间（秒）
+    JOB_LONG_POLL_MAX: float = 60.0
+    # 已完成任务的保留时间（秒）
+    JOB_RETENTION: float = 3600.0
+    # 单个 worker 进程的并发任务数，0 表示使用 CPU 核数
+    WORKER_CONCURRENCY: int = 0
+
+    # 测试数据集设置
+    # 数据集文件目录，分布式模式下需要所有 worker 共享
+    DATASET_DIR: str = "./data/datasets"
+    # 数据集文件的总大小上限（字节），超过时删除最近最少使用的数据集
+    DATASET_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # 问题登记设置
+    PROBLEM_DB_PATH: str = "./data/problems.db"
+    # 问题测试数据目录，分布式模式下需要所有 worker 共享
+    PROBLEM_DATA_DIR: str = "./data/problems"
+
+    # 启动预热设置
+    # 启动时是否在后台预热各语言的工具链
+    WARMUP_ENABLED: bool = True
+    # 单个语言预热的超时时间（秒）
+    WARMUP_TIMEOUT: float = 300.0
+    # 必须预热成功节点才就绪的语言，例如 ["python", "cpp"]
+    READY_REQUIRED_LANGUAGES: List[str] = []
+
+    # 执行速度校准设置
+    # 测量各语言校准负载执行时间的间隔（秒），0 表示不校准，响应不返回归一化时间
+    CALIBRATION_INTERVAL: float = 600.0
+    # 每次校准运行校准负载的次数，取执行时间的中位数
+    CALIBRATION_RUNS: int = 5
+    # 各语言校准负载在参照节点上的执行时间（毫秒），例如 {"python": 250, "cpp": 60}，
+    # 可以取参照节点 GET /code/calibration 返回的 calibration_ms；未配置的语言以 100 毫秒为参照
+    CALIBRATION_REFERENCE_MS: Dict[str, float] = {}
+
+    # 性能分析设置（请求 profile 为 true 时使用，只支持 Python 函数测试用例）
+    # 采样间隔（CPU 时间，秒），实际间隔不小于内核的时钟节拍
+    PROFILE_SAMPLE_INTERVAL: float = 0.001
+    # 单次采样的耗时与采样间隔之比的上限，超过时加大采样间隔
+    PROFILE_MAX_OVERHEAD: float = 0.05
+    # 响应返回的热点函数和热点行的最大数量
+    PROFILE_TOP_N: int = 20
+
+    # 编译配置设置
+    # 各语言在不同编译配置（fast_compile, optimized, debug）下附加的编译选项
+    COMPILE_PROFILE_FLAGS: Dict[str, Dict[str, List[str]]] = {
+        "cpp": {"fast_compile": ["-O0"], "optimized": ["-O2"], "debug": ["-O0", "-g"]},
+        "rust": {
+            "fast_compile": ["-C", "opt-level=0"],
+            "optimized": ["-C", "opt-level=2"],
+            "debug": ["-C", "opt-level=0", "-g"],
+        },
+        "swift": {"fast_compile": ["-Onone"], "optimized": ["-O"], "debug": ["-Onone", "-g"]},
+        "objc": {"fast_compile": ["-O0"], "optimized": ["-O2"], "debug": ["-O0", "-g"]},
+    }
+    # 请求和问题都未指定时使用的编译配置；auto 表示测试用例数不少于 COMPILE_PROFILE_OPTIMIZED_MIN_TESTS
+    # 时使用 optimized，否则使用 fast_compile
+    DEFAULT_COMPILE_PROFILE: str = "auto"
+    COMPILE_PROFILE_OPTIMIZED_MIN_TESTS: int = 20
+
+    # Go 编译缓存设置
+    # GOCACHE 和 GOMODCACHE 所在目录，每个 worker 节点使用本地磁盘上的独立目录
+    GO_CACHE_DIR: str = "./data/go"
+    # GOCACHE 的总大小上限（字节），超过时删除最近最少使用的缓存条目
+    GO_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    # 检查 GOCACHE 大小的最短间隔（秒）
+    GO_CACHE_TRIM_INTERVAL: float = 300.0
+    # 启动预热时预先编译的标准库包
+    GO_WARMUP_PACKAGES: List[str] = [
+        "fmt", "sort", "strings", "strconv", "bufio", "os", "math", "math/big", "math/bits",
+        "container/heap", "container/list", "bytes", "unicode", "errors", "sync", "time",
+    ]
+
+    # Swift 设置
+    # 模块缓存目录（-module-cache-path），每个 worker 节点使用本地磁盘上的独立目录
+    SWIFT_MODULE_CACHE_DIR: str = "./data/swift-module-cache"
+    # 是否用 swift 解释器（JIT）直接运行运行次数少的程序，省去链接和生成可执行文件的时间
+    SWIFT_USE_INTERPRETER: bool = False
+    # 使用解释器的最大运行次数，超过时编译一次再运行
+    SWIFT_INTERPRETER_MAX_RUNS: int = 1
+
+    # C++ 预编译头设置
+    # 预编译头目录，按编译器版本和编译选项分子目录保存
+    CPP_PCH_DIR: str = "./data/cpp-pch"
+    # 启动预热时预编译的头文件集合，提交包含集合中的全部头文件时自动使用对应的预编译头
+    CPP_PCH_HEADER_SETS: Dict[str, List[str]] = {
+        "stdc++": ["bits/stdc++.h"],
+        "prelude": ["iostream", "string", "vector", "map", "algorithm"],
+        "containers": ["iostream", "vector", "string", "algorithm"],
+        "iostream": ["iostream"],
+    }
+
     # Swagger UI 设置
     SWAGGER_UI_OAUTH2_REDIRECT_URL: str = "/api/oauth2-redirect"
     SWAGGER_UI_PARAMETERS: ClassVar[Dict[str, Any]] = {
@@ -0,0 +1,165 @@
+"""
+沙箱进程的 CPU 绑定
+
+开启 CPU_PINNING_ENABLED 后，每个运行阶段的沙箱进程在启动前领取独占的物理核，用 sched_setaffinity 绑定，
+进程结束后归还；没有空闲的物理核时按到达顺序等待。并发运行的程序不再互相争抢 CPU 和缓存，
+execution_time 在负载下也可以复现。
+
+  - 每个物理核只绑定第一个逻辑 CPU，超线程的兄弟 CPU 保持空闲，沙箱之间不共享物理核；
+  - 运行时自身是多线程的语言（JVM、Go）的进程领取 CPU_PINNING_RUNTIME_CORES 个物理核；
+  - 前 CPU_PINNING_RESERVED_CORES 个物理核留给 API 进程（或 worker 进程）本身；
+  - 编译器等不领取物理核的子进程启动时恢复为绑定前的全部 CPU（见 unpinned_cpus），不继承本进程绑定的
+    CPU 集合，并发编译不会挤在留给本进程的几个核上。
+"""
+import os
+import asyncio
+import logging
+import contextlib
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _physical_cores(cpus: List[int]) -> List[List[int]]:
+    """
+    按物理核对逻辑 CPU 分组
+
+    Args:
+        cpus: 逻辑 CPU 编号
+
+    Returns:
+        List[List[int]]: 每个物理核的逻辑 CPU 编号，按编号排序；读取不到拓扑信息的逻辑 CPU 单独作为一个物理核
+    """
+    cores: Dict[Any, List[int]] = {}
+    for cpu in sorted(cpus):
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as f:
+                package = f.read().strip()
+            with open(os.path.join(topology, "core_id")) as f:
+                core = f.read().strip()
+            key: Any = (package, core)
+        except OSError:
+            key = cpu
+        cores.setdefault(key, []).append(cpu)
+    return sorted(cores.values())
+
+
+class CoreAllocator:
+    """分配沙箱进程独占的物理核"""
+
+    def __init__(self):
+        allowed = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        # 绑定前本进程可以使用的全部逻辑 CPU
+        self.allowed_cpus = allowed
+        cores = _physical_cores(allowed)
+        reserved = cores[:max(settings.CPU_PINNING_RESERVED_CORES, 0)]
+        # 留给本进程的逻辑 CPU（包括超线程的兄弟 CPU）
+        self.reserved_cpus = sorted(cpu for core in reserved for cpu in core)
+        # 可以分配给沙箱的逻辑 CPU，每个物理核一个
+        self.sandbox_cpus = [core[0] for core in cores[len(reserved):]]
+        self.enabled = settings.CPU_PINNING_ENABLED
+        if self.enabled and not self.sandbox_cpus:
+            logger.warning(
+                "共 %d 个物理核，留给本进程 %d 个后没有可以分配给沙箱的物理核，不绑定 CPU",
+                len(cores), len(reserved)
+            )
+            self.enabled = False
+        self._free: List[int] = list(self.sandbox_cpus)
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self.stats: Dict[str, int] = {"leases": 0, "waits": 0}
+
+    def pin_current_process(self) -> None:
+        """把本进程的所有线程绑定到留给本进程的物理核，之后创建的线程和子进程继承同样的 CPU 集合"""
+        if not self.enabled or not self.reserved_cpus:
+            return
+        for tid in os.listdir("/proc/self/task"):
+            try:
+                os.sched_setaffinity(int(tid), self.reserved_cpus)
+            except OSError:
+                # 线程已经退出
+                pass
+        logger.info("本进程绑定到 CPU %s，沙箱使用 CPU %s", self.reserved_cpus, self.sandbox_cpus)
+
+    @property
+    def unpinned_cpus(self) -> Optional[List[int]]:
+        """
+        不领取物理核的子进程（编译、预热编译）应绑定的逻辑 CPU
+
+        pin_current_process 之后子进程默认继承留给本进程的 CPU 集合，所有编译都会挤在这几个核上；
+        这些子进程启动时恢复为绑定前的全部 CPU，由操作系统调度。未绑定本进程时返回 None，保持继承。
+        """
+        if not self.enabled or not self.reserved_cpus:
+            return None
+        return self.allowed_cpus
+
+    def _take(self, count: int) -> List[int]:
+        cpus, self._free = self._free[:count], self._free[count:]
+        return cpus
+
+    def _give(self, cpus: List[int]) -> None:
+        self._free = sorted(self._free + cpus)
+        # 按到达顺序分配，需要多个物理核的进程不会被后到的单核进程一直插队
+        while self._waiters:
+            count, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if len(self._free) < count:
+                return
+            self._waiters.popleft()
+            future.set_result(self._take(count))
+
+    @contextlib.asynccontextmanager
+    async def lease(self, count: int = 1) -> AsyncIterator[Optional[List[int]]]:
+        """
+        领取独占的物理核，退出时归还
+
+        Args:
+            count: 物理核数，超过可以分配的物理核数时按可以分配的物理核数领取；0 表示不绑定
+
+        Yields:
+            Optional[List[int]]: 进程应绑定的逻辑 CPU，未开启 CPU 绑定或 count 为 0 时为 None
+        """
+        if not self.enabled or count <= 0:
+            yield None
+            return
+
+        count = min(count, len(self.sandbox_cpus))
+        if not self._waiters and len(self._free) >= count:
+            cpus = self._take(count)
+        else:
+            self.stats["waits"] += 1
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((count, future))
+            try:
+                cpus = await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # 刚分配到物理核就被取消
+                    self._give(future.result())
+                raise
+
+        self.stats["leases"] += 1
+        try:
+            yield cpus
+        finally:
+            self._give(cpus)
+
+    def report(self) -> Dict[str, Any]:
+        """CPU 绑定的设置和使用情况"""
+        return {
+            "enabled": self.enabled,
+            "reserved_cpus": self.reserved_cpus,
+            "sandbox_cpus": self.sandbox_cpus,
+            "free": len(self._free),
+            "waiting": sum(1 for _, future in self._waiters if not future.done()),
+            **self.stats,
+        }
+
+
+# 全局 CPU 分配实例
+core_allocator = CoreAllocator()
@@ -1,97 +1,615 @@
 import os
 import time
-import tempfile
-import subprocess
 import json
-from typing import Any, Tuple
+import signal
+import struct
+import asyncio
+import resource
+import statistics
+import threading
+import subprocess
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.executors.sandbox import SANDBOX_ENV, record_cpu_time, sandbox_registry
+from app.executors.stages import compile_pool, enter_run_stage
+from app.executors.affinity import core_allocator
 
 # 执行超时时间（秒）
-EXECUTION_TIMEOUT = 1000
+EXECUTION_TIMEOUT = settings.EXECUTION_TIMEOUT
 # 内存限制（MB）
-MEMORY_LIMIT = 512
+MEMORY_LIMIT = settings.MEMORY_LIMIT
+# 测试代码写入结果帧的文件描述符通过此环境变量传递
+RESULT_FD_ENV = "CODE_RUNNER_RESULT_FD"
 
 class BaseExecutor:
     """基础执行器"""
     
+    # 查询工具链版本的命令（参数列表），用于启动时探测工具链是否可用
+    VERSION_COMMAND: Optional[List[str]] = None
+    # 启动预热时编译并运行的最小程序，应输出 ok
+    WARMUP_CODE: Optional[str] = None
+    # 校准执行速度时运行的固定负载程序，None 表示不校准（见 app/services/calibration.py）
+    CALIBRATION_CODE: Optional[str] = None
+    # COMPILE_PROFILE_FLAGS 中的语言名，None 表示不支持编译配置
+    LANGUAGE: Optional[str] = None
+    # 编译器进程是否受 COMPILE_MEMORY_LIMIT 限制，启动时预留大量地址空间的编译器（如 JVM）不能限制
+    LIMIT_COMPILE_MEMORY: bool = True
+    # 运行时自身是否是多线程的（如 JVM、Go），开启 CPU 绑定时这些进程绑定 CPU_PINNING_RUNTIME_CORES 个物理核
+    MULTITHREADED_RUNTIME: bool = False
+    # 测试模板是否支持采样性能分析（请求 profile 为 true，见 PROFILE_SAMPLE_INTERVAL）
+    SUPPORTS_PROFILING: bool = False
+    
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
         raise NotImplementedError
     
-    def get_compile_command(self, filepath: str) -> str:
-        """获取编译命令"""
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
+        """获取编译命令（参数列表），不需要编译时返回 None"""
         return None
     
-    def get_execute_command(self, filepath: str) -> str:
-        """获取执行命令"""
+    def get_compile_flags(self, compile_profile: Optional[str]) -> List[str]:
+        """获取编译配置对应的编译选项，未指定编译配置或语言不支持时返回空列表"""
+        if not compile_profile or not self.LANGUAGE:
+            return []
+        return list(settings.COMPILE_PROFILE_FLAGS.get(self.LANGUAGE, {}).get(compile_profile, []))
+    
+    def get_execute_command(self, filepath: str) -> List[str]:
+        """获取执行命令（参数列表）"""
         raise NotImplementedError
     
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    def get_environment(self) -> Optional[Dict[str, str]]:
+        """编译和运行子进程的环境变量，None 表示继承当前进程的环境变量"""
+        return None
+    
+    async def _launch(
+        self,
+        argv: List[str],
+        cwd: Optional[str] = None,
+        input: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        on_frame: Optional[Callable[[Any], None]] = None,
+        run_stage: bool = True
+    ) -> Dict[str, Any]:
+        """
+        不经过 shell 直接启动进程并等待结束
+        
+        进程在独立的会话中运行，结束（包括超时和被取消）时结束整个进程组，不会留下占用 CPU 的子进程。
+        在工作目录中启动的进程带有 SANDBOX_ENV 环境变量，脱离进程组的后代进程由沙箱清理任务结束。
+        进程由 wait4 回收，回收时得到的 CPU 时间累加到调用方的 measure_cpu_time（见 app/executors/sandbox.py）。
+        
+        指定 on_frame 时为进程创建一个结果管道，写端的文件描述符通过 RESULT_FD_ENV 环境变量传递。
+        进程向管道写入的每一帧为 4 字节大端长度加 UTF-8 JSON，读到一帧即解码并回调，与标准输出和标准错误互不干扰。
+        
+        在提交中启动的进程默认属于运行阶段，启动前先进入运行阶段（见 app/executors/stages.py），编译进程不进入。
+        开启 CPU_PINNING_ENABLED 时，运行阶段的进程启动前还要领取独占的物理核（见 app/executors/affinity.py），
+        执行时间从进程启动开始计算，不包括等待的时间；编译进程不领取物理核，绑定到本进程绑定前的全部 CPU。
+        
+        Args:
+            argv: 命令参数列表
+            cwd: 工作目录
+            input: 写入标准输入的内容，None 表示不提供标准输入
+            timeout: 超时时间（秒），None 表示不限制
+            memory_limit: 地址空间上限（MB），None 表示不限制
+            on_frame: 每解码一个结果帧时调用，None 表示不创建结果管道
+            run_stage: 启动前是否进入运行阶段
+            
+        Returns:
+            Dict[str, Any]: stdout、stderr、returncode、execution_time(ms)、cpu_time(ms) 和 timeout，
+            指定 on_frame 时还包含按顺序解码的 frames
+        """
+        if not run_stage:
+            # 编译进程不领取物理核，也不继承本进程绑定的 CPU 集合
+            return await self._spawn(argv, cwd, input, timeout, memory_limit, on_frame, core_allocator.unpinned_cpus)
+        await enter_run_stage()
+        cores = settings.CPU_PINNING_RUNTIME_CORES if self.MULTITHREADED_RUNTIME else 1
+        async with core_allocator.lease(cores) as cpus:
+            return await self._spawn(argv, cwd, input, timeout, memory_limit, on_frame, cpus)
+    
+    async def _spawn(
+        self,
+        argv: List[str],
+        cwd: Optional[str],
+        input: Optional[bytes],
+        timeout: Optional[float],
+        memory_limit: Optional[int],
+        on_frame: Optional[Callable[[Any], None]],
+        cpus: Optional[List[int]]
+    ) -> Dict[str, Any]:
+        """启动进程并等待结束，参数和返回值见 _launch，cpus 为进程绑定的逻辑 CPU，None 表示不绑定"""
+        def limit_resources():
+            if memory_limit:
+                resource.setrlimit(resource.RLIMIT_AS, (memory_limit * 1024 * 1024, memory_limit * 1024 * 1024))
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+        
+        env = self.get_environment()
+        if cwd is not None or on_frame is not None:
+            env = dict(os.environ if env is None else env)
+        if cwd is not None:
+            env[SANDBOX_ENV] = cwd
+        
+        frames: List[Any] = []
+        result_read = result_write = None
+        if on_frame is not None:
+            result_read, result_write = os.pipe()
+            env[RESULT_FD_ENV] = str(result_write)
+        
+        start_ns = time.perf_counter_ns()
+        try:
+            process = subprocess.Popen(
+                argv,
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+                pass_fds=(result_write,) if result_write is not None else (),
+                preexec_fn=limit_resources if memory_limit or cpus else None
+            )
+        except FileNotFoundError:
+            if result_read is not None:
+                os.close(result_read)
+            # 与 shell 一致，命令不存在时返回 127
+            return {
+                "stdout": "",
+                "stderr": f"{argv[0]}: 命令不存在",
+                "returncode": 127,
+                "execution_time": (time.perf_counter_ns() - start_ns) / 1e6,
+                "cpu_time": 0.0,
+                "timeout": False,
+            }
+        finally:
+            # 写端只保留在子进程中，子进程退出后读端读到 EOF
+            if result_write is not None:
+                os.close(result_write)
+        
+        exited = self._wait_process(process.pid)
+        readers = [
+            asyncio.ensure_future(self._read_pipe(process.stdout)),
+            asyncio.ensure_future(self._read_pipe(process.stderr)),
+        ]
+        if input is not None:
+            readers.append(asyncio.ensure_future(self._write_pipe(process.stdin, input)))
+        frame_task = None
+        if result_read is not None:
+            frame_task = asyncio.create_task(self._read_frames(result_read, on_frame, frames))
+        outputs = asyncio.gather(exited, *readers)
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(outputs), timeout=timeout)
+            timed_out = False
+            # 结束留在进程组中的后台进程
+            self._kill_process_group(process.pid)
+        except asyncio.TimeoutError:
+            self._kill_sandbox(process.pid, cwd)
+            await outputs
+            timed_out = True
+        except asyncio.CancelledError:
+            self._kill_sandbox(process.pid, cwd)
+            for task in readers + ([frame_task] if frame_task is not None else []):
+                task.cancel()
+            status, usage = await exited
+            process.returncode = os.waitstatus_to_exitcode(status)
+            record_cpu_time(usage.ru_utime + usage.ru_stime)
+            await asyncio.gather(outputs, return_exceptions=True)
+            raise
+        
+        (status, usage), stdout, stderr = outputs.result()[:3]
+        # 已经由 wait4 回收，Popen 不再等待进程
+        process.returncode = os.waitstatus_to_exitcode(status)
+        cpu_time = usage.ru_utime + usage.ru_stime
+        record_cpu_time(cpu_time)
+        run = {
+            "stdout": stdout.decode(errors="replace"),
+            "stderr": stderr.decode(errors="replace"),
+            "returncode": process.returncode,
+            "execution_time": (time.perf_counter_ns() - start_ns) / 1e6,
+            "cpu_time": cpu_time * 1000,
+            "timeout": timed_out,
+        }
+        if frame_task is not None:
+            await frame_task
+            run["frames"] = frames
+        return run
+    
+    @staticmethod
+    def _wait_process(pid: int) -> "asyncio.Future[Tuple[int, Any]]":
+        """
+        在后台线程中用 wait4 等待并回收进程
+        
+        Args:
+            pid: 进程号
+            
+        Returns:
+            asyncio.Future: 结果为 (退出状态, 资源使用)，资源使用包括进程回收过的后代进程
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def resolve(outcome: Tuple[int, Any], error: Optional[BaseException]) -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(outcome)
+        
+        def wait() -> None:
+            try:
+                _, status, usage = os.wait4(pid, 0)
+                outcome, error = (status, usage), None
+            except OSError as exc:
+                outcome, error = None, exc
+            try:
+                loop.call_soon_threadsafe(resolve, outcome, error)
+            except RuntimeError:
+                # 事件循环已经关闭
+                pass
+        
+        threading.Thread(target=wait, name=f"wait4-{pid}", daemon=True).start()
+        return future
+    
+    @staticmethod
+    async def _read_pipe(pipe: IO[bytes]) -> bytes:
+        """读取管道直到 EOF，读取结束后关闭管道"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        try:
+            return await reader.read()
+        finally:
+            transport.close()
+    
+    @staticmethod
+    async def _write_pipe(pipe: IO[bytes], data: bytes) -> None:
+        """把数据写入管道后关闭，进程不读取标准输入或已退出时剩余数据被丢弃"""
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.connect_write_pipe(asyncio.Protocol, pipe)
+        transport.write(data)
+        # 缓冲的数据写完后关闭管道，进程读到 EOF
+        transport.close()
+    
+    @staticmethod
+    async def _read_frames(fd: int, on_frame: Callable[[Any], None], frames: List[Any]) -> None:
+        """
+        从结果管道逐帧读取并解码，直到 EOF 或者遇到无法解码的帧
+        
+        Args:
+            fd: 结果管道读端，读取结束后关闭
+            on_frame: 每解码一帧时调用
+            frames: 解码的帧按顺序追加到此列表
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", buffering=0)
+        )
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(4)
+                    frame = json.loads(await reader.readexactly(struct.unpack(">I", header)[0]))
+                except (asyncio.IncompleteReadError, ValueError):
+                    return
+                frames.append(frame)
+                on_frame(frame)
+        finally:
+            transport.close()
+    
+    async def _compile(self, filepath: str, cwd: str, compile_profile: Optional[str] = None) -> Optional[str]:
+        """
+        编译代码文件
+        
+        编译在编译池中进行，不占用执行槽位，超过 COMPILE_TIMEOUT 时结束编译器进程。
+        
+        Args:
+            filepath: 代码文件路径
+            cwd: 工作目录
+            compile_profile: 编译配置
+            
+        Returns:
+            Optional[str]: 编译错误信息，编译成功或不需要编译时返回 None
+        """
+        compile_cmd = self.get_compile_command(filepath, compile_profile)
+        if not compile_cmd:
+            return None
+        async with compile_pool.acquire():
+            compile_run = await self._launch(
+                compile_cmd,
+                cwd,
+                timeout=settings.COMPILE_TIMEOUT,
+                memory_limit=settings.COMPILE_MEMORY_LIMIT if self.LIMIT_COMPILE_MEMORY else None,
+                run_stage=False
+            )
+        if compile_run["timeout"]:
+            compile_pool.timeouts += 1
+            return f"编译错误: 编译超时（超过 {settings.COMPILE_TIMEOUT:g} 秒）"
+        if compile_run["returncode"] != 0:
+            compile_pool.failed += 1
+            return f"编译错误: {compile_run['stderr']}"
+        return None
+    
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行代码
         
         Args:
             code: 用户代码
             test_input: 测试输入
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
             
-            # 写入输入文件
-            input_file = os.path.join(temp_dir, "input.json")
-            with open(input_file, "w") as f:
-                json.dump(test_input, f)
-            
             # 编译代码（如果需要）
-            compile_cmd = self.get_compile_command(filepath)
-            if compile_cmd:
-                compile_process = subprocess.run(
-                    compile_cmd, 
-                    shell=True, 
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True
-                )
-                
-                if compile_process.returncode != 0:
-                    return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
-            
-            # 执行代码
-            start_time = time.time()
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
+            
+            # 执行代码，测试输入以 JSON 写入标准输入，内存限制为 MEMORY_LIMIT MB
+            run = await self._launch(
+                self.get_execute_command(filepath),
+                temp_dir,
+                input=json.dumps(test_input).encode(),
+                timeout=timeout,
+                memory_limit=MEMORY_LIMIT
+            )
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            
+            # 解析输出
             try:
-                # 设置资源限制
-                def limit_resources():
-                    # 设置内存限制 (MEMORY_LIMIT MB)
-                    import resource
-                    resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT * 1024 * 1024, MEMORY_LIMIT * 1024 * 1024))
-                
-                execute_cmd = self.get_execute_command(filepath)
-                process = subprocess.run(
-                    execute_cmd,
-                    shell=True,
-                    cwd=temp_dir,
-                    input=open(input_file, "r").read(),
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT,
-                    preexec_fn=limit_resources
-                )
-                
-                end_time = time.time()
-                execution_time = (end_time - start_time) * 1000  # 转换为毫秒
-                
-                # 解析输出
-                try:
-                    output = json.loads(process.stdout)
-                except:
-                    output = process.stdout.strip()
-                
-                return output, execution_time, 0  # 简化版不计算内存使用
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as exc:
-                return {"error": f"执行错误: {str(exc)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+                output = json.loads(run["stdout"])
+            except ValueError:
+                output = run["stdout"].strip()
+            
+            return output, run["execution_time"], 0  # 简化版不计算内存使用
+
+    async def execute_harness(
+        self,
+        code: str,
+        timeout: Optional[float] = None,
+        compile_profile: Optional[str] = None,
+        on_result: Optional[Callable[[Any], None]] = None,
+        input: Optional[bytes] = None
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        执行测试代码
+        
+        测试代码把每个测试用例的结果作为一帧写入结果管道（见 _launch），用户代码的标准输出和标准错误单独收集。
+        
+        Args:
+            code: 测试代码
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
+            on_result: 每收到一个测试用例的结果时调用
+            input: 写入标准输入的内容，即本次运行的参数（见 CodeGenerator.harness_input）
+            
+        Returns:
+            Tuple[Optional[str], Optional[Dict[str, Any]]]: (编译错误信息, 运行结果)，
+            运行结果见 _launch，frames 为按执行顺序收到的测试结果，编译失败时为 None
+        """
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
+            filepath = self.prepare_code_file(temp_dir, code)
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return compile_error, None
+            run = await self._launch(
+                self.get_execute_command(filepath),
+                temp_dir,
+                input=input,
+                timeout=timeout,
+                on_frame=on_result or (lambda frame: None)
+            )
+            return None, run
+    
+    async def probe_version(self, timeout: float = 30) -> Tuple[bool, str]:
+        """
+        探测工具链版本
+        
+        Args:
+            timeout: 超时时间（秒）
+            
+        Returns:
+            Tuple[bool, str]: (工具链是否可用, 版本信息或错误信息)
+        """
+        if not self.VERSION_COMMAND:
+            return True, ""
+        run = await self._launch(self.VERSION_COMMAND, timeout=timeout)
+        if run["timeout"]:
+            raise asyncio.TimeoutError(f"探测工具链版本超过 {timeout} 秒")
+        # 部分工具链（例如 javac -version）把版本信息输出到标准错误
+        text = (run["stdout"] + run["stderr"]).strip()
+        if run["returncode"] != 0:
+            return False, text or f"进程退出码: {run['returncode']}"
+        # 只保留第一行，例如 "g++ (Debian 12.2.0-14) 12.2.0"
+        return True, text.splitlines()[0] if text else ""
+    
+    async def warmup(self) -> Dict[str, Any]:
+        """
+        预热工具链
+        
+        探测工具链版本，然后编译并运行一次 WARMUP_CODE，让编译器、运行时和标准库进入页缓存。
+        子类可以覆盖此方法预热各自的编译缓存。
+        
+        Returns:
+            Dict[str, Any]: available（工具链是否可用）、version、probe_time 和 warmup_time（毫秒）、
+            失败时的 error
+        """
+        start_time = time.time()
+        available, version = await self.probe_version()
+        result: Dict[str, Any] = {
+            "available": available,
+            "version": version if available else None,
+            "probe_time": (time.time() - start_time) * 1000,
+        }
+        if not available:
+            result["error"] = version
+            return result
+        if not self.WARMUP_CODE:
+            return result
+        
+        start_time = time.time()
+        compile_error, runs = await self.execute_stdin_cases(
+            self.WARMUP_CODE, [""], time_limit=EXECUTION_TIMEOUT, time_budget=EXECUTION_TIMEOUT
+        )
+        result["warmup_time"] = (time.time() - start_time) * 1000
+        run = runs[0]
+        if compile_error is not None:
+            result["error"] = compile_error
+        elif run is None or run["timeout"] or run["returncode"] != 0 or run["stdout"].strip() != "ok":
+            result["error"] = (run or {}).get("stderr") or "预热程序的输出不正确"
+        return result
+    
+    async def calibrate(self, runs: int = 5) -> Optional[Tuple[float, float]]:
+        """
+        测量校准负载的执行时间和进程启动时间
+        
+        WARMUP_CODE 和 CALIBRATION_CODE 各编译一次后依次运行 runs 次，两者执行时间中位数的差即校准负载本身的
+        执行时间，不包括进程启动和运行时初始化的时间；WARMUP_CODE 执行时间的中位数即进程启动时间。
+        
+        Args:
+            runs: 运行次数
+            
+        Returns:
+            Optional[Tuple[float, float]]: 校准负载的执行时间和进程启动时间（毫秒），没有校准程序时返回 None
+            
+        Raises:
+            RuntimeError: 校准程序编译或运行失败
+        """
+        if not self.WARMUP_CODE or not self.CALIBRATION_CODE:
+            return None
+        
+        medians = []
+        for code in (self.WARMUP_CODE, self.CALIBRATION_CODE):
+            compile_error, results = await self.execute_stdin_cases(
+                code, [""] * runs, time_limit=EXECUTION_TIMEOUT, time_budget=EXECUTION_TIMEOUT * runs, concurrency=1
+            )
+            if compile_error is not None:
+                raise RuntimeError(compile_error)
+            for run in results:
+                if run is None or run["timeout"] or run["returncode"] != 0:
+                    raise RuntimeError((run or {}).get("stderr") or "校准程序运行失败")
+            medians.append(statistics.median(run["execution_time"] for run in results))
+        
+        if medians[1] <= medians[0]:
+            raise RuntimeError("校准负载的执行时间不大于进程启动的时间")
+        return medians[1] - medians[0], medians[0]
+    
+    @staticmethod
+    def _kill_process_group(pid: int) -> None:
+        """结束以 pid 为组长的整个进程组"""
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    
+    @classmethod
+    def _kill_sandbox(cls, pid: int, workspace: Optional[str]) -> None:
+        """结束进程组，以及在工作目录中启动、脱离了进程组的进程（它们可能仍然持有输出管道）"""
+        cls._kill_process_group(pid)
+        if workspace is not None:
+            sandbox_registry.kill_processes(workspace)
+
+    async def execute_stdin_cases(
+        self,
+        code: str,
+        inputs: List[str],
+        time_limit: float,
+        time_budget: float,
+        concurrency: int = 0,
+        should_stop: Optional[Callable[[int, Dict[str, Any]], bool]] = None,
+        compile_profile: Optional[str] = None,
+        on_budget_exhausted: Optional[Callable[[int], None]] = None
+    ) -> Tuple[Optional[str], List[Optional[Dict[str, Any]]]]:
+        """
+        编译一次代码，然后以标准输入/标准输出的方式并行运行多个测试输入
+        
+        Args:
+            code: 用户代码
+            inputs: 测试输入列表（按执行优先级排列）
+            time_limit: 单个测试输入的时间限制（秒）
+            time_budget: 全部测试输入的时间预算（秒），预算用尽后未开始的测试输入不再执行
+            concurrency: 并发运行的进程数，0 表示使用 CPU 核数
+            should_stop: 每个测试输入运行结束后调用，返回 True 时取消剩余的测试输入
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
+            on_budget_exhausted: 测试输入因时间预算用尽而未执行时调用，参数为测试输入的下标；
+                因 should_stop 被取消的测试输入不调用
+            
+        Returns:
+            Tuple[Optional[str], List[Optional[Dict[str, Any]]]]: (编译错误, 运行结果列表)。
+            运行结果包含 stdout、stderr、returncode、execution_time(ms) 和 timeout，
+            未执行的测试输入对应的结果为 None
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+        
+        with sandbox_registry.workspace() as temp_dir:
+            # 准备代码文件并编译一次
+            filepath = self.prepare_code_file(temp_dir, code)
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return compile_error, results
+            
+            # 时间预算从领取到执行槽位后开始计算
+            await enter_run_stage()
+            execute_cmd = self.get_execute_command(filepath)
+            semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+            deadline = time.time() + time_budget
+            stopped = asyncio.Event()
+            
+            async def run_case(index: int) -> None:
+                async with semaphore:
+                    if stopped.is_set():
+                        return
+                    if time.time() >= deadline:
+                        if on_budget_exhausted:
+                            on_budget_exhausted(index)
+                        return
+                    
+                    results[index] = await self._launch(
+                        execute_cmd,
+                        temp_dir,
+                        input=inputs[index].encode(),
+                        timeout=min(time_limit, deadline - time.time())
+                    )
+                    if should_stop and should_stop(index, results[index]):
+                        stopped.set()
+            
+            tasks = [asyncio.create_task(run_case(i)) for i in range(len(inputs))]
+            stop_waiter = asyncio.create_task(stopped.wait())
+            try:
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending | {stop_waiter}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    pending.discard(stop_waiter)
+                    if stopped.is_set():
+                        # 取消仍在运行的测试输入
+                        for task in pending:
+                            task.cancel()
+                        await asyncio.gather(*pending, return_exceptions=True)
+                        break
+            finally:
+                stop_waiter.cancel()
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+            
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception():
+                    raise task.exception()
+        
+        return None, results
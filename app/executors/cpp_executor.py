@@ -1,12 +1,168 @@
 import os
-import subprocess
-import tempfile
+import re
 import time
-from typing import Any, Tuple
+import hashlib
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from app.core.config import settings
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
+from app.executors.stages import compile_pool
+
+logger = logging.getLogger(__name__)
+
+# 提交中的标准头文件
+INCLUDE_PATTERN = re.compile(r"^[ \t]*#[ \t]*include[ \t]*<([^>]+)>", re.MULTILINE)
+# 出现在头文件之前时可能改变头文件内容的预处理指令
+DIRECTIVE_PATTERN = re.compile(r"^[ \t]*#[ \t]*(define|undef|pragma|if|ifdef|ifndef)\b", re.MULTILINE)
 
 class CppExecutor(BaseExecutor):
-    """C++代码执行器"""
+    """
+    C++代码执行器
+    
+    预热时为 CPP_PCH_HEADER_SETS 中的每个头文件集合生成预编译头，按编译器版本和编译选项分目录保存。
+    提交包含某个集合中的全部头文件时，编译时通过 -include 使用该集合的预编译头，
+    因此不会引入提交本身没有包含的头文件。预编译头与编译选项不兼容时 g++ 会忽略它并正常解析头文件。
+    """
+    
+    LANGUAGE = "cpp"
+    VERSION_COMMAND = ["g++", "--version"]
+    WARMUP_CODE = """\
+#include <iostream>
+
+int main() {
+    std::cout << "ok" << std::endl;
+    return 0;
+}
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+#include <iostream>
+
+int main() {
+    long long x = 1, s = 0;
+    for (int i = 0; i < 20000000; i++) {
+        x = (x * 1103515245 + 12345) & 2147483647;
+        s ^= x;
+    }
+    std::cout << s << std::endl;
+    return 0;
+}
+"""
+    # 编译选项，编译配置的选项附加在后面，预编译头只对相同的编译选项有效
+    COMPILE_FLAGS = ["-std=c++17"]
+    
+    def __init__(self):
+        self.pch_dir = os.path.abspath(settings.CPP_PCH_DIR)
+        # 编译器版本，预热时探测，探测之前不使用预编译头
+        self.compiler_version: Optional[str] = None
+        # 预编译头标识 -> [(头文件路径, 头文件集合)]，按预编译头大小从大到小排列
+        self._precompiled_headers: Dict[str, List[Tuple[str, FrozenSet[str]]]] = {}
+    
+    def _pch_key(self, flags: List[str]) -> str:
+        """预编译头标识，由编译器版本和编译选项决定"""
+        return hashlib.sha256("\0".join([self.compiler_version or "", *flags]).encode()).hexdigest()[:16]
+    
+    async def build_precompiled_headers(self, flags: List[str]) -> List[str]:
+        """
+        为 CPP_PCH_HEADER_SETS 中的头文件集合生成预编译头，已生成的预编译头直接复用
+        
+        Args:
+            flags: 编译选项
+            
+        Returns:
+            List[str]: 可用的头文件集合名
+        """
+        key = self._pch_key(flags)
+        directory = os.path.join(self.pch_dir, key)
+        os.makedirs(directory, exist_ok=True)
+        built = []
+        for name, headers in settings.CPP_PCH_HEADER_SETS.items():
+            header = os.path.join(directory, f"{name}.h")
+            pch = header + ".gch"
+            content = "".join(f"#include <{h}>\n" for h in headers)
+            try:
+                with open(header) as f:
+                    up_to_date = f.read() == content and os.path.exists(pch)
+            except FileNotFoundError:
+                up_to_date = False
+            
+            if not up_to_date:
+                # 先生成到临时文件再重命名，多个 worker 进程同时生成时不会读取到不完整的文件
+                suffix = f".{os.getpid()}.tmp"
+                with open(header + suffix, "w") as f:
+                    f.write(content)
+                os.replace(header + suffix, header)
+                # 与提交的编译一样在编译池中进行，受 COMPILE_TIMEOUT 和编译内存限制约束
+                async with compile_pool.acquire():
+                    run = await self._launch(
+                        ["g++", *flags, "-x", "c++-header", header, "-o", pch + suffix],
+                        timeout=settings.COMPILE_TIMEOUT,
+                        memory_limit=settings.COMPILE_MEMORY_LIMIT if self.LIMIT_COMPILE_MEMORY else None,
+                        run_stage=False
+                    )
+                if run["timeout"] or run["returncode"] != 0:
+                    reason = f"超过 {settings.COMPILE_TIMEOUT:g} 秒" if run["timeout"] else run["stderr"]
+                    logger.warning("生成预编译头 %s 失败: %s", name, reason)
+                    if os.path.exists(pch + suffix):
+                        os.remove(pch + suffix)
+                    continue
+                os.replace(pch + suffix, pch)
+            built.append((os.path.getsize(pch), header, frozenset(headers)))
+        
+        self._precompiled_headers[key] = [(header, headers) for _, header, headers in sorted(built, reverse=True)]
+        return [os.path.basename(header)[:-2] for _, header, _ in built]
+    
+    def select_precompiled_header(self, code: str, flags: List[str]) -> Optional[str]:
+        """
+        选择提交可以使用的预编译头
+        
+        提交必须包含头文件集合中的全部头文件，并且在最后一个标准头文件之前没有 #define、#pragma、
+        #if 等可能改变头文件内容的预处理指令。
+        
+        Args:
+            code: 提交的代码
+            flags: 编译选项
+            
+        Returns:
+            Optional[str]: 用于 -include 的头文件路径，没有可用的预编译头时返回 None
+        """
+        if self.compiler_version is None:
+            return None
+        candidates = self._precompiled_headers.get(self._pch_key(flags))
+        if not candidates:
+            return None
+        matches = list(INCLUDE_PATTERN.finditer(code))
+        if not matches or DIRECTIVE_PATTERN.search(code, 0, matches[-1].start()):
+            return None
+        included = {match.group(1).strip() for match in matches}
+        for header, headers in candidates:
+            if headers <= included:
+                return header
+        return None
+    
+    async def warmup(self) -> Dict[str, Any]:
+        """
+        预热工具链，并生成预编译头
+        
+        Returns:
+            Dict[str, Any]: 在 BaseExecutor.warmup 的结果之外，包含 precompiled_headers（可用的头文件集合名）
+            和 pch_time（毫秒）
+        """
+        result = await super().warmup()
+        if not result["available"] or result.get("error"):
+            return result
+        
+        start_time = time.time()
+        self.compiler_version = result["version"]
+        # 为未指定编译配置和每个编译配置分别生成预编译头
+        profiles = [None, *settings.COMPILE_PROFILE_FLAGS.get(self.LANGUAGE, {})]
+        for profile in profiles:
+            result["precompiled_headers"] = await self.build_precompiled_headers(
+                self.COMPILE_FLAGS + self.get_compile_flags(profile)
+            )
+        result["pch_time"] = (time.time() - start_time) * 1000
+        return result
     
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
@@ -28,63 +184,50 @@ int main() {{
             f.write(code)
         return filepath
     
-    def get_compile_command(self, filepath: str) -> str:
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
         """获取编译命令"""
         output_path = os.path.join(os.path.dirname(filepath), "solution")
-        return f"g++ -std=c++17 {filepath} -o {output_path}"
+        flags = self.COMPILE_FLAGS + self.get_compile_flags(compile_profile)
+        with open(filepath) as f:
+            header = self.select_precompiled_header(f.read(), flags)
+        include = ["-include", header] if header else []
+        return ["g++", *flags, *include, filepath, "-o", output_path]
     
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return os.path.join(os.path.dirname(filepath), "solution")
+        return [os.path.join(os.path.dirname(filepath), "solution")]
     
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行C++代码
         
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
             
             # 编译代码
-            compile_process = subprocess.run(
-                self.get_compile_command(filepath),
-                shell=True,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            if compile_process.returncode != 0:
-                return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
             
             # 执行代码
-            start_time = time.time()
-            try:
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT
-                )
-                
-                execution_time = (time.time() - start_time) * 1000  # 转换为毫秒
-                
-                if process.returncode != 0:
-                    return {"error": f"执行错误: {process.stderr}"}, execution_time, 0
-                
-                # 返回执行结果
-                return process.stdout.strip(), execution_time, 0
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as e:
-                return {"error": f"执行错误: {str(e)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["returncode"] != 0:
+                return {"error": f"执行错误: {run['stderr']}"}, run["execution_time"], 0
+            
+            # 返回执行结果
+            return run["stdout"].strip(), run["execution_time"], 0
@@ -1,13 +1,157 @@
 import os
-import subprocess
-import tempfile
 import time
-from typing import Any, Tuple
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
+from app.executors.stages import compile_pool
+
+logger = logging.getLogger(__name__)
 
 
 class GoExecutor(BaseExecutor):
-    """Go代码执行器"""
+    """
+    Go代码执行器
+
+    使用 GO_CACHE_DIR 下独立的 GOCACHE 和 GOMODCACHE，编译结果在提交之间复用，
+    标准库包只在第一次使用时编译。GOCACHE 支持多个进程并发使用，
+    总大小超过 GO_CACHE_MAX_BYTES 时按最近使用时间删除缓存条目。
+    """
+
+    VERSION_COMMAND = ["go", "version"]
+    # go 命令和编译器的运行时会预留大量地址空间，不能用 RLIMIT_AS 限制
+    LIMIT_COMPILE_MEMORY = False
+    MULTITHREADED_RUNTIME = True
+    WARMUP_CODE = """\
+package main
+
+import "fmt"
+
+func main() {
+    fmt.Println("ok")
+}
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+package main
+
+import "fmt"
+
+func main() {
+    var x, s int64 = 1, 0
+    for i := 0; i < 20000000; i++ {
+        x = (x*1103515245 + 12345) & 2147483647
+        s ^= x
+    }
+    fmt.Println(s)
+}
+"""
+
+    def __init__(self):
+        cache_dir = os.path.abspath(settings.GO_CACHE_DIR)
+        # go 要求 GOCACHE 和 GOMODCACHE 是绝对路径
+        self.build_cache = os.path.join(cache_dir, "build")
+        self.mod_cache = os.path.join(cache_dir, "mod")
+        os.makedirs(self.build_cache, exist_ok=True)
+        os.makedirs(self.mod_cache, exist_ok=True)
+        self._trim_lock = threading.Lock()
+        self._last_trim = 0.0
+
+    def get_environment(self) -> Optional[Dict[str, str]]:
+        """编译时使用持久化的 GOCACHE 和 GOMODCACHE"""
+        env = dict(os.environ)
+        env["GOCACHE"] = self.build_cache
+        env["GOMODCACHE"] = self.mod_cache
+        return env
+
+    def trim_cache(self) -> List[str]:
+        """
+        删除最近最少使用的 GOCACHE 条目，直到总大小不超过 GO_CACHE_MAX_BYTES 的 80%
+
+        go 读取缓存条目时会更新文件的修改时间（精度为一小时），被删除的条目在下次编译时重新生成。
+
+        Returns:
+            List[str]: 被删除的文件路径
+        """
+        if settings.GO_CACHE_MAX_BYTES <= 0:
+            return []
+        with self._trim_lock:
+            self._last_trim = time.time()
+            entries = []
+            # 缓存条目位于 00 到 ff 的子目录中，根目录下的 README、trim.txt 等文件由 go 维护
+            for subdir in os.scandir(self.build_cache):
+                if not subdir.is_dir():
+                    continue
+                for entry in os.scandir(subdir.path):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            if total <= settings.GO_CACHE_MAX_BYTES:
+                return []
+
+            target = settings.GO_CACHE_MAX_BYTES * 0.8
+            removed = []
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed.append(path)
+            logger.info("GOCACHE 超过大小上限，删除了 %d 个缓存条目", len(removed))
+            return removed
+
+    def _schedule_trim(self) -> None:
+        """距离上次检查超过 GO_CACHE_TRIM_INTERVAL 时，在后台线程中检查 GOCACHE 的大小"""
+        if time.time() - self._last_trim < settings.GO_CACHE_TRIM_INTERVAL:
+            return
+        self._last_trim = time.time()
+        asyncio.get_running_loop().run_in_executor(None, self.trim_cache)
+
+    async def warmup(self) -> Dict[str, Any]:
+        """
+        预热工具链，并预先编译 GO_WARMUP_PACKAGES 中的标准库包
+
+        Returns:
+            Dict[str, Any]: 在 BaseExecutor.warmup 的结果之外，包含预编译标准库包的耗时 cache_warmup_time（毫秒）
+        """
+        result = await super().warmup()
+        if not result["available"] or result.get("error") or not settings.GO_WARMUP_PACKAGES:
+            return result
+
+        start_time = time.time()
+        # 与提交的编译一样在编译池中进行，受 COMPILE_TIMEOUT 和编译内存限制约束
+        with sandbox_registry.workspace() as temp_dir:
+            async with compile_pool.acquire():
+                run = await self._launch(
+                    ["go", "build", *settings.GO_WARMUP_PACKAGES],
+                    temp_dir,
+                    timeout=settings.COMPILE_TIMEOUT,
+                    memory_limit=settings.COMPILE_MEMORY_LIMIT if self.LIMIT_COMPILE_MEMORY else None,
+                    run_stage=False
+                )
+        result["cache_warmup_time"] = (time.time() - start_time) * 1000
+        if run["timeout"]:
+            result["error"] = f"预编译标准库包超时（超过 {settings.COMPILE_TIMEOUT:g} 秒）"
+        elif run["returncode"] != 0:
+            result["error"] = f"预编译标准库包失败: {run['stderr']}"
+        await asyncio.to_thread(self.trim_cache)
+        return result
+
+    async def execute_stdin_cases(self, *args, **kwargs):
+        """见 BaseExecutor.execute_stdin_cases，编译后在后台检查 GOCACHE 的大小"""
+        try:
+            return await super().execute_stdin_cases(*args, **kwargs)
+        finally:
+            self._schedule_trim()
 
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
@@ -28,63 +172,47 @@ func main() {{
             f.write(code)
         return filepath
 
-    def get_compile_command(self, filepath: str) -> str:
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
         """获取编译命令"""
         output_dir = os.path.dirname(filepath)
-        return f"go build -o {os.path.join(output_dir, 'solution')} {filepath}"
+        return ["go", "build", "-o", os.path.join(output_dir, "solution"), filepath]
 
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return os.path.join(os.path.dirname(filepath), "solution")
+        return [os.path.join(os.path.dirname(filepath), "solution")]
 
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行Go代码
 
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
 
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
 
             # 编译代码
-            compile_process = subprocess.run(
-                self.get_compile_command(filepath),
-                shell=True,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True
-            )
-
-            if compile_process.returncode != 0:
-                return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            self._schedule_trim()
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
 
             # 执行代码
-            start_time = time.time()
-            try:
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT
-                )
-
-                execution_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-                if process.returncode != 0:
-                    return {"error": f"执行错误: {process.stderr}"}, execution_time, 0
-
-                # 返回执行结果
-                return process.stdout.strip(), execution_time, 0
-
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as e:
-                return {"error": f"执行错误: {str(e)}"}, (time.time() - start_time) * 1000, 0
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["returncode"] != 0:
+                return {"error": f"执行错误: {run['stderr']}"}, run["execution_time"], 0
+
+            # 返回执行结果
+            return run["stdout"].strip(), run["execution_time"], 0
@@ -1,14 +1,37 @@
 import os
-import subprocess
-import tempfile
-import time
 import platform
-from typing import Any, Tuple
-from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
+from typing import Any, List, Optional, Tuple
+from app.executors.sandbox import sandbox_registry
+from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT, MEMORY_LIMIT
 
 class JavaExecutor(BaseExecutor):
     """Java代码执行器"""
     
+    VERSION_COMMAND = ["javac", "-version"]
+    # javac 运行在 JVM 上，启动时按物理内存预留堆的地址空间，不能用 RLIMIT_AS 限制
+    LIMIT_COMPILE_MEMORY = False
+    MULTITHREADED_RUNTIME = True
+    WARMUP_CODE = """\
+public class Main {
+    public static void main(String[] args) {
+        System.out.println("ok");
+    }
+}
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+public class Main {
+    public static void main(String[] args) {
+        long x = 1, s = 0;
+        for (int i = 0; i < 20000000; i++) {
+            x = (x * 1103515245L + 12345L) & 2147483647L;
+            s ^= x;
+        }
+        System.out.println(s);
+    }
+}
+"""
+    
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件，将代码写入Main.java"""
         filepath = os.path.join(temp_dir, "Main.java")
@@ -29,69 +52,47 @@ public class Main {{
             f.write(code)
         return filepath
     
-    def get_compile_command(self, filepath: str) -> str:
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
         """获取编译命令"""
-        return f"javac {filepath}"
+        return ["javac", filepath]
     
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
         # 获取包含编译后的.class文件的目录
         directory = os.path.dirname(filepath)
-        return f"java -Xmx{EXECUTION_TIMEOUT}M -cp {directory} Main"
+        return ["java", f"-Xmx{MEMORY_LIMIT}M", "-cp", directory, "Main"]
     
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行Java代码
         
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
             
             # 编译代码
-            compile_process = subprocess.run(
-                self.get_compile_command(filepath),
-                shell=True,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            if compile_process.returncode != 0:
-                return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
             
             # 执行代码
-            start_time = time.time()
-            try:
-                # 在非macOS系统上设置资源限制
-                kwargs = {}
-
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT,
-                    **kwargs
-                )
-                
-                end_time = time.time()
-                execution_time = (end_time - start_time) * 1000  # 转换为毫秒
-                
-                if process.stderr:
-                    return {"error": process.stderr}, execution_time, 0
-                
-                # 返回输出
-                return process.stdout.strip(), execution_time, 0
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as exc:
-                return {"error": f"执行错误: {str(exc)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["stderr"]:
+                return {"error": run["stderr"]}, run["execution_time"], 0
+            
+            # 返回输出
+            return run["stdout"].strip(), run["execution_time"], 0
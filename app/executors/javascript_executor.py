@@ -1,15 +1,27 @@
 import os
-import subprocess
-import tempfile
-import time
 import platform
-from typing import Any, Tuple
+from typing import Any, List, Optional, Tuple
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
 import json
 
 class JavaScriptExecutor(BaseExecutor):
     """JavaScript代码执行器"""
     
+    VERSION_COMMAND = ["node", "--version"]
+    WARMUP_CODE = """\
+console.log("ok");
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+let x = 1, s = 0;
+for (let i = 0; i < 20000000; i++) {
+    x = (Math.imul(x, 1103515245) + 12345) & 2147483647;
+    s ^= x;
+}
+console.log(s);
+"""
+    
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
         filepath = os.path.join(temp_dir, "solution.js")
@@ -17,55 +29,40 @@ class JavaScriptExecutor(BaseExecutor):
             f.write(code)
         return filepath
     
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return f"node {filepath}"
+        return ["node", filepath]
     
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行代码
         
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
             
             # 执行代码
-            start_time = time.time()
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["stderr"]:
+                return {"error": run["stderr"]}, run["execution_time"], 0
+            
+            # 尝试解析 JSON 输出，如果失败则返回原始输出
+            output = run["stdout"].strip()
             try:
-                # 在非macOS系统上设置资源限制
-                kwargs = {}
-
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT,
-                    **kwargs
-                )
-                
-                end_time = time.time()
-                execution_time = (end_time - start_time) * 1000  # 转换为毫秒
-                
-                if process.stderr:
-                    return {"error": process.stderr}, execution_time, 0
-                
-                # 尝试解析 JSON 输出，如果失败则返回原始输出
-                try:
-                    output = process.stdout.strip()
-                    return json.loads(output), execution_time, 0
-                except json.JSONDecodeError:
-                    return output, execution_time, 0
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as exc:
-                return {"error": f"执行错误: {str(exc)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+                return json.loads(output), run["execution_time"], 0
+            except json.JSONDecodeError:
+                return output, run["execution_time"], 0
@@ -1,14 +1,27 @@
 import os
-import subprocess
-import tempfile
-import time
 import platform
-from typing import Any, Tuple
+from typing import Any, List, Optional, Tuple
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
 
 class PythonExecutor(BaseExecutor):
     """Python代码执行器"""
     
+    VERSION_COMMAND = ["python3", "--version"]
+    SUPPORTS_PROFILING = True
+    WARMUP_CODE = """\
+print("ok")
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+x = 1
+s = 0
+for i in range(1000000):
+    x = (x * 1103515245 + 12345) & 2147483647
+    s ^= x
+print(s)
+"""
+    
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
         filepath = os.path.join(temp_dir, "solution.py")
@@ -16,51 +29,36 @@ class PythonExecutor(BaseExecutor):
             f.write(code)
         return filepath
     
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return f"python3 {filepath}"
+        return ["python3", filepath]
     
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行代码
         
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
             
             # 执行代码
-            start_time = time.time()
-            try:
-                # 在非macOS系统上设置资源限制
-                kwargs = {}
-
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT,
-                    **kwargs
-                )
-                
-                end_time = time.time()
-                execution_time = (end_time - start_time) * 1000  # 转换为毫秒
-                
-                if process.stderr:
-                    return {"error": process.stderr}, execution_time, 0
-                
-                # 返回输出
-                return process.stdout.strip(), execution_time, 0  # 简化版不计算内存使用
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as exc:
-                return {"error": f"执行错误: {str(exc)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["returncode"] != 0:
+                return {"error": run["stderr"]}, run["execution_time"], 0
+            
+            # 返回输出
+            return run["stdout"].strip(), run["execution_time"], 0  # 简化版不计算内存使用
@@ -1,14 +1,32 @@
 import os
-import subprocess
-import tempfile
-import time
-from typing import Any, Tuple
+from typing import Any, List, Optional, Tuple
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
 
 
 class RustExecutor(BaseExecutor):
     """Rust代码执行器"""
 
+    LANGUAGE = "rust"
+    VERSION_COMMAND = ["rustc", "--version"]
+    WARMUP_CODE = """\
+fn main() {
+    println!("ok");
+}
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+fn main() {
+    let mut x: i64 = 1;
+    let mut s: i64 = 0;
+    for _ in 0..20000000 {
+        x = (x * 1103515245 + 12345) & 2147483647;
+        s ^= x;
+    }
+    println!("{}", s);
+}
+"""
+
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
         filepath = os.path.join(temp_dir, "main.rs")
@@ -27,63 +45,47 @@ fn main() {{
             f.write(code)
         return filepath
 
-    def get_compile_command(self, filepath: str) -> str:
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
         """获取编译命令"""
         output_dir = os.path.dirname(filepath)
-        return f"rustc {filepath} -o {os.path.join(output_dir, 'solution')}"
+        flags = self.get_compile_flags(compile_profile)
+        return ["rustc", *flags, filepath, "-o", os.path.join(output_dir, "solution")]
 
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return os.path.join(os.path.dirname(filepath), "solution")
+        return [os.path.join(os.path.dirname(filepath), "solution")]
 
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行Rust代码
 
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
 
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
 
             # 编译代码
-            compile_process = subprocess.run(
-                self.get_compile_command(filepath),
-                shell=True,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True
-            )
-
-            if compile_process.returncode != 0:
-                return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
 
             # 执行代码
-            start_time = time.time()
-            try:
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT
-                )
-
-                execution_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-                if process.returncode != 0:
-                    return {"error": f"执行错误: {process.stderr}"}, execution_time, 0
-
-                # 返回执行结果
-                return process.stdout.strip(), execution_time, 0
-
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as e:
-                return {"error": f"执行错误: {str(e)}"}, (time.time() - start_time) * 1000, 0
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["returncode"] != 0:
+                return {"error": f"执行错误: {run['stderr']}"}, run["execution_time"], 0
+
+            # 返回执行结果
+            return run["stdout"].strip(), run["execution_time"], 0
@@ -0,0 +1,257 @@
+"""
+沙箱工作目录和泄漏清理
+
+每次编译/运行使用一个以 code-runner-<进程号>- 为前缀的工作目录，在工作目录中启动的进程通过
+环境变量 CODE_RUNNER_SANDBOX 记录所属的工作目录，用户程序创建的子进程会继承这个环境变量。
+进程组之外的进程（例如调用 setsid 脱离进程组的后台进程）在工作目录删除后仍然可以被识别出来。
+
+后台清理任务定期扫描 /proc：
+  - 所属工作目录已经删除的进程视为泄漏，直接结束；
+  - 创建进程已经退出（或者当前进程内不再使用）的工作目录视为泄漏，直接删除。
+
+沙箱进程结束后由 wait4 回收，回收时得到的 CPU 时间（包括进程回收过的后代进程）累加到当前上下文中
+所有的 CpuMeter，调用方用 measure_cpu_time 统计一次请求实际消耗的 CPU 时间。
+"""
+import os
+import time
+import shutil
+import signal
+import asyncio
+import logging
+import tempfile
+import itertools
+import threading
+import contextlib
+import contextvars
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 记录进程所属工作目录的环境变量
+SANDBOX_ENV = "CODE_RUNNER_SANDBOX"
+# 工作目录名前缀
+WORKSPACE_PREFIX = "code-runner-"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class CpuMeter:
+    """累计沙箱进程消耗的 CPU 时间"""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+
+# 当前上下文中的 CpuMeter，嵌套的 measure_cpu_time 都会被累加
+_cpu_meters: contextvars.ContextVar[Tuple[CpuMeter, ...]] = contextvars.ContextVar("cpu_meters", default=())
+
+
+@contextlib.contextmanager
+def measure_cpu_time() -> Iterator[CpuMeter]:
+    """
+    统计上下文中（包括其中创建的任务）启动的沙箱进程消耗的用户态和内核态 CPU 时间
+
+    Yields:
+        CpuMeter: 退出时 seconds 为累计的 CPU 时间（秒）
+    """
+    meter = CpuMeter()
+    token = _cpu_meters.set(_cpu_meters.get() + (meter,))
+    try:
+        yield meter
+    finally:
+        _cpu_meters.reset(token)
+
+
+def record_cpu_time(seconds: float) -> None:
+    """把一个进程的 CPU 时间累加到当前上下文中的所有 CpuMeter"""
+    for meter in _cpu_meters.get():
+        meter.seconds += seconds
+
+
+class SandboxRegistry:
+    """当前进程正在使用的工作目录，以及泄漏进程和工作目录的清理"""
+
+    def __init__(self):
+        self._active: Set[str] = set()
+        self._counter = itertools.count()
+        # 保证清理任务不会把刚创建、还未登记的工作目录当作泄漏
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "sweeps": 0,
+            "killed_processes": 0,
+            "zombie_processes": 0,
+            "removed_workspaces": 0,
+            "last_sweep": None,
+        }
+
+    @property
+    def directory(self) -> str:
+        """工作目录所在的目录"""
+        return settings.SANDBOX_DIR or tempfile.gettempdir()
+
+    @contextlib.contextmanager
+    def workspace(self) -> Iterator[str]:
+        """
+        创建工作目录，退出时删除
+
+        Yields:
+            str: 工作目录路径
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            path = tempfile.mkdtemp(
+                prefix=f"{WORKSPACE_PREFIX}{os.getpid()}-{next(self._counter)}-", dir=self.directory
+            )
+            self._active.add(path)
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._active.discard(path)
+            shutil.rmtree(path, ignore_errors=True)
+
+    @property
+    def active(self) -> int:
+        """正在使用的工作目录数"""
+        return len(self._active)
+
+    @staticmethod
+    def _tagged_processes() -> List[Tuple[int, str, str]]:
+        """扫描 /proc，返回带有 SANDBOX_ENV 的进程 (进程号, 工作目录, 进程状态)"""
+        if not os.path.isdir("/proc"):
+            return []
+        marker = f"{SANDBOX_ENV}=".encode()
+        processes = []
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/environ", "rb") as f:
+                    environ = f.read()
+                with open(f"/proc/{entry.name}/stat", "rb") as f:
+                    # 状态在进程名（可能包含空格和括号）之后
+                    state = f.read().rsplit(b")", 1)[1].split()[0].decode()
+            except (OSError, IndexError):
+                continue
+            for item in environ.split(b"\0"):
+                if item.startswith(marker):
+                    processes.append((int(entry.name), item[len(marker):].decode(errors="replace"), state))
+                    break
+        return processes
+
+    def kill_processes(self, workspace: str) -> int:
+        """
+        结束在工作目录中启动的所有进程，包括脱离了进程组的后代进程
+
+        Args:
+            workspace: 工作目录路径
+
+        Returns:
+            int: 结束的进程数
+        """
+        killed = 0
+        for pid, path, state in self._tagged_processes():
+            if path != workspace or pid == os.getpid() or state == "Z":
+                continue
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed += 1
+            except ProcessLookupError:
+                pass
+        return killed
+
+    def _leaked_workspaces(self) -> List[str]:
+        """创建进程已经退出，或者当前进程内不再使用的工作目录"""
+        leaked = []
+        with self._lock:
+            try:
+                entries = list(os.scandir(self.directory))
+            except FileNotFoundError:
+                return leaked
+            active = set(self._active)
+        for entry in entries:
+            if not entry.name.startswith(WORKSPACE_PREFIX) or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                owner = int(entry.name[len(WORKSPACE_PREFIX):].split("-", 1)[0])
+            except ValueError:
+                continue
+            if owner == os.getpid():
+                if entry.path not in active:
+                    leaked.append(entry.path)
+            elif not _pid_alive(owner):
+                leaked.append(entry.path)
+        return leaked
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        清理泄漏的工作目录和进程
+
+        Returns:
+            Dict[str, int]: 本次结束的进程数、仍未被回收的僵尸进程数和删除的工作目录数
+        """
+        removed = 0
+        for path in self._leaked_workspaces():
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+
+        killed = zombies = 0
+        for pid, workspace, state in self._tagged_processes():
+            if pid == os.getpid() or os.path.isdir(workspace):
+                continue
+            if state == "Z":
+                # 僵尸进程只能由父进程回收，容器中需要使用 init 进程（例如 tini）
+                zombies += 1
+                continue
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed += 1
+            except ProcessLookupError:
+                pass
+
+        if killed or removed or zombies:
+            logger.warning(
+                "清理沙箱: 结束 %d 个泄漏的进程，删除 %d 个泄漏的工作目录，%d 个僵尸进程未被回收",
+                killed, removed, zombies
+            )
+        self.stats["sweeps"] += 1
+        self.stats["killed_processes"] += killed
+        self.stats["removed_workspaces"] += removed
+        self.stats["zombie_processes"] = zombies
+        self.stats["last_sweep"] = time.time()
+        return {"killed_processes": killed, "zombie_processes": zombies, "removed_workspaces": removed}
+
+    async def run_sweeper(self, interval: Optional[float] = None) -> None:
+        """
+        定期清理，直到任务被取消
+
+        Args:
+            interval: 清理间隔（秒），默认为 SANDBOX_SWEEP_INTERVAL，不大于 0 时不清理
+        """
+        interval = settings.SANDBOX_SWEEP_INTERVAL if interval is None else interval
+        if interval <= 0:
+            return
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception:
+                logger.exception("清理沙箱失败")
+            await asyncio.sleep(interval)
+
+    def report(self) -> Dict[str, Any]:
+        """正在使用的工作目录数和清理统计"""
+        return {"active_workspaces": self.active, **self.stats}
+
+
+# 全局沙箱实例
+sandbox_registry = SandboxRegistry()
@@ -0,0 +1,135 @@
+"""
+编译和运行阶段
+
+提交分为两个阶段：编译在编译池中进行，并发数（COMPILE_CONCURRENCY）、超时时间（COMPILE_TIMEOUT）和
+内存上限（COMPILE_MEMORY_LIMIT）与运行阶段分别设置；编译完成后提交才排队领取执行槽位
+（见 app/services/scheduler.py 的 ExecutionScheduler.submission）。编译期间不占用执行槽位，
+编译失败的提交不会领取执行槽位，卡住的编译器最多占用一个编译槽位 COMPILE_TIMEOUT 秒。
+
+执行器在启动运行进程前调用 enter_run_stage 进入运行阶段；不在提交中（例如启动预热）时立即返回。
+"""
+import os
+import time
+import asyncio
+import contextlib
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+# 当前提交进入运行阶段的回调，由调度器设置
+_run_stage: ContextVar[Optional[Callable[[], Awaitable[None]]]] = ContextVar("run_stage", default=None)
+
+
+def percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    """p50、p95 和 p99（毫秒），没有样本时为 None"""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def pick(quantile: float) -> float:
+        return ordered[min(int(quantile * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+class CompilePool:
+    """编译阶段的并发限制，按到达顺序分配编译槽位"""
+
+    def __init__(self, capacity: int = 0):
+        """
+        Args:
+            capacity: 同时进行的编译数，默认为 COMPILE_CONCURRENCY（0 表示 CPU 核数）
+        """
+        self.capacity = capacity or settings.COMPILE_CONCURRENCY or os.cpu_count() or 1
+        self._running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 编译结束、编译失败（不包括超时）和编译超时的次数
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self._queue_wait: Deque[float] = deque(maxlen=settings.SCHEDULER_METRICS_WINDOW)
+        self._compile_time: Deque[float] = deque(maxlen=settings.SCHEDULER_METRICS_WINDOW)
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._running < self.capacity:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._running += 1
+            future.set_result(None)
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """领取一个编译槽位，退出时释放"""
+        enqueued_at = time.time()
+        if self._running < self.capacity and not self._waiters:
+            self._running += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # 刚分配到槽位就被取消
+                    self._release()
+                raise
+
+        started_at = time.time()
+        self._queue_wait.append(started_at - enqueued_at)
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self._compile_time.append(time.time() - started_at)
+            self._release()
+
+    def report(self) -> Dict[str, Any]:
+        """编译槽位使用情况和最近编译的排队时间、编译时间分位数"""
+        return {
+            "capacity": self.capacity,
+            "running": self._running,
+            "queued": sum(1 for future in self._waiters if not future.done()),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "queue_wait_ms": percentiles(self._queue_wait),
+            "compile_ms": percentiles(self._compile_time),
+        }
+
+
+@contextlib.contextmanager
+def run_stage(enter: Callable[[], Awaitable[None]]) -> Iterator[None]:
+    """
+    在上下文中设置进入运行阶段的回调
+
+    Args:
+        enter: 进入运行阶段时调用，同一个提交中可能调用多次（例如测试进程重启后），只有第一次需要排队
+    """
+    token = _run_stage.set(enter)
+    try:
+        yield
+    finally:
+        _run_stage.reset(token)
+
+
+async def enter_run_stage() -> None:
+    """
+    进入运行阶段，在编译完成后、启动运行进程前调用
+
+    Raises:
+        DeadlineExceededError: 领取到执行槽位之前截止时间已过（见 app/services/scheduler.py）
+    """
+    enter = _run_stage.get()
+    if enter is not None:
+        await enter()
+
+
+# 全局编译池实例
+compile_pool = CompilePool()
@@ -1,13 +1,48 @@
 import os
-import subprocess
-import tempfile
 import time
-from typing import Any, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.executors.sandbox import sandbox_registry
 from app.executors.base_executor import BaseExecutor, EXECUTION_TIMEOUT
 
 
 class SwiftExecutor(BaseExecutor):
-    """Swift代码执行器"""
+    """
+    Swift代码执行器
+
+    编译和解释运行都使用 SWIFT_MODULE_CACHE_DIR 下共享的模块缓存，标准库和 Foundation 模块
+    只在第一次使用时导入和校验，预热时编译导入 Foundation 的程序填充缓存。
+    开启 SWIFT_USE_INTERPRETER 后，运行次数不超过 SWIFT_INTERPRETER_MAX_RUNS 且不要求编译优化的程序
+    直接由 swift 解释器（JIT）运行。
+    """
+
+    LANGUAGE = "swift"
+    VERSION_COMMAND = ["swiftc", "--version"]
+    WARMUP_CODE = """\
+import Foundation
+
+print("ok")
+"""
+    # 校准执行速度的固定负载程序，循环次数使执行时间远大于进程启动的时间
+    CALIBRATION_CODE = """\
+var x: Int64 = 1
+var s: Int64 = 0
+for _ in 0..<20000000 {
+    x = (x &* 1103515245 &+ 12345) & 2147483647
+    s ^= x
+}
+print(s)
+"""
+
+    def __init__(self, interpret: bool = False):
+        """
+        Args:
+            interpret: 是否用 swift 解释器运行，不生成可执行文件
+        """
+        self.interpret = interpret
+        self.module_cache = os.path.abspath(settings.SWIFT_MODULE_CACHE_DIR)
+        os.makedirs(self.module_cache, exist_ok=True)
+        self._interpreter = None if interpret else SwiftExecutor(interpret=True)
 
     def prepare_code_file(self, temp_dir: str, code: str) -> str:
         """准备代码文件"""
@@ -16,70 +51,100 @@ class SwiftExecutor(BaseExecutor):
             f.write(code)  # Swift不需要main函数包装
         return filepath
 
-    def get_compile_command(self, filepath: str) -> str:
+    def get_compile_command(self, filepath: str, compile_profile: Optional[str] = None) -> Optional[List[str]]:
         """获取编译命令"""
+        if self.interpret:
+            return None
         output_dir = os.path.dirname(filepath)
-        return f"swiftc {filepath} -o {os.path.join(output_dir, 'solution')}"
+        flags = self.get_compile_flags(compile_profile)
+        return [
+            "swiftc", "-module-cache-path", self.module_cache, *flags, filepath,
+            "-o", os.path.join(output_dir, "solution")
+        ]
 
-    def get_execute_command(self, filepath: str) -> str:
+    def get_execute_command(self, filepath: str) -> List[str]:
         """获取执行命令"""
-        return os.path.join(os.path.dirname(filepath), "solution")
+        if self.interpret:
+            return ["swift", "-module-cache-path", self.module_cache, filepath]
+        return [os.path.join(os.path.dirname(filepath), "solution")]
+
+    def _use_interpreter(self, runs: int, compile_profile: Optional[str]) -> bool:
+        """运行次数少且不要求编译优化时用解释器运行"""
+        return (
+            self._interpreter is not None
+            and settings.SWIFT_USE_INTERPRETER
+            and runs <= settings.SWIFT_INTERPRETER_MAX_RUNS
+            and compile_profile != "optimized"
+        )
+
+    async def warmup(self) -> Dict[str, Any]:
+        """
+        预热工具链和模块缓存，开启 SWIFT_USE_INTERPRETER 时同时预热解释器
 
-    async def execute(self, code: str, test_input: Any) -> Tuple[Any, float, float]:
+        Returns:
+            Dict[str, Any]: 在 BaseExecutor.warmup 的结果之外，开启解释器时包含 interpreter_warmup_time（毫秒）
+        """
+        result = await super().warmup()
+        if not result["available"] or result.get("error") or not self._use_interpreter(1, None):
+            return result
+
+        start_time = time.time()
+        compile_error, runs = await self._interpreter.execute_stdin_cases(
+            self.WARMUP_CODE, [""], time_limit=EXECUTION_TIMEOUT, time_budget=EXECUTION_TIMEOUT
+        )
+        result["interpreter_warmup_time"] = (time.time() - start_time) * 1000
+        run = runs[0]
+        if compile_error is not None or run is None or run["returncode"] != 0 or run["stdout"].strip() != "ok":
+            result["error"] = compile_error or (run or {}).get("stderr") or "解释器预热程序的输出不正确"
+        return result
+
+    async def execute_stdin_cases(self, code: str, inputs, *args, **kwargs):
+        """见 BaseExecutor.execute_stdin_cases，运行次数少时用解释器运行"""
+        if self._use_interpreter(len(inputs), kwargs.get("compile_profile")):
+            return await self._interpreter.execute_stdin_cases(code, inputs, *args, **kwargs)
+        return await super().execute_stdin_cases(code, inputs, *args, **kwargs)
+
+    async def execute(
+        self, code: str, test_input: Any, timeout: Optional[float] = None, compile_profile: Optional[str] = None
+    ) -> Tuple[Any, float, float]:
         """
         执行Swift代码
 
         Args:
             code: 用户代码
             test_input: 测试输入（在直接执行模式下不使用）
+            timeout: 执行超时时间（秒），默认为 EXECUTION_TIMEOUT
+            compile_profile: 编译配置（fast_compile, optimized, debug），默认不附加编译选项
 
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
+        if self._use_interpreter(1, compile_profile):
+            return await self._interpreter.execute(code, test_input, timeout, compile_profile)
+
+        timeout = timeout or EXECUTION_TIMEOUT
+        with sandbox_registry.workspace() as temp_dir:
             # 准备代码文件
             filepath = self.prepare_code_file(temp_dir, code)
 
-            # 编译代码
-            compile_process = subprocess.run(
-                self.get_compile_command(filepath),
-                shell=True,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True
-            )
-
-            if compile_process.returncode != 0:
-                return {"error": f"编译错误: {compile_process.stderr}"}, 0, 0
+            # 编译代码（解释运行时不需要）
+            compile_error = await self._compile(filepath, temp_dir, compile_profile)
+            if compile_error is not None:
+                return {"error": compile_error}, 0, 0
 
             # 执行代码
-            start_time = time.time()
-            try:
-                process = subprocess.run(
-                    self.get_execute_command(filepath),
-                    shell=True,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=EXECUTION_TIMEOUT
-                )
-
-                execution_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-                if process.returncode != 0:
-                    return {"error": f"执行错误: {process.stderr}"}, execution_time, 0
-
-                # 合并 stdout 和 stderr 的输出
-                output = process.stdout.strip()
-                if process.stderr:
-                    if output:
-                        output += "\n"
-                    output += process.stderr.strip()
-
-                # 返回执行结果
-                return output, execution_time, 0
-
-            except subprocess.TimeoutExpired:
-                return {"error": "执行超时"}, EXECUTION_TIMEOUT * 1000, 0
-            except Exception as e:
-                return {"error": f"执行错误: {str(e)}"}, (time.time() - start_time) * 1000, 0 
\ No newline at end of file
+            run = await self._launch(self.get_execute_command(filepath), temp_dir, timeout=timeout)
+            if run["timeout"]:
+                return {"error": "执行超时", "timeout": True}, timeout * 1000, 0
+            if run["returncode"] != 0:
+                return {"error": f"执行错误: {run['stderr']}"}, run["execution_time"], 0
+
+            # 合并 stdout 和 stderr 的输出
+            output = run["stdout"].strip()
+            if run["stderr"]:
+                if output:
+                    output += "\n"
+                output += run["stderr"].strip()
+
+            # 返回执行结果
+            return output, run["execution_time"], 0
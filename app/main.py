@@ -1,9 +1,41 @@
+import asyncio
+import contextlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import uvicorn
 
 from app.core.config import settings
-from app.api import items, code_execution
+from app.api import items, code_execution, problems
+from app.services.code_execution_service import CodeExecutionService
+from app.services.job_queue import get_job_queue
+from app.services.warmup import warmup_tracker
+from app.executors.sandbox import sandbox_registry
+from app.executors.affinity import core_allocator
+from app.worker import ExecutionWorker
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期：启动时在后台预热工具链，不阻塞接收请求；运行期间定期校准执行速度，清理泄漏的沙箱进程和工作目录。
+    开启 CPU_PINNING_ENABLED 时本进程只在留给它的物理核上运行。本地执行模式下在本进程内运行 worker，执行异步任务
+    """
+    core_allocator.pin_current_process()
+    warmup_task = asyncio.create_task(CodeExecutionService.warmup())
+    calibration_task = asyncio.create_task(CodeExecutionService.run_calibration(warmup_task))
+    sweeper_task = asyncio.create_task(sandbox_registry.run_sweeper())
+    tasks = [warmup_task, calibration_task, sweeper_task]
+    if settings.EXECUTION_MODE != "distributed":
+        worker = ExecutionWorker(get_job_queue(), concurrency=settings.WORKER_CONCURRENCY)
+        tasks.append(asyncio.create_task(worker.run(embedded=True)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
@@ -23,6 +55,10 @@ app = FastAPI(
                 "url": "https://github.com/your-repo/code-execution-docs",
             },
         },
+        {
+            "name": "problems",
+            "description": "问题登记接口",
+        },
         {
             "name": "items",
             "description": "其他接口",
@@ -33,6 +69,7 @@ app = FastAPI(
         },
     ],
     swagger_ui_parameters=settings.SWAGGER_UI_PARAMETERS,
+    lifespan=lifespan,
 )
 
 # 配置 CORS
@@ -54,9 +91,21 @@ async def root():
     """
     return {"message": f"欢迎使用 {settings.APP_NAME}"}
 
+# 就绪检查
+@app.get("/ready", tags=["root"], summary="就绪检查", description="工具链预热完成后返回 200，否则返回 503")
+async def ready():
+    """
+    就绪检查
+    
+    供负载均衡器判断是否向本节点转发流量，返回各语言的工具链版本、预热状态和耗时(毫秒)。
+    """
+    report = warmup_tracker.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 # 包含路由器
 app.include_router(items.router)
 app.include_router(code_execution.router)
+app.include_router(problems.router)
 
 # 直接运行此文件时启动服务器
 if __name__ == "__main__":
@@ -17,12 +17,79 @@ class ProgrammingLanguage(str, Enum):
     SWIFT = "swift"
 
 
-class CodeExecutionRequest(BaseModel):
-    """代码执行请求模型"""
-    code: str = Field(..., description="用户提交的代码")
-    language: ProgrammingLanguage = Field(..., description="编程语言")
-    problem_id: str = Field(..., description="问题ID")
-    test_cases: Optional[List[Dict[str, Any]]] = Field(None, description="自定义测试用例")
+class ExecutionStatus(str, Enum):
+    """执行状态枚举"""
+    SUCCESS = "success"
+    COMPILE_ERROR = "compile_error"
+    RUNTIME_ERROR = "runtime_error"
+    TIME_LIMIT_EXCEEDED = "time_limit_exceeded"
+    MEMORY_LIMIT_EXCEEDED = "memory_limit_exceeded"
+    INTERNAL_ERROR = "internal_error"
+    # 开始执行前截止时间已过，请求未执行
+    DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+class ComparatorType(str, Enum):
+    """输出比较方式枚举"""
+    # 严格相等
+    EXACT = "exact"
+    # 逐行比较，忽略行尾空白和首尾空行
+    WHITESPACE = "whitespace"
+    # 数值按容差比较
+    FLOAT = "float"
+    # 列表元素或输出行按多重集合比较
+    UNORDERED = "unordered"
+    # 按空白分词后逐词比较
+    TOKEN = "token"
+
+
+class TestCaseType(str, Enum):
+    """测试用例类型枚举"""
+    # 调用 Solution().solve(input)，比较返回值
+    FUNCTION = "function"
+    # 将 input 写入标准输入运行程序，比较标准输出
+    STDIN_STDOUT = "stdin_stdout"
+
+
+class ResponseDetail(str, Enum):
+    """响应详细程度枚举"""
+    # 返回所有测试用例的输入、期望输出和实际输出
+    FULL = "full"
+    # 只返回未通过的测试用例的输入、期望输出和实际输出
+    FAILURES_ONLY = "failures_only"
+    # 只返回各测试用例的结论
+    VERDICT_ONLY = "verdict_only"
+
+
+class CompileProfile(str, Enum):
+    """编译配置枚举"""
+    # 尽量缩短编译时间，适合测试用例少、运行时间短的提交
+    FAST_COMPILE = "fast_compile"
+    # 开启编译优化，适合测试用例多或运行时间长的提交
+    OPTIMIZED = "optimized"
+    # 包含调试信息，不开启优化
+    DEBUG = "debug"
+
+
+class PriorityClass(str, Enum):
+    """调度优先级枚举"""
+    # 交互式请求（例如页面上的"运行代码"），优先执行并有预留的执行槽位
+    INTERACTIVE = "interactive"
+    # 批量评测请求，只使用预留之外的执行槽位
+    BATCH = "batch"
+
+
+class JobStatus(str, Enum):
+    """异步任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
 
 
 class TestCase(BaseModel):
@@ -30,27 +97,85 @@ class TestCase(BaseModel):
     input: Any = Field(..., description="测试输入")
     expected_output: Any = Field(..., description="期望输出")
     description: Optional[str] = Field(None, description="测试用例描述")
+    type: TestCaseType = Field(TestCaseType.FUNCTION, description="测试用例类型")
+
+
+class CodeExecutionRequest(BaseModel):
+    """代码执行请求模型"""
+    code: str = Field(..., description="用户提交的代码")
+    language: ProgrammingLanguage = Field(..., description="编程语言")
+    problem_id: str = Field(..., description="问题ID，未提供 test_cases 和 dataset_id 时使用问题登记的测试用例")
+    test_cases: Optional[List[Dict[str, Any]]] = Field(None, description="自定义测试用例")
+    dataset_id: Optional[str] = Field(None, description="已上传的测试数据集ID，未提供 test_cases 时使用")
+    stop_on_first_failure: bool = Field(
+        False, description="第一个测试用例失败后停止执行剩余测试用例，并按历史失败次数优先执行容易失败的测试用例"
+    )
+    time_limit: Optional[float] = Field(None, gt=0, description="单个测试用例的时间限制(秒)")
+    time_budget: Optional[float] = Field(None, gt=0, description="整个提交的时间预算(秒)")
+    comparator: Optional[ComparatorType] = Field(
+        None, description="输出比较方式，默认函数测试用例为 exact，标准输入/输出测试用例为 whitespace"
+    )
+    comparator_options: Optional[Dict[str, Any]] = Field(
+        None, description="比较器参数，例如 float 比较器的 rel_tol 和 abs_tol"
+    )
+    response_detail: ResponseDetail = Field(
+        ResponseDetail.FULL, description="响应详细程度（full, failures_only, verdict_only）"
+    )
+    compile_profile: Optional[CompileProfile] = Field(
+        None, description="编译配置（fast_compile, optimized, debug），默认由服务端按测试用例数选择"
+    )
+    priority: Optional[PriorityClass] = Field(
+        None, description="调度优先级（interactive, batch），默认为 DEFAULT_PRIORITY"
+    )
+    deadline: Optional[float] = Field(
+        None, description="截止时间（Unix 时间戳，秒），开始执行前已过期的请求不再执行"
+    )
+    profile: bool = Field(
+        False, description="是否对用户代码进行采样性能分析并在响应中返回热点函数和热点行，只支持 Python 函数测试用例"
+    )
 
 
 class TestResult(BaseModel):
     """单个测试结果模型"""
+    test_case: Optional[int] = Field(None, description="测试用例序号（从1开始）")
     passed: bool = Field(..., description="测试是否通过")
-    input: Any = Field(..., description="测试输入")
-    expected_output: Any = Field(..., description="期望输出")
-    actual_output: Any = Field(..., description="实际输出")
+    input: Any = Field(None, description="测试输入（response_detail 不为 full 时可能不返回）")
+    expected_output: Any = Field(None, description="期望输出（response_detail 不为 full 时可能不返回）")
+    actual_output: Any = Field(None, description="实际输出（通过的测试用例可能不返回）")
     execution_time: float = Field(..., description="执行时间(毫秒)")
+    normalized_time: Optional[float] = Field(None, description="按节点速度系数归一化的执行时间(毫秒)，节点尚未校准时为空")
     memory_usage: float = Field(..., description="内存使用(KB)")
     description: Optional[str] = Field(None, description="测试描述")
+    status: ExecutionStatus = Field(ExecutionStatus.SUCCESS, description="测试用例执行状态")
+    error: Optional[str] = Field(None, description="错误信息")
+    diff: Optional[str] = Field(None, description="未通过时实际输出与期望输出的差异摘要")
 
 
-class ExecutionStatus(str, Enum):
-    """执行状态枚举"""
-    SUCCESS = "success"
-    COMPILE_ERROR = "compile_error"
-    RUNTIME_ERROR = "runtime_error"
-    TIME_LIMIT_EXCEEDED = "time_limit_exceeded"
-    MEMORY_LIMIT_EXCEEDED = "memory_limit_exceeded"
-    INTERNAL_ERROR = "internal_error"
+class ProfileFunction(BaseModel):
+    """性能分析的热点函数模型"""
+    function: str = Field(..., description="函数名（限定名）")
+    file: Optional[str] = Field(None, description="函数所在的文件名，用户代码中的函数为空")
+    line: int = Field(..., description="函数定义所在的行号，用户代码中的函数从用户代码第 1 行算起")
+    cumulative_time: float = Field(..., description="函数在调用栈中时消耗的 CPU 时间(毫秒)，包括其调用的函数")
+    percent: float = Field(..., description="占全部采样 CPU 时间的百分比")
+
+
+class ProfileLine(BaseModel):
+    """性能分析的热点行模型"""
+    line: int = Field(..., description="用户代码的行号（从1开始）")
+    code: Optional[str] = Field(None, description="该行的源代码")
+    cumulative_time: float = Field(..., description="该行在调用栈中时消耗的 CPU 时间(毫秒)，包括其调用的函数")
+    percent: float = Field(..., description="占全部采样 CPU 时间的百分比")
+
+
+class ProfileReport(BaseModel):
+    """性能分析结果模型"""
+    samples: int = Field(..., description="采样次数")
+    sample_interval: float = Field(..., description="采样间隔（CPU 时间，毫秒），采样耗时过高时会被加大")
+    total_time: float = Field(..., description="全部采样的 CPU 时间(毫秒)")
+    overhead_time: float = Field(..., description="采样本身的耗时(毫秒)，已从测试用例的执行时间中扣除")
+    functions: List[ProfileFunction] = Field(..., description="按累计 CPU 时间排序的热点函数，最多 PROFILE_TOP_N 个")
+    lines: List[ProfileLine] = Field(..., description="按累计 CPU 时间排序的用户代码热点行，最多 PROFILE_TOP_N 个")
 
 
 class CodeExecutionResponse(BaseModel):
@@ -61,7 +186,38 @@ class CodeExecutionResponse(BaseModel):
     total_tests: int = Field(0, description="测试用例总数")
     passed_tests: int = Field(0, description="通过的测试用例数")
     execution_time: Optional[float] = Field(None, description="总执行时间(毫秒)")
+    normalized_time: Optional[float] = Field(None, description="按节点速度系数归一化的总执行时间(毫秒)")
+    speed_factor: Optional[float] = Field(
+        None, description="执行节点的速度系数（校准负载的执行时间与参照时间之比），节点尚未校准时为空"
+    )
     memory_usage: Optional[float] = Field(None, description="最大内存使用(KB)")
+    stdout: Optional[str] = Field(None, description="用户代码的标准输出（截断）")
+    stderr: Optional[str] = Field(None, description="用户代码的标准错误（截断）")
+    profile: Optional[ProfileReport] = Field(None, description="性能分析结果，请求 profile 为 true 时返回")
+
+
+class JobInfo(BaseModel):
+    """异步任务模型"""
+    job_id: str = Field(..., description="任务ID")
+    status: JobStatus = Field(..., description="任务状态")
+    created_at: float = Field(..., description="提交时间（Unix 时间戳，秒）")
+    started_at: Optional[float] = Field(None, description="最近一次开始执行的时间（Unix 时间戳，秒）")
+    finished_at: Optional[float] = Field(None, description="结束时间（Unix 时间戳，秒）")
+    result: Optional[CodeExecutionResponse] = Field(None, description="执行结果，任务成功或截止时间已过时返回")
+    error: Optional[str] = Field(None, description="任务失败或取消的原因")
+
+
+class DatasetCreateRequest(BaseModel):
+    """测试数据集上传请求模型"""
+    test_cases: List[Dict[str, Any]] = Field(..., min_length=1, description="测试用例列表，格式与代码执行请求相同")
+
+
+class DatasetInfo(BaseModel):
+    """测试数据集信息模型"""
+    dataset_id: str = Field(..., description="数据集ID（内容的 SHA-256 哈希）")
+    count: int = Field(..., description="测试用例数量")
+    type: TestCaseType = Field(..., description="测试用例类型")
+    size: int = Field(..., description="数据集文件大小（字节）")
 
 
 class Problem(BaseModel):
@@ -76,4 +232,29 @@ class Problem(BaseModel):
     )
     constraints: Optional[str] = Field(None, description="约束条件")
     examples: Optional[List[Dict[str, Any]]] = Field(None, description="示例")
-    tags: Optional[List[str]] = Field(None, description="标签") 
\ No newline at end of file
+    tags: Optional[List[str]] = Field(None, description="标签")
+    comparator: Optional[ComparatorType] = Field(None, description="默认的输出比较方式")
+    comparator_options: Optional[Dict[str, Any]] = Field(None, description="默认的比较器参数")
+    time_limit: Optional[float] = Field(None, gt=0, description="默认的单个测试用例时间限制(秒)")
+    compile_profile: Optional[CompileProfile] = Field(None, description="默认的编译配置")
+
+
+class ProblemInfo(BaseModel):
+    """问题信息模型，不包含测试用例"""
+    id: str = Field(..., description="问题ID")
+    title: str = Field(..., description="问题标题")
+    description: str = Field(..., description="问题描述")
+    difficulty: str = Field(..., description="难度级别")
+    function_signature: Dict[str, Dict[str, str]] = Field(..., description="各语言的函数签名")
+    constraints: Optional[str] = Field(None, description="约束条件")
+    examples: Optional[List[Dict[str, Any]]] = Field(None, description="示例")
+    tags: Optional[List[str]] = Field(None, description="标签")
+    comparator: Optional[ComparatorType] = Field(None, description="默认的输出比较方式")
+    comparator_options: Optional[Dict[str, Any]] = Field(None, description="默认的比较器参数")
+    time_limit: Optional[float] = Field(None, description="默认的单个测试用例时间限制(秒)")
+    compile_profile: Optional[CompileProfile] = Field(None, description="默认的编译配置")
+    dataset_id: str = Field(..., description="测试数据集ID")
+    test_case_count: int = Field(..., description="测试用例数量")
+    created_at: float = Field(..., description="创建时间戳")
+    updated_at: float = Field(..., description="更新时间戳")
+    owner: Optional[str] = Field(None, description="创建问题的租户")
\ No newline at end of file
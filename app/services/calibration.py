@@ -0,0 +1,125 @@
+"""
+执行速度校准
+
+不同节点的执行时间不能直接比较，同一个节点在不同负载下也不能。执行代码的节点每隔 CALIBRATION_INTERVAL 秒
+运行一次各语言的固定校准负载（见各执行器的 CALIBRATION_CODE），得到该语言在本节点当前的速度系数：
+
+    speed_factor = 校准负载的执行时间 / CALIBRATION_REFERENCE_MS 中该语言的参照时间
+
+speed_factor 大于 1 表示本节点比参照节点慢。测试结果除了原始的 execution_time，还返回归一化时间
+normalized_time = execution_time / speed_factor，即代码在参照节点上的预期执行时间，与落在哪个节点无关。
+
+speed_factor 不包括进程启动时间，而标准输入/输出测试的 execution_time 包括（函数测试只计量对用户代码的调用）。
+因此标准输入/输出测试先减去校准时测得的本节点进程启动时间（startup_ms，即 WARMUP_CODE 的执行时间）再归一化：
+normalized_time = max(execution_time - startup_ms, 0) / speed_factor。
+"""
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.schemas.code_execution import CodeExecutionResponse
+
+logger = logging.getLogger(__name__)
+
+# CALIBRATION_REFERENCE_MS 未配置的语言的参照时间（毫秒）
+DEFAULT_REFERENCE_MS = 100.0
+
+
+class SpeedCalibrator:
+    """各语言在本节点的速度系数"""
+
+    def __init__(self):
+        self.languages: Dict[str, Dict[str, Any]] = {}
+
+    def factor(self, language: str) -> Optional[float]:
+        """
+        获取语言的速度系数
+
+        Args:
+            language: 编程语言
+
+        Returns:
+            Optional[float]: 最近一次成功校准得到的速度系数，尚未校准成功时返回 None
+        """
+        return self.languages.get(language, {}).get("speed_factor")
+
+    async def calibrate(self, executors: Dict[Any, Any]) -> None:
+        """
+        依次校准所有执行器，校准失败的语言保留上一次的速度系数
+
+        Args:
+            executors: 编程语言到执行器的映射
+        """
+        # 依次校准，各语言的校准负载不会互相争抢 CPU
+        for language, executor in executors.items():
+            state = self.languages.setdefault(language.value, {})
+            try:
+                measured = await executor.calibrate(settings.CALIBRATION_RUNS)
+            except Exception as exc:
+                logger.info("校准 %s 失败: %s", language.value, exc)
+                state["error"] = str(exc)
+                continue
+            if measured is None:
+                continue
+            elapsed, startup = measured
+
+            reference = settings.CALIBRATION_REFERENCE_MS.get(language.value, DEFAULT_REFERENCE_MS)
+            state.update({
+                "calibration_ms": elapsed,
+                "startup_ms": startup,
+                "reference_ms": reference,
+                "speed_factor": elapsed / reference,
+                "calibrated_at": time.time(),
+                "error": None,
+            })
+
+    async def run(self, executors: Dict[Any, Any]) -> None:
+        """
+        每隔 CALIBRATION_INTERVAL 秒校准一次，直到被取消
+
+        Args:
+            executors: 编程语言到执行器的映射
+        """
+        while True:
+            await self.calibrate(executors)
+            await asyncio.sleep(settings.CALIBRATION_INTERVAL)
+
+    def apply(self, language: str, response: CodeExecutionResponse, stdin_mode: bool = False) -> CodeExecutionResponse:
+        """
+        为响应和其中的测试结果填写速度系数和归一化时间，语言尚未校准成功时不填写
+
+        Args:
+            language: 编程语言
+            response: 代码执行响应
+            stdin_mode: 是否为标准输入/输出测试，为 True 时每个测试结果先减去进程启动时间再归一化，
+                响应的归一化时间为各测试结果归一化时间之和
+
+        Returns:
+            CodeExecutionResponse: 同一个响应对象
+        """
+        factor = self.factor(language)
+        if factor is None:
+            return response
+        response.speed_factor = factor
+        if stdin_mode:
+            startup = self.languages[language].get("startup_ms", 0.0)
+            for result in response.test_results or []:
+                result.normalized_time = max(result.execution_time - startup, 0.0) / factor
+            if response.execution_time is not None:
+                response.normalized_time = sum(result.normalized_time for result in response.test_results or [])
+            return response
+        if response.execution_time is not None:
+            response.normalized_time = response.execution_time / factor
+        for result in response.test_results or []:
+            result.normalized_time = result.execution_time / factor
+        return response
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """各语言的校准负载执行时间、进程启动时间、参照时间、速度系数、校准时间和最近一次的错误"""
+        return self.languages
+
+
+# 全局速度校准实例
+speed_calibrator = SpeedCalibrator()
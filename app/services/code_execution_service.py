@@ -4,10 +4,12 @@ import tempfile
 import subprocess
 import json
 import shutil
-from typing import Dict, List, Any, Optional, Tuple
+import contextlib
+from typing import Awaitable, Dict, List, Any, Optional, Sequence, Set, Tuple
 import asyncio
 from pathlib import Path
 import resource
+import signal
 from enum import Enum
 
 from app.schemas.code_execution import (
@@ -16,10 +18,28 @@ from app.schemas.code_execution import (
     TestResult,
     CodeExecutionResponse,
     TestCase,
-    CodeExecutionRequest
+    TestCaseType,
+    ComparatorType,
+    ResponseDetail,
+    CompileProfile,
+    PriorityClass,
+    ProfileFunction,
+    ProfileLine,
+    ProfileReport,
+    JobStatus
 )
 
 from app.utils.code_generator import CodeGenerator
+from app.utils import comparators
+from app.core.config import settings
+from app.services.job_queue import DEADLINE_EXCEEDED_ERROR, Job, get_job_queue, job_notifier
+from app.services.scheduler import PRIORITY_RANK, DeadlineExceededError, execution_scheduler
+from app.services.tenants import tenant_registry
+from app.services.single_flight import single_flight
+from app.services.calibration import speed_calibrator
+from app.services.problem_stats import ProblemStatsStore, problem_stats
+from app.services.dataset_store import Dataset, pin_dataset
+from app.services.warmup import WarmupStatus, warmup_tracker
 
 from app.executors.python_executor import PythonExecutor
 from app.executors.java_executor import JavaExecutor
@@ -32,11 +52,6 @@ from app.executors.go_executor import GoExecutor
 from app.executors.objc_executor import ObjectiveCExecutor
 from app.executors.swift_executor import SwiftExecutor
 
-# 执行超时时间（秒）
-EXECUTION_TIMEOUT = 10
-# 内存限制（MB）
-MEMORY_LIMIT = 512
-
 class CodeExecutionService:
     """
     代码执行服务
@@ -62,171 +77,595 @@ class CodeExecutionService:
     }
     
     @classmethod
-    async def execute_code(cls, request: CodeExecutionRequest) -> CodeExecutionResponse:
+    async def warmup(cls, force_local: bool = False) -> None:
         """
-        执行代码
+        预热所有语言的工具链
+        
+        WARMUP_ENABLED 为 False 或者当前进程不执行代码（分布式模式的 API 节点）时直接标记为就绪。
         
         Args:
-            request: 代码执行请求
-            
-        Returns:
-            CodeExecutionResponse: 代码执行响应
+            force_local: 是否强制在当前进程内预热（worker 进程使用）
+        """
+        distributed = settings.EXECUTION_MODE == "distributed" and not force_local
+        if not settings.WARMUP_ENABLED or distributed:
+            warmup_tracker.skip()
+            return
+        await warmup_tracker.run(cls._executors)
+    
+    @classmethod
+    async def run_calibration(cls, warmup: Optional[Awaitable[Any]] = None, force_local: bool = False) -> None:
         """
-        code = request.code
-        language = request.language
-        problem_id = request.problem_id
-        test_cases = request.test_cases
+        定期校准各语言在本节点的执行速度（见 app/services/calibration.py），直到被取消
         
-        # 获取对应语言的执行器
-        executor = cls._executors.get(language)
-        if not executor:
-            return CodeExecutionResponse(
-                status="error",
-                message=f"不支持的编程语言: {language}",
-                passed_tests=0,
-                total_tests=len(test_cases),
-                results=[]
-            )
+        CALIBRATION_INTERVAL 为 0 或者当前进程不执行代码（分布式模式的 API 节点）时直接返回。
         
-
-        # 生成测试代码
-        code_generator = CodeGenerator()
-        test_code = code_generator.generate_test_code(code, language, test_cases)
-
-        # 执行测试代码
-        try:
-            results = []
-            passed_tests = 0
-            
-            for i, test_case in enumerate(test_cases):
-                test_input = {
-                    "input": test_case.input,
-                    "expected_output": test_case.expected_output
-                }
-                
-                # 执行代码
-                output, execution_time, memory_usage = await executor.execute(test_code, test_input)
-                
-                # 检查结果
-                if isinstance(output, dict) and "error" in output:
-                    results.append({
-                        "test_case": i + 1,
-                        "input": test_case.input,
-                        "expected_output": test_case.expected_output,
-                        "actual_output": None,
-                        "passed": False,
-                        "error": output["error"],
-                        "execution_time": execution_time,
-                        "memory_usage": memory_usage
-                    })
-                else:
-                    passed = output == test_case.expected_output
-                    if passed:
-                        passed_tests += 1
-                    
-                    results.append({
-                        "test_case": i + 1,
-                        "input": test_case.input,
-                        "expected_output": test_case.expected_output,
-                        "actual_output": output,
-                        "passed": passed,
-                        "execution_time": execution_time,
-                        "memory_usage": memory_usage
-                    })
+        Args:
+            warmup: 预热任务，预热结束后再开始校准，工具链不可用的语言不校准
+            force_local: 是否强制在当前进程内校准（worker 进程使用）
+        """
+        distributed = settings.EXECUTION_MODE == "distributed" and not force_local
+        if settings.CALIBRATION_INTERVAL <= 0 or distributed:
+            return
+        if warmup is not None:
+            await warmup
+        executors = {
+            language: executor for language, executor in cls._executors.items()
+            if warmup_tracker.languages.get(language.value, {}).get("status") != WarmupStatus.UNAVAILABLE
+        }
+        await speed_calibrator.run(executors)
+    
+    @classmethod
+    async def execute_code(
+        cls, code: str, language: ProgrammingLanguage, test_input: Any
+    ) -> Tuple[Any, float, float]:
+        """
+        用单个测试输入执行函数测试代码，返回用户代码的输出
+        
+        与 run_tests 一样生成测试代码并通过结果管道接收结果（见 _run_function_tests），
+        测试用例没有期望输出，实际输出超过 OUTPUT_ECHO_LIMIT 时只返回差异摘要。
+        
+        Args:
+            code: 用户代码
+            language: 编程语言
+            test_input: 测试输入
             
-            return CodeExecutionResponse(
-                status="success",
-                message="代码执行完成",
-                passed_tests=passed_tests,
-                total_tests=len(test_cases),
-                results=results
-            )
+        Returns:
+            Tuple[Any, float, float]: (输出, 执行时间(ms), 内存使用(KB))，执行失败时输出为 {"error": 错误信息}
             
-        except Exception as exc:
-            return CodeExecutionResponse(
-                status="error",
-                message=f"代码执行错误: {str(exc)}",
-                passed_tests=0,
-                total_tests=len(test_cases),
-                results=[]
-            )
+        Raises:
+            ValueError: 如果不支持指定的编程语言
+        """
+        response = await cls.run_tests(
+            code, language, [TestCase(input=test_input, expected_output=None)], response_detail=ResponseDetail.FULL
+        )
+        if not response.test_results:
+            return {"error": response.message}, response.execution_time or 0, response.memory_usage or 0
+        result = response.test_results[0]
+        if result.error:
+            return {"error": result.error}, result.execution_time, result.memory_usage
+        return result.actual_output, result.execution_time, result.memory_usage
     
     @classmethod
-    async def run_tests(cls, code: str, language: ProgrammingLanguage, test_cases: List[TestCase]) -> CodeExecutionResponse:
+    async def run_tests(
+        cls,
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Sequence[TestCase],
+        problem_id: Optional[str] = None,
+        stop_on_first_failure: bool = False,
+        time_limit: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        comparator: Optional[ComparatorType] = None,
+        comparator_options: Optional[Dict[str, Any]] = None,
+        response_detail: ResponseDetail = ResponseDetail.FULL,
+        compile_profile: Optional[CompileProfile] = None,
+        profile: bool = False,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None,
+        force_local: bool = False
+    ) -> CodeExecutionResponse:
         """
         运行测试用例
         
-        接收用户代码、编程语言和测试用例列表，执行代码并返回测试结果。
-        会对每个测试用例单独执行，并收集执行结果。
+        接收用户代码、编程语言和测试用例列表，生成测试代码并在一个进程中执行全部测试用例，
+        收集每个测试用例的执行结果。
+        
+        开启 stop_on_first_failure 时，遇到第一个未通过的测试用例即停止，剩余测试用例不再执行；
+        如果同时提供了 problem_id，会按该问题的历史失败次数从多到少排列测试用例，
+        让最容易失败的测试用例先执行。
+        
+        单个测试用例的时间限制由测试代码在进程内强制执行，超时的测试用例标记为
+        TIME_LIMIT_EXCEEDED 后继续执行后续测试用例；整个提交的时间预算由执行器强制执行。
+        
+        输出比较在执行用户代码的进程内（或紧接着进程结束）完成，通过的测试用例不返回实际输出，
+        未通过的测试用例返回差异摘要。
+        
+        代码先在编译池中编译（见 app/executors/stages.py），编译完成后按优先级、租户和截止时间在调度器中排队
+        （见 app/services/scheduler.py），开始执行前截止时间已过的请求不再执行，返回 DEADLINE_EXCEEDED 状态。
+        租户的 CPU 时间配额已用尽时不再执行。
+        
+        开启 SINGLE_FLIGHT_ENABLED 时，与正在执行的请求指纹相同（见 app/services/single_flight.py）的请求
+        不再重复执行，等待并共享同一次执行的结果；共享的执行结束前本请求的截止时间已到时返回 DEADLINE_EXCEEDED 状态，
+        共享的执行继续为其他请求运行。
         
         Args:
             code: 用户代码
             language: 编程语言
-            test_cases: 测试用例列表
+            test_cases: 测试用例列表，也可以是已上传的测试数据集（Dataset），此时测试代码通过内存映射读取测试用例
+            problem_id: 问题ID，用于记录和使用测试用例的历史失败统计
+            stop_on_first_failure: 是否在第一个测试用例失败后停止
+            time_limit: 单个测试用例的时间限制（秒），默认为 TEST_TIME_LIMIT
+            time_budget: 整个提交的时间预算（秒），默认为 SUBMISSION_TIME_BUDGET
+            comparator: 输出比较方式，默认函数测试用例为 exact，标准输入/输出测试用例为 whitespace
+            comparator_options: 比较器参数
+            response_detail: 响应详细程度，不为 full 时省略通过的测试用例（或全部测试用例）的输入和输出
+            compile_profile: 编译配置，默认按 DEFAULT_COMPILE_PROFILE 的策略选择
+            profile: 是否对用户代码进行采样性能分析，只支持 SUPPORTS_PROFILING 的执行器的函数测试用例
+            priority: 调度优先级，默认为 DEFAULT_PRIORITY
+            deadline: 截止时间（Unix 时间戳，秒），None 表示不限制
+            tenant: 租户名，默认为 DEFAULT_TENANT
+            force_local: 是否强制在当前进程内执行（worker 进程使用）
             
         Returns:
             CodeExecutionResponse: 执行结果，包含测试通过情况、执行时间和内存使用等信息
             
         Raises:
+            QuotaExceededError: 租户的 CPU 时间配额已用尽
             ValueError: 如果不支持指定的编程语言
             Exception: 执行过程中的其他异常
         """
+        compile_profile = cls.resolve_compile_profile(compile_profile, len(test_cases))
+        priority = PriorityClass(priority or settings.DEFAULT_PRIORITY)
+        tenant = tenant or settings.DEFAULT_TENANT
+        if not force_local:
+            await cls._check_quota(tenant)
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await cls._run_tests(
+                code, language, test_cases, problem_id, stop_on_first_failure, time_limit, time_budget, comparator,
+                comparator_options, response_detail, compile_profile, profile, priority, deadline, tenant, force_local
+            )
+        
+        # 指纹相同的并发请求共享一次执行，截止时间不参与指纹，每个请求按自己的截止时间等待
+        if isinstance(test_cases, Dataset):
+            cases_key: Any = {"dataset_id": test_cases.id}
+        else:
+            cases_key = [tc.model_dump(mode="json") for tc in test_cases]
+        key = single_flight.fingerprint(
+            "run_tests", language.value, code, cases_key, problem_id, stop_on_first_failure, time_limit,
+            time_budget, ComparatorType(comparator).value if comparator else None, comparator_options,
+            ResponseDetail(response_detail).value, compile_profile.value, profile, priority.value, tenant, force_local
+        )
+        while True:
+            try:
+                response = await single_flight.run(key, lambda: cls._run_tests(
+                    code, language, test_cases, problem_id, stop_on_first_failure, time_limit, time_budget,
+                    comparator, comparator_options, response_detail, compile_profile, profile, priority, deadline,
+                    tenant, force_local
+                ), deadline)
+            except DeadlineExceededError as exc:
+                return CodeExecutionResponse(
+                    status=ExecutionStatus.DEADLINE_EXCEEDED, message=str(exc), total_tests=len(test_cases)
+                )
+            # 共享的执行因为先到达的请求的截止时间而被丢弃，本请求的截止时间未到时重新执行
+            if response.status != ExecutionStatus.DEADLINE_EXCEEDED or (
+                deadline is not None and time.time() >= deadline
+            ):
+                return response
+
+    @classmethod
+    async def _run_tests(
+        cls,
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Sequence[TestCase],
+        problem_id: Optional[str],
+        stop_on_first_failure: bool,
+        time_limit: Optional[float],
+        time_budget: Optional[float],
+        comparator: Optional[ComparatorType],
+        comparator_options: Optional[Dict[str, Any]],
+        response_detail: ResponseDetail,
+        compile_profile: CompileProfile,
+        profile: bool,
+        priority: PriorityClass,
+        deadline: Optional[float],
+        tenant: str,
+        force_local: bool
+    ) -> CodeExecutionResponse:
+        """执行一次测试（参数见 run_tests），投递到任务队列或者在调度器中排队后在本进程内执行"""
+        if settings.EXECUTION_MODE == "distributed" and not force_local:
+            payload = cls._run_tests_payload(
+                code, language, test_cases, problem_id, stop_on_first_failure, time_limit, time_budget, comparator,
+                comparator_options, response_detail, compile_profile, profile, priority, deadline, tenant
+            )
+            try:
+                result = await cls._submit_job("run_tests", payload, priority, deadline, tenant)
+            except DeadlineExceededError as exc:
+                return CodeExecutionResponse(
+                    status=ExecutionStatus.DEADLINE_EXCEEDED, message=str(exc), total_tests=len(test_cases)
+                )
+            return CodeExecutionResponse.model_validate(result)
+
         executor = cls._executors.get(language)
         if not executor:
             raise ValueError(f"不支持的编程语言: {language}")
         
-        test_code = CodeGenerator().generate_test_code(code, language, test_cases)
+        # 确定测试用例的执行顺序
+        if stop_on_first_failure and problem_id:
+            order = problem_stats.order(problem_id, [cls._case_key(test_cases, i) for i in range(len(test_cases))])
+        else:
+            order = list(range(len(test_cases)))
+        
+        time_limit = min(time_limit or settings.TEST_TIME_LIMIT, settings.MAX_TEST_TIME_LIMIT)
+        time_budget = min(time_budget or settings.SUBMISSION_TIME_BUDGET, settings.MAX_SUBMISSION_TIME_BUDGET)
+        
+        if isinstance(test_cases, Dataset):
+            case_types = {test_cases.type}
+        else:
+            case_types = {tc.type for tc in test_cases}
+        if TestCaseType.STDIN_STDOUT in case_types and len(case_types) > 1:
+            raise ValueError("标准输入/输出测试用例不能与函数测试用例混合使用")
+        if profile and (not executor.SUPPORTS_PROFILING or TestCaseType.STDIN_STDOUT in case_types):
+            raise ValueError("性能分析只支持 Python 函数测试用例")
+        
+        try:
+            async with execution_scheduler.submission(priority, deadline, tenant):
+                if TestCaseType.STDIN_STDOUT in case_types:
+                    response = await cls._run_stdin_stdout_tests(
+                        executor, code, test_cases, order, problem_id, stop_on_first_failure, time_limit,
+                        time_budget, ComparatorType(comparator or ComparatorType.WHITESPACE), comparator_options,
+                        ResponseDetail(response_detail), compile_profile
+                    )
+                else:
+                    response = await cls._run_function_tests(
+                        executor, code, language, test_cases, order, problem_id, stop_on_first_failure, time_limit,
+                        time_budget, ComparatorType(comparator or ComparatorType.EXACT), comparator_options,
+                        ResponseDetail(response_detail), compile_profile, profile
+                    )
+            # 归一化时间使用执行节点的速度系数，分布式模式下由 worker 填写；
+            # 标准输入/输出测试的执行时间包括进程启动时间，归一化前先减去
+            return speed_calibrator.apply(language.value, response, TestCaseType.STDIN_STDOUT in case_types)
+        except DeadlineExceededError as exc:
+            return CodeExecutionResponse(
+                status=ExecutionStatus.DEADLINE_EXCEEDED, message=str(exc), total_tests=len(test_cases)
+            )
+
+    @staticmethod
+    def _run_tests_payload(
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Sequence[TestCase],
+        problem_id: Optional[str],
+        stop_on_first_failure: bool,
+        time_limit: Optional[float],
+        time_budget: Optional[float],
+        comparator: Optional[ComparatorType],
+        comparator_options: Optional[Dict[str, Any]],
+        response_detail: ResponseDetail,
+        compile_profile: CompileProfile,
+        profile: bool,
+        priority: PriorityClass,
+        deadline: Optional[float],
+        tenant: str
+    ) -> Dict[str, Any]:
+        """run_tests 任务的参数（参数见 run_tests），由 handle_job 还原"""
+        payload = {
+            "code": code,
+            "language": language.value,
+            "problem_id": problem_id,
+            "stop_on_first_failure": stop_on_first_failure,
+            "time_limit": time_limit,
+            "time_budget": time_budget,
+            "comparator": ComparatorType(comparator).value if comparator else None,
+            "comparator_options": comparator_options,
+            "response_detail": ResponseDetail(response_detail).value,
+            "compile_profile": compile_profile.value,
+            "profile": profile,
+            "priority": priority.value,
+            "deadline": deadline,
+            "tenant": tenant,
+        }
+        if isinstance(test_cases, Dataset):
+            # worker 从共享的数据集目录读取测试用例
+            payload["dataset"] = {"dataset_id": test_cases.id, "path": test_cases.path}
+        else:
+            payload["test_cases"] = [tc.model_dump(mode="json") for tc in test_cases]
+        return payload
+
+    @staticmethod
+    def resolve_compile_profile(compile_profile: Optional[CompileProfile], test_count: int) -> CompileProfile:
+        """
+        确定编译配置
+        
+        请求或问题指定的编译配置优先；否则使用 DEFAULT_COMPILE_PROFILE，为 auto 时
+        测试用例数不少于 COMPILE_PROFILE_OPTIMIZED_MIN_TESTS 使用 optimized，否则使用 fast_compile。
+        
+        Args:
+            compile_profile: 指定的编译配置
+            test_count: 测试用例数
+            
+        Returns:
+            CompileProfile: 编译配置
+        """
+        if compile_profile:
+            return CompileProfile(compile_profile)
+        if settings.DEFAULT_COMPILE_PROFILE != "auto":
+            return CompileProfile(settings.DEFAULT_COMPILE_PROFILE)
+        if test_count >= settings.COMPILE_PROFILE_OPTIMIZED_MIN_TESTS:
+            return CompileProfile.OPTIMIZED
+        return CompileProfile.FAST_COMPILE
+
+    @staticmethod
+    def _case_key(test_cases: Sequence[TestCase], index: int) -> str:
+        """测试用例的统计标识，数据集直接读取上传时计算的标识"""
+        if isinstance(test_cases, Dataset):
+            return test_cases.case_key(index)
+        return ProblemStatsStore.case_key(test_cases[index])
+
+    @staticmethod
+    def _test_result(
+        test_cases: Sequence[TestCase],
+        index: int,
+        response_detail: ResponseDetail,
+        passed: bool,
+        status: ExecutionStatus,
+        execution_time: float,
+        memory_usage: float,
+        error: Optional[str] = None,
+        diff: Optional[str] = None,
+        actual_output: Any = None,
+        actual_is_expected: bool = False
+    ) -> TestResult:
+        """
+        构造单个测试结果
+        
+        按响应详细程度决定是否回传测试用例的输入、期望输出和实际输出：
+        failures_only 只回传未通过的测试用例，verdict_only 只返回序号、结论、状态、执行时间和内存使用。
+        不回传时不会读取测试用例，数据集中的测试用例不需要解码。
+        
+        Args:
+            test_cases: 测试用例列表
+            index: 测试用例下标
+            response_detail: 响应详细程度
+            passed: 是否通过
+            status: 测试用例执行状态
+            execution_time: 执行时间(毫秒)
+            memory_usage: 内存使用(KB)
+            error: 错误信息
+            diff: 差异摘要
+            actual_output: 实际输出
+            actual_is_expected: 实际输出与期望输出相同，回传时使用期望输出
+            
+        Returns:
+            TestResult: 测试结果
+        """
+        echo = response_detail == ResponseDetail.FULL or (
+            response_detail == ResponseDetail.FAILURES_ONLY and not passed
+        )
+        if not echo:
+            return TestResult(
+                test_case=index + 1,
+                passed=passed,
+                status=status,
+                execution_time=execution_time,
+                memory_usage=memory_usage
+            )
+        
+        test_case = test_cases[index]
+        return TestResult(
+            test_case=index + 1,
+            passed=passed,
+            status=status,
+            error=error,
+            diff=diff,
+            input=test_case.input,
+            expected_output=test_case.expected_output,
+            actual_output=test_case.expected_output if actual_is_expected else actual_output,
+            execution_time=execution_time,
+            memory_usage=memory_usage,
+            description=test_case.description
+        )
 
+    @classmethod
+    async def _run_function_tests(
+        cls,
+        executor,
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Sequence[TestCase],
+        order: List[int],
+        problem_id: Optional[str],
+        stop_on_first_failure: bool,
+        time_limit: float,
+        time_budget: float,
+        comparator: ComparatorType,
+        comparator_options: Optional[Dict[str, Any]],
+        response_detail: ResponseDetail,
+        compile_profile: CompileProfile,
+        profile: bool = False
+    ) -> CodeExecutionResponse:
+        """
+        运行函数测试用例
+        
+        生成一次测试代码，在同一个进程中按顺序执行全部测试用例。测试代码把每个测试用例的结果作为一帧写入
+        结果管道，每收到一帧即转换为测试结果；用户代码的标准输出和标准错误单独收集，截断后随响应返回。
+        测试用例来自数据集时，测试代码只包含数据集文件路径和执行顺序，由测试代码通过内存映射读取；
+        执行期间持有数据集文件的硬链接（见 pin_dataset），数据集被淘汰或删除时测试代码仍能打开。
+        
+        测试代码在执行每个测试用例前写入一个开始帧。进程在测试用例执行期间异常退出（超时、内存不足、段错误等）时，
+        保留已收到的测试结果，把异常记为正在执行的测试用例的结果，并在新进程中继续执行剩余的测试用例
+        （最多 HARNESS_MAX_RESTARTS 次），已通过的测试用例不会重新执行。
+        
+        开启 profile 时测试代码在用户代码运行期间按 CPU 时间采样调用栈，结束前写入一个性能分析帧，
+        各进程的采样合并后按累计 CPU 时间返回热点函数和热点行。
+        
+        Args:
+            executor: 语言执行器
+            code: 用户代码
+            language: 编程语言
+            test_cases: 测试用例列表
+            order: 测试用例的执行顺序
+            problem_id: 问题ID
+            stop_on_first_failure: 是否在第一个测试用例失败后停止
+            time_limit: 单个测试用例的时间限制（秒）
+            time_budget: 整个提交的时间预算（秒）
+            comparator: 输出比较方式
+            comparator_options: 比较器参数
+            response_detail: 响应详细程度
+            compile_profile: 编译配置
+            profile: 是否进行采样性能分析
+            
+        Returns:
+            CodeExecutionResponse: 执行结果
+        """
+        results: List[TestResult] = []
+        # 当前进程中已开始执行、还未收到结果的测试用例的开始时间
+        running: Dict[str, float] = {}
+        # 各测试进程的性能分析帧
+        profiles: List[Dict[str, Any]] = []
+        
+        def on_frame(frame: Dict[str, Any]) -> None:
+            if frame.get("event") == "profile":
+                profiles.append(frame)
+                return
+            if len(results) >= len(order):
+                return
+            if frame.get("event") == "start":
+                running["start_time"] = time.time()
+                return
+            running.clear()
+            add_result(order[len(results)], frame)
+        
+        def add_result(index: int, raw_result: Dict[str, Any]) -> None:
+            if problem_id:
+                problem_stats.record(problem_id, cls._case_key(test_cases, index), raw_result["passed"])
+            results.append(cls._test_result(
+                test_cases,
+                index,
+                response_detail,
+                passed=raw_result["passed"],
+                status=raw_result.get("status", ExecutionStatus.SUCCESS),
+                execution_time=raw_result["execution_time"],
+                memory_usage=raw_result["memory_usage"],
+                error=raw_result.get("error"),
+                diff=raw_result.get("diff"),
+                actual_output=raw_result.get("actual_output"),
+                # 严格比较通过时实际输出与期望输出相同，无需由测试代码回传
+                actual_is_expected=raw_result["passed"] and comparator == ComparatorType.EXACT
+            ))
+        
+        stdout_parts: List[str] = []
+        stderr_parts: List[str] = []
+        deadline = time.time() + time_budget
+        restarts = 0
+        message = None
+        
         # 执行测试
+        pins = contextlib.ExitStack()
         try:
-            results = []
-            passed_tests = 0
-            
-            for i, test_case in enumerate(test_cases):
-                test_input = {
-                    "input": test_case.input,
-                    "expected_output": test_case.expected_output
-                }
+            # 测试代码进程按路径打开数据集文件，执行期间持有硬链接，数据集被淘汰或删除时不受影响
+            dataset_path = pins.enter_context(pin_dataset(test_cases)) if isinstance(test_cases, Dataset) else None
+            while True:
+                remaining_order = order[len(results):]
+                remaining_budget = max(deadline - time.time(), 0)
+                test_code = CodeGenerator().generate_test_code(
+                    code,
+                    language,
+                    [] if dataset_path else [test_cases[i] for i in remaining_order],
+                    stop_on_first_failure=stop_on_first_failure,
+                    time_limit=time_limit,
+                    comparator=comparator.value,
+                    comparator_options=comparator_options,
+                    output_echo_limit=settings.OUTPUT_ECHO_LIMIT,
+                    dataset=dataset_path is not None,
+                    profile_interval=settings.PROFILE_SAMPLE_INTERVAL if profile else None,
+                    profile_max_overhead=settings.PROFILE_MAX_OVERHEAD
+                )
+                running.clear()
+                compile_error, run = await executor.execute_harness(
+                    test_code,
+                    timeout=remaining_budget + settings.SUBMISSION_TIMEOUT_GRACE,
+                    compile_profile=compile_profile.value,
+                    on_result=on_frame,
+                    # 时间预算、数据集路径和执行顺序每次运行都不同，运行时传入，测试代码的渲染结果可以缓存
+                    input=CodeGenerator.harness_input(
+                        remaining_budget, dataset_path, remaining_order if dataset_path else None
+                    )
+                )
                 
-                # 执行代码
-                output, execution_time, memory_usage = await executor.execute(test_code, test_input)
+                if compile_error is not None:
+                    return CodeExecutionResponse(
+                        status=ExecutionStatus.COMPILE_ERROR,
+                        message=compile_error,
+                        total_tests=len(test_cases),
+                        passed_tests=0,
+                        execution_time=0,
+                        memory_usage=0
+                    )
+                stdout_parts.append(run["stdout"])
+                stderr_parts.append(run["stderr"])
                 
-                # 检查结果
-                if isinstance(output, dict) and "error" in output:
-                    results.append(TestResult(
-                        passed=False,
-                        input=test_case.input,
-                        expected_output=test_case.expected_output,
-                        actual_output=None,
-                        error=output["error"],
-                        execution_time=execution_time,
-                        memory_usage=memory_usage,
-                        description=test_case.description
-                    ))
-                else:
-                    passed = output == test_case.expected_output
-                    if passed:
-                        passed_tests += 1
-                    
-                    results.append(TestResult(
-                        passed=passed,
-                        input=test_case.input,
-                        expected_output=test_case.expected_output,
-                        actual_output=output,
-                        execution_time=execution_time,
-                        memory_usage=memory_usage,
-                        description=test_case.description
-                    ))
+                if not running:
+                    if not run["timeout"] and run["returncode"] == 0:
+                        break
+                    if not results:
+                        # 进程在执行第一个测试用例之前异常退出（例如用户代码无法加载），整个提交失败
+                        return CodeExecutionResponse(
+                            status=ExecutionStatus.TIME_LIMIT_EXCEEDED if run["timeout"] else ExecutionStatus.RUNTIME_ERROR,
+                            message="执行超时" if run["timeout"] else run["stderr"] or f"进程退出码: {run['returncode']}",
+                            total_tests=len(test_cases),
+                            passed_tests=0,
+                            execution_time=run["execution_time"],
+                            memory_usage=0,
+                            **cls._echo_output(stdout_parts, stderr_parts, response_detail)
+                        )
+                    message = "测试进程在测试用例之间异常退出"
+                    break
+                
+                # 进程在测试用例执行期间异常退出，记为该测试用例的结果
+                status, error = cls._harness_failure(run, time_limit)
+                add_result(order[len(results)], {
+                    "passed": False,
+                    "status": status,
+                    "error": error,
+                    "execution_time": (time.time() - running["start_time"]) * 1000,
+                    "memory_usage": 0,
+                })
+                if len(results) >= len(order) or stop_on_first_failure:
+                    break
+                if run["timeout"] or deadline - time.time() <= 0:
+                    message = "提交时间预算已用尽"
+                    break
+                if restarts >= settings.HARNESS_MAX_RESTARTS:
+                    message = "测试进程异常退出"
+                    break
+                restarts += 1
             
+            results.sort(key=lambda r: r.test_case)
+            
+            skipped = len(test_cases) - len(results)
+            if not skipped:
+                message = None
+            elif message:
+                message = f"{message}，{skipped} 个测试用例未执行"
+            else:
+                message = f"测试用例失败，已跳过剩余 {skipped} 个测试用例"
             return CodeExecutionResponse(
                 status=ExecutionStatus.SUCCESS,
+                message=message,
                 test_results=results,
                 total_tests=len(test_cases),
-                passed_tests=passed_tests,
+                passed_tests=sum(1 for r in results if r.passed),
                 execution_time=sum(r.execution_time for r in results),
-                memory_usage=max((r.memory_usage for r in results), default=0)
+                memory_usage=max((r.memory_usage for r in results), default=0),
+                profile=cls._profile_report(code, profiles) if profile else None,
+                **cls._echo_output(stdout_parts, stderr_parts, response_detail)
             )
             
+        except DeadlineExceededError:
+            # 编译完成后等待执行槽位期间截止时间已过，由 _run_tests 返回 DEADLINE_EXCEEDED
+            raise
         except Exception as exc:
             return CodeExecutionResponse(
                 status=ExecutionStatus.INTERNAL_ERROR,
@@ -234,22 +673,489 @@ class CodeExecutionService:
                 total_tests=len(test_cases),
                 passed_tests=0
             )
+        finally:
+            pins.close()
+
+    @staticmethod
+    def _profile_report(code: str, profiles: List[Dict[str, Any]]) -> ProfileReport:
+        """
+        合并各测试进程的性能分析帧
+        
+        Args:
+            code: 用户代码，用于返回热点行的源代码
+            profiles: 性能分析帧，CPU 时间单位为秒
+            
+        Returns:
+            ProfileReport: 按累计 CPU 时间排序的热点函数和热点行，各最多 PROFILE_TOP_N 个
+        """
+        functions: Dict[Tuple[Optional[str], str, int], float] = {}
+        lines: Dict[int, float] = {}
+        for frame in profiles:
+            for file, name, line, seconds in frame["functions"]:
+                functions[(file, name, line)] = functions.get((file, name, line), 0.0) + seconds
+            for line, seconds in frame["lines"]:
+                lines[line] = lines.get(line, 0.0) + seconds
+        
+        total = sum(frame["total_time"] for frame in profiles)
+        source = code.splitlines()
+        top_n = settings.PROFILE_TOP_N
+        
+        def percent(seconds: float) -> float:
+            return seconds / total * 100 if total else 0.0
+        
+        return ProfileReport(
+            samples=sum(frame["samples"] for frame in profiles),
+            sample_interval=max((frame["sample_interval"] for frame in profiles), default=0.0) * 1000,
+            total_time=total * 1000,
+            overhead_time=sum(frame["overhead_time"] for frame in profiles),
+            functions=[
+                ProfileFunction(
+                    function=name, file=file, line=line, cumulative_time=seconds * 1000, percent=percent(seconds)
+                )
+                for (file, name, line), seconds in sorted(functions.items(), key=lambda item: -item[1])[:top_n]
+            ],
+            lines=[
+                ProfileLine(
+                    line=line,
+                    code=source[line - 1].strip() if 0 < line <= len(source) else None,
+                    cumulative_time=seconds * 1000,
+                    percent=percent(seconds)
+                )
+                for line, seconds in sorted(lines.items(), key=lambda item: -item[1])[:top_n]
+            ]
+        )
+
+    @staticmethod
+    def _harness_failure(run: Dict[str, Any], time_limit: float) -> Tuple[ExecutionStatus, str]:
+        """
+        测试进程在测试用例执行期间异常退出时，该测试用例的状态和错误信息
+        
+        Args:
+            run: 测试进程的运行结果
+            time_limit: 单个测试用例的时间限制（秒）
+            
+        Returns:
+            Tuple[ExecutionStatus, str]: (状态, 错误信息)
+        """
+        if run["timeout"]:
+            return ExecutionStatus.TIME_LIMIT_EXCEEDED, f"测试用例执行超过时间限制 {time_limit} 秒"
+        stderr = run["stderr"][-settings.OUTPUT_ECHO_LIMIT:]
+        if run["returncode"] < 0:
+            try:
+                name = signal.Signals(-run["returncode"]).name
+            except ValueError:
+                name = str(-run["returncode"])
+            # 未超时却被 SIGKILL 结束的进程通常是超出内存限制被内核结束
+            if run["returncode"] == -signal.SIGKILL:
+                return ExecutionStatus.MEMORY_LIMIT_EXCEEDED, f"测试进程被 {name} 信号结束，可能超出内存限制"
+            return ExecutionStatus.RUNTIME_ERROR, f"测试进程被 {name} 信号结束\n{stderr}".rstrip()
+        return ExecutionStatus.RUNTIME_ERROR, stderr or f"测试进程在测试用例执行期间退出，退出码: {run['returncode']}"
+
+    @staticmethod
+    def _echo_output(
+        stdout_parts: List[str], stderr_parts: List[str], response_detail: ResponseDetail
+    ) -> Dict[str, Optional[str]]:
+        """用户代码的标准输出和标准错误（截断），只在完整响应中回传"""
+        if response_detail != ResponseDetail.FULL:
+            return {"stdout": None, "stderr": None}
+        stdout = "".join(stdout_parts)[:settings.OUTPUT_ECHO_LIMIT]
+        stderr = "".join(stderr_parts)[:settings.OUTPUT_ECHO_LIMIT]
+        return {"stdout": stdout or None, "stderr": stderr or None}
+
+    @classmethod
+    async def _run_stdin_stdout_tests(
+        cls,
+        executor,
+        code: str,
+        test_cases: Sequence[TestCase],
+        order: List[int],
+        problem_id: Optional[str],
+        stop_on_first_failure: bool,
+        time_limit: float,
+        time_budget: float,
+        comparator: ComparatorType,
+        comparator_options: Optional[Dict[str, Any]],
+        response_detail: ResponseDetail,
+        compile_profile: CompileProfile
+    ) -> CodeExecutionResponse:
+        """
+        运行标准输入/输出测试用例
+        
+        代码只编译一次，各测试用例作为独立进程并行运行，每个进程结束后立即比较输出，
+        只保留比较结论、差异摘要和截断后的输出。
+        
+        Args:
+            executor: 语言执行器
+            code: 用户代码
+            test_cases: 测试用例列表
+            order: 测试用例的执行顺序
+            problem_id: 问题ID
+            stop_on_first_failure: 是否在第一个测试用例失败后停止
+            time_limit: 单个测试用例的时间限制（秒）
+            time_budget: 整个提交的时间预算（秒）
+            comparator: 输出比较方式
+            comparator_options: 比较器参数
+            response_detail: 响应详细程度
+            compile_profile: 编译配置
+            
+        Returns:
+            CodeExecutionResponse: 执行结果
+        """
+        # 数据集中的测试用例只解码一次
+        cases = {i: test_cases[i] for i in order}
+        verdicts: Dict[int, Tuple[bool, Optional[str]]] = {}
+        # 因时间预算用尽而未执行的测试用例，其余未执行的测试用例是失败即停止模式下被取消的
+        out_of_budget: Set[int] = set()
+        
+        def case_passed(position: int, run: Dict[str, Any]) -> bool:
+            if position not in verdicts:
+                if run["timeout"] or run["returncode"] != 0:
+                    verdicts[position] = (False, None)
+                else:
+                    verdicts[position] = comparators.compare(
+                        run["stdout"], str(cases[order[position]].expected_output),
+                        comparator.value, comparator_options
+                    )
+                # 比较完成后只保留截断的输出
+                run["stdout"] = run["stdout"][:settings.OUTPUT_ECHO_LIMIT]
+            return verdicts[position][0]
+        
+        compile_error, runs = await executor.execute_stdin_cases(
+            code,
+            [str(cases[i].input) for i in order],
+            time_limit=time_limit,
+            time_budget=time_budget,
+            concurrency=settings.STDIN_CASE_CONCURRENCY,
+            should_stop=lambda position, run: not case_passed(position, run) and stop_on_first_failure,
+            compile_profile=compile_profile.value,
+            on_budget_exhausted=out_of_budget.add
+        )
+        if compile_error is not None:
+            return CodeExecutionResponse(
+                status=ExecutionStatus.COMPILE_ERROR,
+                message=compile_error,
+                total_tests=len(test_cases),
+                passed_tests=0
+            )
+        
+        results = []
+        for position, run in enumerate(runs):
+            index = order[position]
+            if run is None:
+                continue
+            
+            passed = case_passed(position, run)
+            diff = verdicts[position][1]
+            if run["timeout"]:
+                status = ExecutionStatus.TIME_LIMIT_EXCEEDED
+                error = f"测试用例执行超过时间限制 {time_limit} 秒"
+            elif run["returncode"] != 0:
+                status = ExecutionStatus.RUNTIME_ERROR
+                error = run["stderr"] or f"进程退出码: {run['returncode']}"
+            else:
+                status = ExecutionStatus.SUCCESS
+                error = None
+            
+            if problem_id:
+                problem_stats.record(problem_id, cls._case_key(test_cases, index), passed)
+            
+            results.append(cls._test_result(
+                cases,
+                index,
+                response_detail,
+                passed=passed,
+                status=status,
+                execution_time=run["execution_time"],
+                memory_usage=0,
+                error=error,
+                diff=diff,
+                actual_output=None if passed else run["stdout"]
+            ))
+        results.sort(key=lambda r: r.test_case)
+        
+        # 按实际原因分别说明未执行的测试用例
+        stopped = len(test_cases) - len(results) - len(out_of_budget)
+        reasons = []
+        if stopped:
+            reasons.append(f"测试用例失败，已跳过剩余 {stopped} 个测试用例")
+        if out_of_budget:
+            reasons.append(f"提交时间预算已用尽，{len(out_of_budget)} 个测试用例未执行")
+        message = "；".join(reasons) or None
+        
+        return CodeExecutionResponse(
+            status=ExecutionStatus.SUCCESS,
+            message=message,
+            test_results=results,
+            total_tests=len(test_cases),
+            passed_tests=sum(1 for r in results if r.passed),
+            execution_time=sum(r.execution_time for r in results),
+            memory_usage=0
+        )
 
     @classmethod
-    async def direct_execute_code(cls, code: str, language: ProgrammingLanguage) -> Tuple[Any, float, float]:
+    async def direct_execute_code(
+        cls,
+        code: str,
+        language: ProgrammingLanguage,
+        compile_profile: Optional[CompileProfile] = None,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None,
+        force_local: bool = False
+    ) -> Tuple[Any, float, float]:
         """
         直接执行代码，不需要任何输入数据或模板渲染
         
+        与正在执行的请求代码和设置都相同的请求共享同一次执行的结果（见 run_tests）。
+        
         Args:
             code: 用户代码
             language: 编程语言
+            compile_profile: 编译配置，默认按 DEFAULT_COMPILE_PROFILE 的策略选择
+            priority: 调度优先级，默认为 DEFAULT_PRIORITY
+            deadline: 截止时间（Unix 时间戳，秒），None 表示不限制
+            tenant: 租户名，默认为 DEFAULT_TENANT
+            force_local: 是否强制在当前进程内执行（worker 进程使用）
             
         Returns:
             Tuple[Any, float, float]: (执行结果, 执行时间(ms), 内存使用(KB))
+            
+        Raises:
+            DeadlineExceededError: 开始执行前截止时间已过
+            QuotaExceededError: 租户的 CPU 时间配额已用尽
         """
+        compile_profile = cls.resolve_compile_profile(compile_profile, 0)
+        priority = PriorityClass(priority or settings.DEFAULT_PRIORITY)
+        tenant = tenant or settings.DEFAULT_TENANT
+        if not force_local:
+            await cls._check_quota(tenant)
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await cls._direct_execute(code, language, compile_profile, priority, deadline, tenant, force_local)
+        
+        # 指纹相同的并发请求共享一次执行，截止时间不参与指纹，每个请求按自己的截止时间等待
+        key = single_flight.fingerprint(
+            "direct_execute", language.value, code, compile_profile.value, priority.value, tenant, force_local
+        )
+        while True:
+            try:
+                return await single_flight.run(key, lambda: cls._direct_execute(
+                    code, language, compile_profile, priority, deadline, tenant, force_local
+                ), deadline)
+            except DeadlineExceededError:
+                # 共享的执行因为先到达的请求的截止时间而被丢弃，本请求的截止时间未到时重新执行
+                if deadline is not None and time.time() >= deadline:
+                    raise
+
+    @classmethod
+    async def _direct_execute(
+        cls,
+        code: str,
+        language: ProgrammingLanguage,
+        compile_profile: CompileProfile,
+        priority: PriorityClass,
+        deadline: Optional[float],
+        tenant: str,
+        force_local: bool
+    ) -> Tuple[Any, float, float]:
+        """直接执行一次代码（参数见 direct_execute_code），投递到任务队列或者在调度器中排队后在本进程内执行"""
+        if settings.EXECUTION_MODE == "distributed" and not force_local:
+            result = await cls._submit_job("direct_execute", {
+                "code": code,
+                "language": language.value,
+                "compile_profile": compile_profile.value,
+                "priority": priority.value,
+                "deadline": deadline,
+                "tenant": tenant,
+            }, priority, deadline, tenant)
+            return tuple(result)
+
         executor = cls._executors.get(language)
         if not executor:
             raise ValueError(f"不支持的编程语言: {language}")
         
         # 直接执行代码，不需要任何输入数据
-        return await executor.execute(code, {})
\ No newline at end of file
+        async with execution_scheduler.submission(priority, deadline, tenant):
+            return await executor.execute(code, {}, compile_profile=compile_profile.value)
+
+    @classmethod
+    async def _check_quota(cls, tenant: str) -> None:
+        """
+        检查租户的 CPU 时间配额
+        
+        本地执行模式下按本进程的统计，分布式执行模式下按任务队列中所有 worker 上报的 CPU 时间合计。
+        
+        Args:
+            tenant: 租户名
+            
+        Raises:
+            QuotaExceededError: 配额已用尽
+        """
+        tenant_info = tenant_registry.get(tenant)
+        if not tenant_info.cpu_quota:
+            return
+        if settings.EXECUTION_MODE == "distributed":
+            since = time.time() - settings.TENANT_CPU_QUOTA_WINDOW
+            used = await asyncio.to_thread(get_job_queue().cpu_usage, tenant_info.name, since)
+        else:
+            used = tenant_registry.cpu_used(tenant_info.name)
+        tenant_registry.check_quota(tenant_info, used)
+
+    @classmethod
+    async def _submit_job(
+        cls,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: PriorityClass = PriorityClass.INTERACTIVE,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> Any:
+        """
+        将执行任务投递到任务队列，并等待 worker 返回结果
+        
+        Args:
+            kind: 任务类型
+            payload: 任务参数（必须可以 JSON 序列化）
+            priority: 调度优先级，worker 按优先级领取任务
+            deadline: 截止时间（Unix 时间戳，秒），过期后仍未被领取的任务不再执行
+            tenant: 租户名，worker 在租户之间按权重公平领取任务
+            
+        Returns:
+            Any: worker 返回的任务结果
+            
+        Raises:
+            DeadlineExceededError: 任务开始执行前截止时间已过
+            RuntimeError: 任务执行失败
+            TimeoutError: 等待结果超时
+        """
+        queue = get_job_queue()
+        job_id = await asyncio.to_thread(queue.enqueue, kind, payload, PRIORITY_RANK[priority], deadline, tenant)
+        result_deadline = time.time() + settings.JOB_RESULT_TIMEOUT
+        
+        while time.time() < result_deadline:
+            job = await asyncio.to_thread(queue.get, job_id)
+            if job is None:
+                raise RuntimeError(f"任务不存在: {job_id}")
+            if job.finished:
+                if job.error == DEADLINE_EXCEEDED_ERROR:
+                    raise DeadlineExceededError()
+                if job.error is not None and job.result is None:
+                    raise RuntimeError(f"任务执行失败: {job.error}")
+                return job.result
+            if deadline is not None and time.time() > deadline and job.status == JobStatus.QUEUED:
+                # 仍未被领取的任务会在领取时被丢弃，不必等待
+                raise DeadlineExceededError()
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+        
+        raise TimeoutError(f"等待任务结果超时: {job_id}")
+
+    @classmethod
+    async def submit_tests(
+        cls,
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Sequence[TestCase],
+        problem_id: Optional[str] = None,
+        stop_on_first_failure: bool = False,
+        time_limit: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        comparator: Optional[ComparatorType] = None,
+        comparator_options: Optional[Dict[str, Any]] = None,
+        response_detail: ResponseDetail = ResponseDetail.FULL,
+        compile_profile: Optional[CompileProfile] = None,
+        profile: bool = False,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> str:
+        """
+        提交异步测试任务（参数见 run_tests），不等待执行结果
+        
+        任务保存在任务队列中（见 app/services/job_queue.py），API 进程重启后仍可查询。分布式执行模式下由 worker 执行，
+        本地执行模式下由 API 进程内的 worker 执行（见 app/main.py）。
+        
+        Returns:
+            str: 任务ID
+            
+        Raises:
+            QuotaExceededError: 租户的 CPU 时间配额已用尽
+        """
+        compile_profile = cls.resolve_compile_profile(compile_profile, len(test_cases))
+        priority = PriorityClass(priority or settings.DEFAULT_PRIORITY)
+        tenant = tenant or settings.DEFAULT_TENANT
+        await cls._check_quota(tenant)
+        payload = cls._run_tests_payload(
+            code, language, test_cases, problem_id, stop_on_first_failure, time_limit, time_budget, comparator,
+            comparator_options, response_detail, compile_profile, profile, priority, deadline, tenant
+        )
+        job_id = await asyncio.to_thread(
+            get_job_queue().enqueue, "run_tests", payload, PRIORITY_RANK[priority], deadline, tenant
+        )
+        job_notifier.notify()
+        return job_id
+
+    @classmethod
+    async def get_job(cls, job_id: str, wait: float = 0.0) -> Optional[Job]:
+        """
+        查询异步任务，任务未结束时最多等待 wait 秒（长轮询）
+        
+        Args:
+            job_id: 任务ID
+            wait: 最长等待时间（秒），0 表示立即返回
+            
+        Returns:
+            Optional[Job]: 任务，不存在时返回 None
+        """
+        queue = get_job_queue()
+        wait_deadline = time.time() + wait
+        while True:
+            job = await asyncio.to_thread(queue.get, job_id)
+            if job is None or job.finished or time.time() >= wait_deadline:
+                return job
+            await asyncio.sleep(min(settings.JOB_POLL_INTERVAL, max(wait_deadline - time.time(), 0)))
+
+    @classmethod
+    async def cancel_job(cls, job_id: str) -> bool:
+        """
+        取消异步任务
+        
+        排队中的任务不再执行；运行中的任务在执行它的 worker 下一次续约（JOB_HEARTBEAT_INTERVAL）时停止执行。
+        
+        Args:
+            job_id: 任务ID
+            
+        Returns:
+            bool: 是否取消成功，任务不存在或已经结束时返回 False
+        """
+        return await asyncio.to_thread(get_job_queue().cancel, job_id)
+
+    @classmethod
+    async def handle_job(cls, kind: str, payload: Dict[str, Any]) -> Any:
+        """
+        在 worker 进程内执行队列中的任务
+        
+        Args:
+            kind: 任务类型
+            payload: 任务参数
+            
+        Returns:
+            Any: 可以 JSON 序列化的任务结果
+            
+        Raises:
+            ValueError: 未知的任务类型
+        """
+        options = dict(payload)
+        options["language"] = ProgrammingLanguage(payload["language"])
+        
+        if kind == "run_tests":
+            if "dataset" in options:
+                options["test_cases"] = Dataset(**options.pop("dataset"))
+            else:
+                options["test_cases"] = [TestCase(**tc) for tc in payload["test_cases"]]
+            response = await cls.run_tests(force_local=True, **options)
+            return response.model_dump(mode="json", exclude_none=True)
+        
+        if kind == "direct_execute":
+            output, execution_time, memory_usage = await cls.direct_execute_code(force_local=True, **options)
+            return [output, execution_time, memory_usage]
+        
+        raise ValueError(f"未知的任务类型: {kind}")
\ No newline at end of file
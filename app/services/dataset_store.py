@@ -0,0 +1,374 @@
+"""
+测试数据集存储
+
+测试用例上传一次后以内容哈希作为数据集ID保存在本地磁盘，执行请求只需引用数据集ID。
+数据集文件使用紧凑的二进制格式，API 进程和测试代码进程都通过内存映射按需解码单个测试用例，
+同一问题的并发执行共享操作系统页缓存中的同一份数据。
+
+文件格式（小端序）:
+
+    header   : magic b"CRDS" | version u16 | case_type u16 | count u32
+    offsets  : (count + 1) 个 u64，第 i 个测试用例的记录位于 [offsets[i], offsets[i + 1])
+    keys     : count 个 20 字节的 SHA-1，测试用例的统计标识（与 ProblemStatsStore.case_key 一致）
+    records  : 每个测试用例一条 JSON 记录 {"input", "expected_output", "description", "type"}
+"""
+import os
+import json
+import mmap
+import time
+import uuid
+import struct
+import hashlib
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.core.config import settings
+from app.schemas.code_execution import TestCase, TestCaseType
+from app.services.problem_stats import ProblemStatsStore
+
+MAGIC = b"CRDS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+OFFSET = struct.Struct("<Q")
+KEY_SIZE = 20
+SUFFIX = ".crds"
+# 记录上传过数据集的租户，每行一个租户名
+OWNERS_SUFFIX = ".owners"
+# 正在执行的测试使用的数据集硬链接所在的子目录，见 pin_dataset
+PIN_DIR = ".inflight"
+# 超过该时间（秒）的硬链接视为进程异常退出后的遗留，由 DatasetStore.evict 删除
+PIN_MAX_AGE = 24 * 3600
+
+# 测试用例类型在文件头中的编码
+_TYPE_CODES = {TestCaseType.FUNCTION: 0, TestCaseType.STDIN_STDOUT: 1}
+_CODE_TYPES = {code: case_type for case_type, code in _TYPE_CODES.items()}
+
+
+def encode_dataset(test_cases: Sequence[TestCase]) -> bytes:
+    """
+    将测试用例编码为数据集文件内容
+
+    Args:
+        test_cases: 测试用例列表，类型必须相同
+
+    Returns:
+        bytes: 数据集文件内容，相同的测试用例总是得到相同的内容
+
+    Raises:
+        ValueError: 测试用例为空或类型不同
+    """
+    if not test_cases:
+        raise ValueError("测试数据集不能为空")
+    case_types = {tc.type for tc in test_cases}
+    if len(case_types) > 1:
+        raise ValueError("标准输入/输出测试用例不能与函数测试用例混合使用")
+
+    records = [
+        json.dumps(tc.model_dump(mode="json"), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        for tc in test_cases
+    ]
+    count = len(records)
+    position = HEADER.size + OFFSET.size * (count + 1) + KEY_SIZE * count
+    offsets = []
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+
+    parts = [HEADER.pack(MAGIC, VERSION, _TYPE_CODES[case_types.pop()], count)]
+    parts.extend(OFFSET.pack(offset) for offset in offsets)
+    parts.extend(bytes.fromhex(ProblemStatsStore.case_key(tc)) for tc in test_cases)
+    parts.extend(records)
+    return b"".join(parts)
+
+
+class Dataset(Sequence[TestCase]):
+    """
+    内存映射的测试数据集
+
+    按下标访问时才解码对应的测试用例，可以直接作为测试用例列表传给 CodeExecutionService.run_tests。
+    """
+
+    def __init__(self, dataset_id: str, path: str):
+        self.id = dataset_id
+        self.path = path
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, type_code, self._count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"无效的测试数据集文件: {path}")
+        self.type = _CODE_TYPES[type_code]
+        self._keys_start = HEADER.size + OFFSET.size * (self._count + 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> TestCase:
+        return TestCase.model_validate_json(self.record(index))
+
+    def __iter__(self) -> Iterator[TestCase]:
+        for index in range(self._count):
+            yield self[index]
+
+    @property
+    def size(self) -> int:
+        """数据集文件大小（字节）"""
+        return len(self._data)
+
+    def record(self, index: int) -> bytes:
+        """读取第 index 个测试用例的原始 JSON 记录"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = OFFSET.unpack_from(self._data, HEADER.size + OFFSET.size * index)[0]
+        end = OFFSET.unpack_from(self._data, HEADER.size + OFFSET.size * (index + 1))[0]
+        return self._data[start:end]
+
+    def case_key(self, index: int) -> str:
+        """读取第 index 个测试用例的统计标识，无需解码测试用例"""
+        start = self._keys_start + KEY_SIZE * index
+        return self._data[start:start + KEY_SIZE].hex()
+
+
+@contextlib.contextmanager
+def pin_dataset(dataset: Dataset) -> Iterator[str]:
+    """
+    为正在执行的测试在数据集目录下创建数据集文件的硬链接，退出时删除
+
+    测试代码进程启动后才按路径打开数据集文件，在此之前数据集可能被淘汰、被删除，或者随问题一起删除。
+    这些操作只删除数据集目录下的文件名，硬链接使文件内容保留到测试结束，其他 API 进程和 worker 的删除同样不受影响。
+    数据集文件已经被删除时，用已映射的内容写入一个新文件。
+
+    Args:
+        dataset: 已打开的数据集
+
+    Yields:
+        str: 测试代码应读取的文件路径
+    """
+    directory = os.path.join(os.path.dirname(dataset.path), PIN_DIR)
+    os.makedirs(directory, exist_ok=True)
+    # 文件名以创建时间开头，用于清理遗留的硬链接
+    path = os.path.join(directory, f"{int(time.time())}.{uuid.uuid4().hex}{SUFFIX}")
+    try:
+        os.link(dataset.path, path)
+    except FileNotFoundError:
+        with open(path, "wb") as file:
+            file.write(dataset._data)
+    try:
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class DatasetStore:
+    """
+    测试数据集存储
+
+    数据集文件保存在 directory 目录下，文件修改时间记录最近一次使用时间，
+    总大小超过 max_bytes 时按最近最少使用的顺序删除，max_bytes 不大于 0 时不删除。
+    已打开的数据集在内存中最多保留 max_open 个。
+    内容相同的数据集在租户之间共享，上传过的租户记录在同目录的 .owners 文件中，
+    租户删除数据集时只移除自己，所有租户都删除后才删除数据集文件。
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_open: int = 64):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_open = max_open
+        self._open: "OrderedDict[str, Dataset]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dataset_id: str) -> str:
+        if not dataset_id or not all(c in "0123456789abcdef" for c in dataset_id):
+            raise KeyError(dataset_id)
+        return os.path.join(self.directory, dataset_id + SUFFIX)
+
+    def _owners_path(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, dataset_id + OWNERS_SUFFIX)
+
+    def owners(self, dataset_id: str) -> List[str]:
+        """查询上传过测试数据集的租户，没有记录时返回空列表"""
+        try:
+            with open(self._owners_path(dataset_id), encoding="utf-8") as file:
+                return [line for line in file.read().splitlines() if line]
+        except FileNotFoundError:
+            return []
+
+    def _write_owners(self, dataset_id: str, owners: List[str]) -> None:
+        path = self._owners_path(dataset_id)
+        if not owners:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("".join(f"{owner}\n" for owner in owners))
+        os.replace(temp_path, path)
+
+    def put(self, test_cases: Sequence[TestCase], owner: Optional[str] = None) -> Dataset:
+        """
+        保存测试数据集，内容相同的数据集只保存一份
+
+        Args:
+            test_cases: 测试用例列表
+            owner: 上传数据集的租户，为 None 时不记录
+
+        Returns:
+            Dataset: 保存后的数据集
+        """
+        content = encode_dataset(test_cases)
+        dataset_id = hashlib.sha256(content).hexdigest()
+        path = self._path(dataset_id)
+        if not os.path.exists(path):
+            # 先写入临时文件再重命名，避免并发读取到不完整的文件
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, path)
+            self.evict(keep=dataset_id)
+        if owner is not None:
+            with self._lock:
+                owners = self.owners(dataset_id)
+                if owner not in owners:
+                    self._write_owners(dataset_id, owners + [owner])
+        return self.open(dataset_id)
+
+    def open(self, dataset_id: str) -> Dataset:
+        """
+        打开测试数据集并记录使用时间
+
+        Args:
+            dataset_id: 数据集ID
+
+        Returns:
+            Dataset: 数据集
+
+        Raises:
+            KeyError: 数据集不存在
+        """
+        path = self._path(dataset_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._open.pop(dataset_id, None)
+            raise KeyError(dataset_id)
+
+        with self._lock:
+            dataset = self._open.get(dataset_id)
+            if dataset is not None:
+                self._open.move_to_end(dataset_id)
+                return dataset
+
+        dataset = Dataset(dataset_id, path)
+        with self._lock:
+            self._open[dataset_id] = dataset
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return dataset
+
+    def info(self, dataset_id: str) -> Dict[str, Any]:
+        """查询测试数据集的信息"""
+        dataset = self.open(dataset_id)
+        return {
+            "dataset_id": dataset.id,
+            "count": len(dataset),
+            "type": dataset.type,
+            "size": dataset.size,
+        }
+
+    def delete(self, dataset_id: str, owner: Optional[str] = None) -> bool:
+        """
+        删除测试数据集，正在运行的测试代码已映射的内容不受影响
+
+        Args:
+            dataset_id: 数据集ID
+            owner: 删除数据集的租户，为 None 时直接删除数据集文件；
+                否则只移除该租户，还有其他租户上传过时保留数据集文件
+
+        Returns:
+            bool: 数据集是否存在
+
+        Raises:
+            PermissionError: 数据集记录了上传的租户，但不包括 owner
+        """
+        path = self._path(dataset_id)
+        with self._lock:
+            if owner is not None:
+                if not os.path.exists(path):
+                    return False
+                owners = self.owners(dataset_id)
+                if owners and owner not in owners:
+                    raise PermissionError(f"测试数据集不属于租户 {owner}: {dataset_id}")
+                remaining = [name for name in owners if name != owner]
+                if remaining:
+                    self._write_owners(dataset_id, remaining)
+                    return True
+            self._open.pop(dataset_id, None)
+            self._write_owners(dataset_id, [])
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+        return True
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        删除最近最少使用的测试数据集，直到总大小不超过 max_bytes
+
+        正在执行的测试通过 pin_dataset 持有硬链接，删除数据集文件不影响它们；同时清理超过 PIN_MAX_AGE 的遗留硬链接。
+
+        Args:
+            keep: 不删除的数据集ID，用于保留刚保存的数据集
+
+        Returns:
+            List[str]: 被删除的数据集ID
+        """
+        self._remove_stale_pins()
+        if self.max_bytes <= 0:
+            return []
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.name[:-len(SUFFIX)]))
+        total = sum(size for _, size, _ in entries)
+
+        evicted = []
+        for _, size, dataset_id in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if dataset_id == keep:
+                continue
+            if self.delete(dataset_id):
+                evicted.append(dataset_id)
+            total -= size
+        return evicted
+
+
+    def _remove_stale_pins(self) -> None:
+        """删除进程异常退出后遗留的硬链接"""
+        cutoff = time.time() - PIN_MAX_AGE
+        try:
+            entries = list(os.scandir(os.path.join(self.directory, PIN_DIR)))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            created, _, _ = entry.name.partition(".")
+            if created.isdigit() and int(created) < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+# 全局数据集存储实例
+dataset_store = DatasetStore(settings.DATASET_DIR, settings.DATASET_CACHE_MAX_BYTES)
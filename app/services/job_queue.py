@@ -0,0 +1,465 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import importlib
+import threading
+from dataclasses import dataclass
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.schemas.code_execution import JobStatus
+from app.services.tenants import tenant_registry
+
+# 截止时间已过、未被领取的任务的错误信息
+DEADLINE_EXCEEDED_ERROR = "截止时间已过，任务未执行"
+# 被取消的任务的错误信息
+CANCELLED_ERROR = "任务已取消"
+
+
+@dataclass
+class Job:
+    """队列中的执行任务"""
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    priority: int = 0
+    deadline: Optional[float] = None
+    tenant: Optional[str] = None
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    visible_at: float = 0.0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    # 执行任务消耗的 CPU 时间（秒）
+    cpu_time: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status.finished
+
+
+class JobQueue:
+    """
+    任务队列接口
+
+    API 节点通过 enqueue 投递任务，worker 通过 claim 领取任务。
+    领取后的任务在可见性超时内对其他 worker 不可见，worker 需要定期调用
+    heartbeat 续约；worker 崩溃或失联时任务会在超时后被重新投递，
+    因此投递语义为至少一次（at-least-once）。
+    """
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> str:
+        """
+        投递任务，返回任务ID
+
+        Args:
+            kind: 任务类型
+            payload: 任务参数
+            priority: 优先级，越小越先被领取
+            deadline: 截止时间（Unix 时间戳，秒），过期后仍未被领取的任务以 DEADLINE_EXCEEDED_ERROR 失败
+            tenant: 租户名
+        """
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        """
+        领取一个可见的任务，没有任务时返回 None
+
+        先按优先级；同一优先级内选择正在运行的任务数与权重之比最小的租户，跳过已达到并发上限的租户；
+        同一租户内按投递顺序。
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, visibility_timeout: float) -> bool:
+        """续约任务，返回 False 表示租约已丢失"""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result: Any, cpu_time: float = 0.0) -> bool:
+        """上报任务结果和消耗的 CPU 时间（秒）"""
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = False, cpu_time: float = 0.0) -> bool:
+        """上报任务失败和消耗的 CPU 时间（秒），retry 为 True 时任务重新入队"""
+        raise NotImplementedError
+
+    def add_cpu_time(self, job_id: str, cpu_time: float) -> None:
+        """
+        记录停止执行的任务消耗的 CPU 时间（秒），不改变任务状态
+
+        任务被取消或被其他 worker 接管后，原来的 worker 已经不能上报结果，但沙箱进程消耗的 CPU 时间仍计入租户的配额。
+        """
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消排队中或运行中的任务，返回 False 表示任务不存在或已经结束
+
+        运行中的任务由执行它的 worker 在下一次续约失败时停止执行，之后上报的结果被丢弃。
+        """
+        raise NotImplementedError
+
+    def cpu_usage(self, tenant: str, since: float) -> float:
+        """租户在指定时间戳之后完成的任务消耗的 CPU 时间合计（秒）"""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """查询任务"""
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """清理在指定时间戳之前完成的任务"""
+        raise NotImplementedError
+
+    def register_worker(self, worker_id: str, info: Dict[str, Any]) -> None:
+        """注册 worker 并上报心跳"""
+        raise NotImplementedError
+
+    def unregister_worker(self, worker_id: str) -> None:
+        """注销 worker"""
+        raise NotImplementedError
+
+    def list_workers(self) -> List[Dict[str, Any]]:
+        """列出已注册的 worker"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    基于 SQLite 的任务队列
+
+    适用于单机部署或共享同一个数据库文件的多进程部署。
+    使用 WAL 模式和 BEGIN IMMEDIATE 事务保证多进程领取任务的互斥。
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                visible_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_visible ON jobs (status, visible_at);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                info TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                last_heartbeat REAL NOT NULL
+            );
+            """
+        )
+        # 兼容没有 priority、deadline、tenant 和 cpu_time 列的旧数据库
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "priority" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        if "deadline" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN deadline REAL")
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN tenant TEXT")
+        if "cpu_time" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN cpu_time REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_deadline ON jobs (status, deadline)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs (tenant, finished_at)")
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=JobStatus(row["status"]),
+            priority=row["priority"],
+            deadline=row["deadline"],
+            tenant=row["tenant"],
+            attempts=row["attempts"],
+            worker_id=row["worker_id"],
+            visible_at=row["visible_at"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+            cpu_time=row["cpu_time"],
+        )
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, payload, status, priority, deadline, tenant, visible_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload), JobStatus.QUEUED, priority, deadline, tenant, now, now),
+        )
+        return job_id
+
+    @staticmethod
+    def _pick_tenant(conn: sqlite3.Connection, now: float) -> Optional[sqlite3.Row]:
+        """
+        选择下一个领取任务的 (优先级, 租户)
+
+        同一优先级内选择正在运行的任务数与权重之比最小的租户，相同时选择最早投递的，
+        已达到并发上限的租户跳过。没有可以领取的任务时返回 None。
+        """
+        running = {
+            row["tenant"]: row["count"]
+            for row in conn.execute(
+                "SELECT tenant, COUNT(*) AS count FROM jobs WHERE status = ? AND visible_at > ? GROUP BY tenant",
+                (JobStatus.RUNNING, now),
+            )
+        }
+        best_key, best = None, None
+        for candidate in conn.execute(
+            "SELECT priority, tenant, MIN(created_at) AS created_at FROM jobs "
+            "WHERE status IN (?, ?) AND visible_at <= ? GROUP BY priority, tenant",
+            (JobStatus.QUEUED, JobStatus.RUNNING, now),
+        ):
+            tenant = tenant_registry.get(candidate["tenant"])
+            active = running.get(candidate["tenant"], 0)
+            if tenant.max_concurrency and active >= tenant.max_concurrency:
+                continue
+            key = (candidate["priority"], active / tenant.weight, candidate["created_at"])
+            if best_key is None or key < best_key:
+                best_key, best = key, candidate
+        return best
+
+    def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        conn = self._connect()
+        while True:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 截止时间已过的排队中任务不再执行
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE status = ? AND deadline IS NOT NULL AND deadline <= ?",
+                    (JobStatus.FAILED, DEADLINE_EXCEEDED_ERROR, now, JobStatus.QUEUED, now),
+                )
+                # 排队中的任务和租约已过期的运行中任务都可以被领取，租户之间按权重公平领取
+                candidate = self._pick_tenant(conn, now)
+                row = None
+                if candidate is not None:
+                    row = conn.execute(
+                        "SELECT * FROM jobs WHERE status IN (?, ?) AND visible_at <= ? "
+                        "AND priority = ? AND tenant IS ? ORDER BY created_at LIMIT 1",
+                        (JobStatus.QUEUED, JobStatus.RUNNING, now, candidate["priority"], candidate["tenant"]),
+                    ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                if row["attempts"] >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (JobStatus.FAILED, f"任务投递 {row['attempts']} 次仍未完成", now, row["id"]),
+                    )
+                    conn.execute("COMMIT")
+                    continue
+
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, "
+                    "visible_at = ?, started_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING, worker_id, now + visibility_timeout, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            job = self._row_to_job(row)
+            job.status = JobStatus.RUNNING
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.visible_at = now + visibility_timeout
+            job.started_at = now
+            return job
+
+    def heartbeat(self, job_id: str, worker_id: str, visibility_timeout: float) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (time.time() + visibility_timeout, job_id, worker_id, JobStatus.RUNNING),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result: Any, cpu_time: float = 0.0) -> bool:
+        # 只有持有租约的 worker 可以提交结果，重复投递时先完成者生效
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, finished_at = ?, cpu_time = cpu_time + ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (JobStatus.SUCCEEDED, json.dumps(result), time.time(), cpu_time, job_id, worker_id, JobStatus.RUNNING),
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = False, cpu_time: float = 0.0) -> bool:
+        now = time.time()
+        if retry:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL, visible_at = ?, error = ?, cpu_time = cpu_time + ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (JobStatus.QUEUED, now, error, cpu_time, job_id, worker_id, JobStatus.RUNNING),
+            )
+        else:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, cpu_time = cpu_time + ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (JobStatus.FAILED, error, now, cpu_time, job_id, worker_id, JobStatus.RUNNING),
+            )
+        return cursor.rowcount > 0
+
+    def add_cpu_time(self, job_id: str, cpu_time: float) -> None:
+        self._connect().execute("UPDATE jobs SET cpu_time = cpu_time + ? WHERE id = ?", (cpu_time, job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (JobStatus.CANCELLED, CANCELLED_ERROR, time.time(), job_id, JobStatus.QUEUED, JobStatus.RUNNING),
+        )
+        return cursor.rowcount > 0
+
+    def cpu_usage(self, tenant: str, since: float) -> float:
+        row = self._connect().execute(
+            "SELECT COALESCE(SUM(cpu_time), 0) AS total FROM jobs WHERE tenant = ? AND finished_at >= ?",
+            (tenant, since),
+        ).fetchone()
+        return row["total"]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def purge(self, older_than: float) -> int:
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+            (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, older_than),
+        )
+        return cursor.rowcount
+
+    def register_worker(self, worker_id: str, info: Dict[str, Any]) -> None:
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO workers (worker_id, info, started_at, last_heartbeat) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET info = excluded.info, last_heartbeat = excluded.last_heartbeat",
+            (worker_id, json.dumps(info), now, now),
+        )
+
+    def unregister_worker(self, worker_id: str) -> None:
+        self._connect().execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def list_workers(self) -> List[Dict[str, Any]]:
+        rows = self._connect().execute("SELECT * FROM workers ORDER BY started_at").fetchall()
+        return [
+            {
+                "worker_id": row["worker_id"],
+                "started_at": row["started_at"],
+                "last_heartbeat": row["last_heartbeat"],
+                **json.loads(row["info"]),
+            }
+            for row in rows
+        ]
+
+
+class JobNotifier:
+    """
+    进程内的新任务通知
+
+    本进程投递任务后唤醒本进程内的 worker（本地执行模式），worker 不必频繁轮询任务队列。
+    其他进程投递的任务和重新投递的任务仍由 worker 轮询领取。
+    """
+
+    def __init__(self):
+        self._events: Set[asyncio.Event] = set()
+
+    def subscribe(self, event: asyncio.Event) -> None:
+        self._events.add(event)
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        self._events.discard(event)
+
+    def notify(self) -> None:
+        """唤醒所有订阅的 worker，只能在事件循环线程中调用"""
+        for event in self._events:
+            event.set()
+
+
+job_notifier = JobNotifier()
+
+
+def new_worker_id() -> str:
+    """生成 worker ID"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    获取配置的任务队列实例
+
+    JOB_QUEUE_BACKEND 为 sqlite 时使用内置的 SQLiteJobQueue，
+    否则按 "模块路径:类名" 加载自定义实现，构造参数与 SQLiteJobQueue 相同。
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            backend = settings.JOB_QUEUE_BACKEND
+            if backend == "sqlite":
+                queue_class = SQLiteJobQueue
+            else:
+                module_name, _, class_name = backend.partition(":")
+                if not class_name:
+                    raise ValueError(f"无效的任务队列后端: {backend}")
+                queue_class = getattr(importlib.import_module(module_name), class_name)
+            _queue = queue_class(settings.JOB_QUEUE_PATH, max_attempts=settings.JOB_MAX_ATTEMPTS)
+        return _queue
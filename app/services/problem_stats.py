@@ -0,0 +1,78 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from app.schemas.code_execution import TestCase
+
+
+class ProblemStatsStore:
+    """
+    按问题统计测试用例的历史失败次数
+
+    测试用例以输入和期望输出的哈希标识，因此同一问题的测试用例顺序变化不影响统计。
+    只在内存中保留最近使用的 max_problems 个问题。
+    """
+
+    def __init__(self, max_problems: int = 10000):
+        self.max_problems = max_problems
+        self._stats: "OrderedDict[str, Dict[str, List[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def case_key(test_case: TestCase) -> str:
+        """计算测试用例的标识"""
+        raw = json.dumps([test_case.input, test_case.expected_output], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _problem(self, problem_id: str) -> Dict[str, List[int]]:
+        stats = self._stats.get(problem_id)
+        if stats is None:
+            stats = self._stats[problem_id] = {}
+            while len(self._stats) > self.max_problems:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(problem_id)
+        return stats
+
+    def record(self, problem_id: str, case_key: str, passed: bool) -> None:
+        """
+        记录一次测试用例的执行结果
+
+        Args:
+            problem_id: 问题ID
+            case_key: 测试用例标识，见 case_key
+            passed: 是否通过
+        """
+        with self._lock:
+            runs_and_failures = self._problem(problem_id).setdefault(case_key, [0, 0])
+            runs_and_failures[0] += 1
+            if not passed:
+                runs_and_failures[1] += 1
+
+    def order(self, problem_id: str, case_keys: List[str]) -> List[int]:
+        """
+        按历史失败次数从多到少排列测试用例
+
+        Args:
+            problem_id: 问题ID
+            case_keys: 各测试用例的标识
+
+        Returns:
+            List[int]: 测试用例下标的执行顺序，失败次数相同时保持原顺序
+        """
+        with self._lock:
+            stats = self._stats.get(problem_id) or {}
+            failures = [stats.get(key, (0, 0))[1] for key in case_keys]
+        return sorted(range(len(case_keys)), key=lambda i: -failures[i])
+
+    def snapshot(self, problem_id: str) -> Dict[str, Dict[str, int]]:
+        """返回问题的统计数据: {测试用例标识: {"runs": 执行次数, "failures": 失败次数}}"""
+        with self._lock:
+            stats = self._stats.get(problem_id) or {}
+            return {key: {"runs": runs, "failures": failures} for key, (runs, failures) in stats.items()}
+
+
+# 全局统计实例
+problem_stats = ProblemStatsStore()
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.schemas.code_execution import Problem, ProblemInfo
+from app.services.dataset_store import Dataset, DatasetStore
+
+
+@dataclass
+class LoadedProblem:
+    """内存中的问题，包含问题信息和内存映射的测试数据"""
+    info: ProblemInfo
+    test_cases: Dataset
+
+
+class ProblemStore:
+    """
+    问题登记
+
+    问题信息保存在 SQLite 数据库中，测试用例以测试数据集的格式保存在 data_dir 目录下（不会被淘汰），
+    内容相同的测试用例在多个问题之间共享同一个文件。
+    最近使用的 max_cached 个问题的信息和测试数据保留在内存中，读取时通过更新时间校验，
+    因此多个 API 进程共享同一个数据库时也能看到最新的问题。
+    创建问题的租户记录为问题的所有者，只有所有者可以替换或删除问题。
+    """
+
+    def __init__(self, path: str, data_dir: str, max_cached: int = 256):
+        self.path = path
+        self.max_cached = max_cached
+        self.datasets = DatasetStore(data_dir, max_bytes=0)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, LoadedProblem]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS problems (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                dataset_id TEXT NOT NULL,
+                test_case_count INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_problems_dataset ON problems (dataset_id);
+            """
+        )
+        columns = {row["name"] for row in self._connect().execute("PRAGMA table_info(problems)")}
+        if "owner" not in columns:
+            # 兼容没有所有者列的旧数据库，已有问题的所有者为空，任何租户都可以修改
+            self._connect().execute("ALTER TABLE problems ADD COLUMN owner TEXT")
+
+    @staticmethod
+    def _check_owner(problem_id: str, row_owner: Optional[str], owner: Optional[str]) -> None:
+        """没有记录所有者的问题和不指定租户的调用不做校验"""
+        if row_owner is not None and owner is not None and row_owner != owner:
+            raise PermissionError(f"问题不属于租户 {owner}: {problem_id}")
+
+    @staticmethod
+    def _row_to_info(row: sqlite3.Row) -> ProblemInfo:
+        return ProblemInfo(
+            **json.loads(row["data"]),
+            dataset_id=row["dataset_id"],
+            test_case_count=row["test_case_count"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            owner=row["owner"],
+        )
+
+    def save(self, problem: Problem, create: bool = False, owner: Optional[str] = None) -> ProblemInfo:
+        """
+        保存问题，已存在时替换
+
+        Args:
+            problem: 问题
+            create: 为 True 时只创建新问题
+            owner: 保存问题的租户，新建的问题记录为其所有者
+
+        Returns:
+            ProblemInfo: 保存后的问题信息
+
+        Raises:
+            ValueError: create 为 True 且问题已存在，或者测试用例无效
+            PermissionError: 问题已存在且属于其他租户
+        """
+        conn = self._connect()
+        # 先检查冲突和所有者再保存测试数据，被拒绝的请求不会在磁盘上留下测试数据
+        existing = conn.execute("SELECT owner FROM problems WHERE id = ?", (problem.id,)).fetchone()
+        if existing is not None and create:
+            raise ValueError(f"问题已存在: {problem.id}")
+        if existing is not None:
+            self._check_owner(problem.id, existing["owner"], owner)
+
+        dataset = self.datasets.put(problem.test_cases)
+        data = json.dumps(problem.model_dump(mode="json", exclude={"test_cases"}))
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT dataset_id, created_at, owner FROM problems WHERE id = ?", (problem.id,)
+            ).fetchone()
+            if row is not None and create:
+                raise ValueError(f"问题已存在: {problem.id}")
+            if row is not None:
+                self._check_owner(problem.id, row["owner"], owner)
+            created_at = row["created_at"] if row else now
+            row_owner = row["owner"] if row is not None and row["owner"] is not None else owner
+            conn.execute(
+                "INSERT OR REPLACE INTO problems (id, data, dataset_id, test_case_count, created_at, updated_at, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (problem.id, data, dataset.id, len(dataset), created_at, now, row_owner),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # 检查之后问题被并发创建或修改时，删除没有问题使用的新测试数据
+            self._release_dataset(dataset.id)
+            raise
+
+        with self._lock:
+            self._cache.pop(problem.id, None)
+        if row is not None and row["dataset_id"] != dataset.id:
+            self._release_dataset(row["dataset_id"])
+        return self.get(problem.id).info
+
+    def get(self, problem_id: str) -> Optional[LoadedProblem]:
+        """
+        获取问题及其测试数据
+
+        Args:
+            problem_id: 问题ID
+
+        Returns:
+            Optional[LoadedProblem]: 问题不存在时返回 None
+        """
+        conn = self._connect()
+        with self._lock:
+            cached = self._cache.get(problem_id)
+        if cached is not None:
+            row = conn.execute("SELECT updated_at FROM problems WHERE id = ?", (problem_id,)).fetchone()
+            if row is not None and row["updated_at"] == cached.info.updated_at:
+                with self._lock:
+                    self._cache.move_to_end(problem_id)
+                return cached
+
+        row = conn.execute("SELECT * FROM problems WHERE id = ?", (problem_id,)).fetchone()
+        if row is None:
+            with self._lock:
+                self._cache.pop(problem_id, None)
+            return None
+
+        info = self._row_to_info(row)
+        loaded = LoadedProblem(info=info, test_cases=self.datasets.open(info.dataset_id))
+        with self._lock:
+            self._cache[problem_id] = loaded
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return loaded
+
+    def list(self, offset: int = 0, limit: int = 100, tag: Optional[str] = None) -> List[ProblemInfo]:
+        """
+        列出问题
+
+        Args:
+            offset: 跳过的问题数
+            limit: 返回的最大问题数
+            tag: 只返回带有该标签的问题
+
+        Returns:
+            List[ProblemInfo]: 按问题ID排序的问题信息
+        """
+        if tag is None:
+            query, params = "SELECT * FROM problems", ()
+        else:
+            query = (
+                "SELECT * FROM problems WHERE EXISTS "
+                "(SELECT 1 FROM json_each(problems.data, '$.tags') WHERE value = ?)"
+            )
+            params = (tag,)
+        rows = self._connect().execute(
+            f"{query} ORDER BY id LIMIT ? OFFSET ?", (*params, limit, offset)
+        ).fetchall()
+        return [self._row_to_info(row) for row in rows]
+
+    def delete(self, problem_id: str, owner: Optional[str] = None) -> bool:
+        """
+        删除问题，没有其他问题使用的测试数据一并删除
+
+        Args:
+            problem_id: 问题ID
+            owner: 删除问题的租户，为 None 时不校验所有者
+
+        Returns:
+            bool: 问题是否存在
+
+        Raises:
+            PermissionError: 问题属于其他租户
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT dataset_id, owner FROM problems WHERE id = ?", (problem_id,)).fetchone()
+        if row is None:
+            return False
+        self._check_owner(problem_id, row["owner"], owner)
+        conn.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
+        with self._lock:
+            self._cache.pop(problem_id, None)
+        self._release_dataset(row["dataset_id"])
+        return True
+
+    def _release_dataset(self, dataset_id: str) -> None:
+        """删除不再被任何问题使用的测试数据"""
+        in_use = self._connect().execute(
+            "SELECT 1 FROM problems WHERE dataset_id = ? LIMIT 1", (dataset_id,)
+        ).fetchone()
+        if in_use is None:
+            self.datasets.delete(dataset_id)
+
+
+# 全局问题登记实例
+problem_store = ProblemStore(settings.PROBLEM_DB_PATH, settings.PROBLEM_DATA_DIR)
@@ -0,0 +1,325 @@
+"""
+执行调度
+
+在本进程内执行的请求先在调度器中排队领取执行槽位，不再先到先执行：
+  - interactive 请求总是先于 batch 请求领取槽位，并且 SCHEDULER_INTERACTIVE_RESERVED 个槽位只留给
+    interactive 请求，批量评测占满其余槽位时交互式请求仍然可以立即执行；
+  - 同一优先级内，租户之间按权重轮转（deficit round robin）领取槽位，一个租户提交大量请求时
+    其他租户仍然按权重比例得到槽位；已达到并发上限（max_concurrency）的租户暂时跳过；
+  - 同一租户内按截止时间从早到晚（没有截止时间的排在最后）、再按到达顺序领取槽位；
+  - 排队期间截止时间已过的请求直接丢弃，不再执行。
+执行槽位只用于运行阶段：提交先在编译池中编译（见 app/executors/stages.py），编译完成后才排队领取执行槽位。
+每个优先级分别统计请求数、丢弃数以及排队时间和执行时间的分位数，提交期间（包括编译）沙箱进程消耗的 CPU 时间
+计入租户。
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import contextlib
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.code_execution import PriorityClass
+from app.services.tenants import Tenant, tenant_registry
+from app.executors.sandbox import measure_cpu_time
+from app.executors.stages import percentiles, run_stage
+
+# 优先级的排序值，越小越先领取执行槽位
+PRIORITY_RANK = {PriorityClass.INTERACTIVE: 0, PriorityClass.BATCH: 1}
+
+
+class DeadlineExceededError(TimeoutError):
+    """截止时间已过，请求未执行"""
+
+    def __init__(self, message: str = "截止时间已过，请求未执行"):
+        super().__init__(message)
+
+
+class _ClassMetrics:
+    """单个优先级的统计"""
+
+    def __init__(self, window: int):
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.queued = 0
+        self.running = 0
+        self.queue_wait: Deque[float] = deque(maxlen=window)
+        self.execution: Deque[float] = deque(maxlen=window)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "queued": self.queued,
+            "running": self.running,
+            "queue_wait_ms": percentiles(self.queue_wait),
+            "execution_ms": percentiles(self.execution),
+        }
+
+
+class _FairQueue:
+    """单个优先级的等待队列，租户之间按权重轮转（deficit round robin），每个请求的开销为 1"""
+
+    def __init__(self):
+        # 各租户等待中的请求：(截止时间, 到达序号, future)
+        self._queues: Dict[str, List[Tuple[float, int, asyncio.Future]]] = {}
+        self._weights: Dict[str, float] = {}
+        self._deficits: Dict[str, float] = {}
+        # 有请求等待的租户，按轮转顺序排列
+        self._rotation: Deque[str] = deque()
+
+    def push(self, tenant: Tenant, deadline: float, sequence: int, future: asyncio.Future) -> None:
+        if tenant.name not in self._queues:
+            self._queues[tenant.name] = []
+            self._deficits[tenant.name] = 0.0
+            self._rotation.append(tenant.name)
+        self._weights[tenant.name] = tenant.weight
+        heapq.heappush(self._queues[tenant.name], (deadline, sequence, future))
+
+    def _prune(self) -> None:
+        """丢弃已因截止时间或取消放弃等待的请求，移除没有请求等待的租户"""
+        for name in list(self._rotation):
+            queue = self._queues[name]
+            while queue and queue[0][2].done():
+                heapq.heappop(queue)
+            if not queue:
+                self._rotation.remove(name)
+                del self._queues[name], self._weights[name], self._deficits[name]
+
+    def ready(self, eligible: Callable[[str], bool]) -> bool:
+        """是否有可以领取槽位的租户在等待"""
+        self._prune()
+        return any(eligible(name) for name in self._rotation)
+
+    def pop(self, eligible: Callable[[str], bool]) -> Tuple[str, asyncio.Future]:
+        """按轮转顺序取出下一个请求，调用前 ready 必须返回 True"""
+        while True:
+            name = self._rotation[0]
+            if eligible(name):
+                if self._deficits[name] >= 1:
+                    self._deficits[name] -= 1
+                    queue = self._queues[name]
+                    _, _, future = heapq.heappop(queue)
+                    if not queue:
+                        # 没有请求等待的租户不保留剩余的额度
+                        self._rotation.popleft()
+                        del self._queues[name], self._weights[name], self._deficits[name]
+                    return name, future
+                self._deficits[name] += self._weights[name]
+            # 不能领取槽位的租户不累积额度
+            self._rotation.rotate(-1)
+
+    def waiting(self) -> Dict[str, int]:
+        """各租户等待中的请求数"""
+        return {
+            name: sum(1 for _, _, future in queue if not future.done()) for name, queue in self._queues.items()
+        }
+
+
+class ExecutionScheduler:
+    """按优先级和截止时间分配执行槽位"""
+
+    def __init__(self, capacity: int = 0, interactive_reserved: Optional[int] = None):
+        """
+        Args:
+            capacity: 同时执行的请求数，默认为 SCHEDULER_CONCURRENCY（0 表示 CPU 核数）
+            interactive_reserved: 只留给 interactive 请求的槽位数，默认为 SCHEDULER_INTERACTIVE_RESERVED，
+                至少为 batch 请求保留一个槽位
+        """
+        self.capacity = capacity or settings.SCHEDULER_CONCURRENCY or os.cpu_count() or 1
+        reserved = settings.SCHEDULER_INTERACTIVE_RESERVED if interactive_reserved is None else interactive_reserved
+        self.interactive_reserved = max(min(reserved, self.capacity - 1), 0)
+        self._running = 0
+        # 各优先级的等待队列，按优先级排序值排列
+        self._queues = {
+            priority: _FairQueue() for priority in sorted(PriorityClass, key=PRIORITY_RANK.__getitem__)
+        }
+        self._sequence = itertools.count()
+        self._metrics = {
+            priority: _ClassMetrics(settings.SCHEDULER_METRICS_WINDOW) for priority in PriorityClass
+        }
+        # 各租户的设置（最近一次请求时的）、正在执行和已完成的请求数
+        self._tenants: Dict[str, Tenant] = {}
+        self._tenant_running: Dict[str, int] = {}
+        self._tenant_completed: Dict[str, int] = {}
+
+    def _admissible(self, priority: PriorityClass) -> bool:
+        if priority == PriorityClass.INTERACTIVE:
+            return self._running < self.capacity
+        return self._running < self.capacity - self.interactive_reserved
+
+    def _eligible(self, name: str) -> bool:
+        """租户是否未达到并发上限"""
+        limit = self._tenants[name].max_concurrency
+        return not limit or self._tenant_running.get(name, 0) < limit
+
+    def _dispatch(self) -> None:
+        """按顺序把空闲槽位分配给等待中的请求"""
+        while True:
+            for priority, queue in self._queues.items():
+                if not queue.ready(self._eligible):
+                    continue
+                if not self._admissible(priority):
+                    # 优先级更低的请求可用的槽位不会更多
+                    return
+                name, future = queue.pop(self._eligible)
+                self._running += 1
+                self._tenant_running[name] = self._tenant_running.get(name, 0) + 1
+                self._metrics[priority].queued -= 1
+                future.set_result(None)
+                break
+            else:
+                return
+
+    def _release(self, name: str) -> None:
+        self._running -= 1
+        self._tenant_running[name] -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        priority: PriorityClass = PriorityClass.INTERACTIVE,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """
+        领取一个执行槽位，退出时释放
+
+        Args:
+            priority: 优先级
+            deadline: 截止时间（Unix 时间戳，秒），None 表示不限制
+            tenant: 租户名，默认为 DEFAULT_TENANT
+
+        Raises:
+            DeadlineExceededError: 领取到槽位之前截止时间已过
+        """
+        priority = PriorityClass(priority)
+        tenant_info = tenant_registry.get(tenant)
+        name = tenant_info.name
+        self._tenants[name] = tenant_info
+        metrics = self._metrics[priority]
+        metrics.submitted += 1
+        enqueued_at = time.time()
+        if deadline is not None and deadline <= enqueued_at:
+            metrics.dropped += 1
+            raise DeadlineExceededError()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].push(
+            tenant_info, deadline if deadline is not None else float("inf"), next(self._sequence), future
+        )
+        metrics.queued += 1
+        self._dispatch()
+        if not future.done():
+            try:
+                timeout = None if deadline is None else deadline - time.time()
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    future.cancel()
+                    metrics.queued -= 1
+                    metrics.dropped += 1
+                    raise DeadlineExceededError()
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # 刚分配到槽位就被取消
+                    self._release(name)
+                else:
+                    future.cancel()
+                    metrics.queued -= 1
+                raise
+
+        started_at = time.time()
+        metrics.queue_wait.append(started_at - enqueued_at)
+        metrics.running += 1
+        try:
+            yield
+        finally:
+            metrics.running -= 1
+            metrics.completed += 1
+            metrics.execution.append(time.time() - started_at)
+            self._tenant_completed[name] = self._tenant_completed.get(name, 0) + 1
+            self._release(name)
+
+    @contextlib.asynccontextmanager
+    async def submission(
+        self,
+        priority: PriorityClass = PriorityClass.INTERACTIVE,
+        deadline: Optional[float] = None,
+        tenant: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """
+        执行一个提交，退出时把提交期间沙箱进程消耗的 CPU 时间计入租户
+
+        编译不占用执行槽位；执行器编译完成后进入运行阶段时（见 app/executors/stages.py 的 enter_run_stage）
+        才领取执行槽位（见 slot），提交结束时释放。编译失败的提交不领取执行槽位。
+
+        Args:
+            priority: 优先级
+            deadline: 截止时间（Unix 时间戳，秒），None 表示不限制
+            tenant: 租户名，默认为 DEFAULT_TENANT
+
+        Raises:
+            DeadlineExceededError: 提交时或领取到执行槽位之前截止时间已过
+        """
+        priority = PriorityClass(priority)
+        name = tenant_registry.get(tenant).name
+        if deadline is not None and deadline <= time.time():
+            metrics = self._metrics[priority]
+            metrics.submitted += 1
+            metrics.dropped += 1
+            raise DeadlineExceededError()
+
+        lock = asyncio.Lock()
+        entered = False
+        async with contextlib.AsyncExitStack() as stack:
+            async def enter() -> None:
+                nonlocal entered
+                async with lock:
+                    if not entered:
+                        await stack.enter_async_context(self.slot(priority, deadline, name))
+                        entered = True
+
+            with measure_cpu_time() as meter:
+                try:
+                    with run_stage(enter):
+                        yield
+                finally:
+                    tenant_registry.charge(name, meter.seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """槽位使用情况、各优先级和各租户的统计"""
+        waiting: Dict[str, int] = {}
+        for queue in self._queues.values():
+            for name, count in queue.waiting().items():
+                waiting[name] = waiting.get(name, 0) + count
+        cpu = tenant_registry.report()
+        tenants = {}
+        for name in sorted(set(self._tenants) | set(cpu)):
+            tenant = self._tenants.get(name) or tenant_registry.get(name)
+            tenants[name] = {
+                "weight": tenant.weight,
+                "max_concurrency": tenant.max_concurrency,
+                "cpu_quota": tenant.cpu_quota,
+                "queued": waiting.get(name, 0),
+                "running": self._tenant_running.get(name, 0),
+                "completed": self._tenant_completed.get(name, 0),
+                "cpu_used": cpu[name]["cpu_used"] if name in cpu else 0.0,
+            }
+        return {
+            "capacity": self.capacity,
+            "interactive_reserved": self.interactive_reserved,
+            "running": self._running,
+            "classes": {priority.value: metrics.report() for priority, metrics in self._metrics.items()},
+            "tenants": tenants,
+        }
+
+
+# 全局调度器实例
+execution_scheduler = ExecutionScheduler()
@@ -0,0 +1,109 @@
+"""
+合并相同的并发请求
+
+强化学习的分组采样中，相同的代码常常在几毫秒内被重复提交，这时还没有任何结果可以复用。
+指纹（语言、代码、测试用例和各项限制）相同的请求在前一个请求执行期间到达时，不再重复执行，
+而是等待同一次执行并共享它的结果。
+
+共享的执行在独立的任务中运行：一个等待者被取消（例如客户端断开连接）或截止时间已到，只会让它自己停止等待，
+只有所有等待者都离开时才取消共享的执行，结束正在运行的沙箱进程。
+"""
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.services.scheduler import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """一次共享的执行"""
+
+    def __init__(self, task: asyncio.Future, deadline: Optional[float]):
+        self.task = task
+        # 共享的执行使用的截止时间，即发起执行的请求的截止时间
+        self.deadline = deadline
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按指纹合并并发的执行"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats: Dict[str, int] = {"executions": 0, "coalesced": 0, "abandoned": 0}
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """
+        计算请求指纹
+
+        Args:
+            parts: 决定执行结果的参数，必须可以 JSON 序列化
+
+        Returns:
+            str: SHA-256 十六进制摘要
+        """
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(
+        self, key: str, factory: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> T:
+        """
+        执行或等待相同指纹的执行
+
+        Args:
+            key: 请求指纹
+            factory: 没有相同指纹的执行时调用，返回执行的协程
+            deadline: 本请求的截止时间（Unix 时间戳，秒），None 表示不限制。发起执行时由 factory 创建的执行负责；
+                等待已有的执行时，早于该执行的截止时间的请求到期后停止等待
+
+        Returns:
+            执行结果，相同指纹的并发请求得到同一个结果对象
+
+        Raises:
+            DeadlineExceededError: 等待已有的执行时本请求的截止时间已到，已有的执行继续为其他等待者运行
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()), deadline)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        timeout = None
+        if deadline is not None and (flight.deadline is None or deadline < flight.deadline):
+            timeout = max(deadline - time.time(), 0)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except asyncio.TimeoutError:
+            if flight.task.done():
+                raise
+            raise DeadlineExceededError() from None
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有等待者都已离开，之后到达的相同请求重新执行
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.stats["abandoned"] += 1
+
+    def report(self) -> Dict[str, int]:
+        """正在执行的共享执行数和累计统计"""
+        return {"inflight": len(self._flights), **self.stats}
+
+
+# 全局实例
+single_flight = SingleFlight()
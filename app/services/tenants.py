@@ -0,0 +1,173 @@
+"""
+租户
+
+请求按 Authorization: Bearer <api_key> 请求头中的 API 密钥（见 API_KEYS）识别所属租户。调度器在租户之间按权重
+公平分配执行槽位（见 app/services/scheduler.py 和任务队列的 claim），并可以限制每个租户同时执行的请求数，
+以及在 TENANT_CPU_QUOTA_WINDOW 内消耗的 CPU 时间。
+
+CPU 时间为沙箱进程实际消耗的用户态和内核态 CPU 时间（见 app/executors/sandbox.py 的 measure_cpu_time）。
+本地执行模式下由本进程统计；分布式执行模式下由 worker 随任务结果写入任务队列，按所有 worker 的合计统计。
+"""
+import hmac
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class AuthenticationError(PermissionError):
+    """API 密钥缺失或无效"""
+
+
+class QuotaExceededError(RuntimeError):
+    """租户的 CPU 时间配额已用尽，请求未执行"""
+
+    def __init__(self, message: str = "租户的 CPU 时间配额已用尽，请求未执行"):
+        super().__init__(message)
+
+
+@dataclass
+class Tenant:
+    """租户及其调度设置"""
+    name: str
+    # 公平调度的权重
+    weight: float = 1.0
+    # 同时执行的请求数上限，0 表示不限制
+    max_concurrency: int = 0
+    # TENANT_CPU_QUOTA_WINDOW 内可以消耗的 CPU 时间（秒），0 表示不限制
+    cpu_quota: float = 0.0
+
+
+class TenantRegistry:
+    """租户设置的查询、API 密钥校验和本进程内的 CPU 时间统计"""
+
+    def __init__(self):
+        # 各租户最近的 (时间戳, CPU 时间) 记录和窗口内的合计
+        self._usage: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: Optional[str] = None) -> Tenant:
+        """
+        获取租户设置，TENANTS 中没有登记的租户使用默认设置
+
+        Args:
+            name: 租户名，默认为 DEFAULT_TENANT
+        """
+        name = name or settings.DEFAULT_TENANT
+        options = settings.TENANTS.get(name, {})
+        weight = float(options.get("weight", 1.0))
+        return Tenant(
+            name=name,
+            weight=weight if weight > 0 else 1.0,
+            max_concurrency=int(options.get("max_concurrency", 0)),
+            cpu_quota=float(options.get("cpu_quota", 0.0)),
+        )
+
+    def authenticate(self, authorization: Optional[str]) -> Tenant:
+        """
+        按 Authorization 请求头确定请求所属的租户
+
+        没有配置 API_KEYS 时不校验，所有请求属于 DEFAULT_TENANT。
+
+        Args:
+            authorization: Authorization 请求头，格式为 "Bearer <api_key>"
+
+        Returns:
+            Tenant: 请求所属的租户
+
+        Raises:
+            AuthenticationError: API 密钥无效，或者 REQUIRE_API_KEY 开启时没有提供 API 密钥
+        """
+        if not settings.API_KEYS:
+            return self.get()
+        if not authorization:
+            if settings.REQUIRE_API_KEY:
+                raise AuthenticationError("缺少 API 密钥")
+            return self.get()
+
+        scheme, _, api_key = authorization.partition(" ")
+        api_key = api_key.strip()
+        if scheme.lower() == "bearer" and api_key:
+            # 逐个比较全部密钥，比较时间与密钥内容无关
+            matched = None
+            for key, name in settings.API_KEYS.items():
+                if hmac.compare_digest(key.encode(), api_key.encode()):
+                    matched = name
+            if matched is not None:
+                return self.get(matched)
+        raise AuthenticationError("无效的 API 密钥")
+
+    def _trim(self, name: str, now: float) -> None:
+        """丢弃滑动窗口之外的记录"""
+        usage = self._usage.get(name)
+        if usage is None:
+            return
+        cutoff = now - settings.TENANT_CPU_QUOTA_WINDOW
+        while usage and usage[0][0] < cutoff:
+            self._totals[name] -= usage.popleft()[1]
+        if not usage:
+            del self._usage[name]
+            del self._totals[name]
+
+    def charge(self, name: str, seconds: float) -> None:
+        """
+        记录租户消耗的 CPU 时间
+
+        Args:
+            name: 租户名
+            seconds: CPU 时间（秒）
+        """
+        if seconds <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._usage.setdefault(name, deque()).append((now, seconds))
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+            self._trim(name, now)
+
+    def cpu_used(self, name: str) -> float:
+        """租户在 TENANT_CPU_QUOTA_WINDOW 内于本进程消耗的 CPU 时间（秒）"""
+        with self._lock:
+            self._trim(name, time.time())
+            return max(self._totals.get(name, 0.0), 0.0)
+
+    @staticmethod
+    def check_quota(tenant: Tenant, used: float) -> None:
+        """
+        检查 CPU 时间配额
+
+        Args:
+            tenant: 租户
+            used: 租户在 TENANT_CPU_QUOTA_WINDOW 内已消耗的 CPU 时间（秒）
+
+        Raises:
+            QuotaExceededError: 配额已用尽
+        """
+        if tenant.cpu_quota and used >= tenant.cpu_quota:
+            raise QuotaExceededError(
+                f"租户 {tenant.name} 最近 {settings.TENANT_CPU_QUOTA_WINDOW:g} 秒内已消耗 {used:.1f} 秒 CPU 时间，"
+                f"超过配额 {tenant.cpu_quota:g} 秒，请求未执行"
+            )
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """已登记或在本进程内消耗过 CPU 时间的租户的设置和 CPU 时间"""
+        with self._lock:
+            names = set(settings.TENANTS) | set(self._usage)
+        report = {}
+        for name in sorted(names):
+            tenant = self.get(name)
+            report[name] = {
+                "weight": tenant.weight,
+                "max_concurrency": tenant.max_concurrency,
+                "cpu_quota": tenant.cpu_quota,
+                "cpu_used": self.cpu_used(name),
+            }
+        return report
+
+
+# 全局租户实例
+tenant_registry = TenantRegistry()
@@ -0,0 +1,109 @@
+"""
+工具链预热
+
+启动时并行探测每个语言执行器的工具链版本，并编译运行一次最小程序，
+让编译器、运行时和编译缓存在接收流量前进入热状态。/ready 根据预热结果报告节点是否就绪。
+"""
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStatus:
+    """单个语言的预热状态"""
+    PENDING = "pending"
+    WARMING = "warming"
+    READY = "ready"
+    # 工具链不存在或无法运行
+    UNAVAILABLE = "unavailable"
+    # 工具链存在，但预热程序编译或运行失败、超时
+    FAILED = "failed"
+
+    FINISHED = (READY, UNAVAILABLE, FAILED)
+
+
+class WarmupTracker:
+    """
+    预热进度
+
+    所有语言的预热结束后节点就绪；READY_REQUIRED_LANGUAGES 中的语言必须预热成功，
+    否则节点一直不就绪。
+    """
+
+    def __init__(self):
+        self.languages: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.finished_at is None:
+            return False
+        return all(
+            self.languages.get(language, {}).get("status") == WarmupStatus.READY
+            for language in settings.READY_REQUIRED_LANGUAGES
+        )
+
+    def skip(self) -> None:
+        """不预热，直接标记为就绪"""
+        self.started_at = self.finished_at = time.time()
+
+    async def run(self, executors: Dict[Any, Any]) -> None:
+        """
+        并行预热所有执行器
+
+        Args:
+            executors: 编程语言到执行器的映射
+        """
+        self.started_at = time.time()
+        self.finished_at = None
+        for language in executors:
+            self.languages[language.value] = {"status": WarmupStatus.PENDING}
+        await asyncio.gather(*(
+            self._warmup(language.value, executor) for language, executor in executors.items()
+        ))
+        self.finished_at = time.time()
+        logger.info(
+            "工具链预热完成，耗时 %.1f 秒: %s",
+            self.finished_at - self.started_at,
+            {language: state["status"] for language, state in self.languages.items()}
+        )
+
+    async def _warmup(self, language: str, executor) -> None:
+        state = self.languages[language]
+        state["status"] = WarmupStatus.WARMING
+        start_time = time.time()
+        try:
+            result = await asyncio.wait_for(executor.warmup(), timeout=settings.WARMUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            result = {"available": True, "error": f"预热超过 {settings.WARMUP_TIMEOUT} 秒"}
+        except Exception as exc:
+            logger.exception("预热 %s 失败", language)
+            result = {"available": True, "error": str(exc)}
+
+        state.update(result)
+        state["total_time"] = (time.time() - start_time) * 1000
+        if not result.get("available"):
+            state["status"] = WarmupStatus.UNAVAILABLE
+        elif result.get("error"):
+            state["status"] = WarmupStatus.FAILED
+        else:
+            state["status"] = WarmupStatus.READY
+
+    def report(self) -> Dict[str, Any]:
+        """就绪状态和各语言的预热结果"""
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "languages": self.languages,
+        }
+
+
+# 全局预热进度实例
+warmup_tracker = WarmupTracker()
@@ -1,25 +1,49 @@
 import os
-from typing import Dict, List, Any, Optional
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 
 try:
     from app.schemas.code_execution import ProgrammingLanguage, TestCase
+    from app.utils import comparators
 except ImportError:
     # 当在app目录下运行时，使用相对导入
     from ..schemas.code_execution import ProgrammingLanguage, TestCase
+    from . import comparators
+
+# 比较器源码，嵌入测试代码后在执行用户代码的进程内完成输出比较
+COMPARATOR_SOURCE = Path(comparators.__file__).read_text(encoding="utf-8")
+
+# 渲染测试代码时代替用户代码的占位符，用于拆分出用户代码前后的部分
+USER_CODE_PLACEHOLDER = "# __CODE_RUNNER_USER_CODE__"
 
 
 class CodeGenerator:
     """代码生成器，用于生成各种语言的测试代码"""
     
+    # 所有实例共享模板环境，模板只编译一次
+    _env: Optional[Environment] = None
+    # 测试数据来自数据集时，测试代码中用户代码之外的部分只与渲染参数有关，
+    # 按渲染参数缓存预先渲染的 (前缀, 后缀)
+    _harness_cache: "OrderedDict[tuple, Tuple[str, str]]" = OrderedDict()
+    _harness_cache_size = 256
+    _harness_cache_stats = {"hits": 0, "misses": 0}
+    _lock = threading.Lock()
+    
     def __init__(self):
-        # 获取模板目录
-        template_dir = Path(__file__).parent.parent / "templates"
-        self.env = Environment(loader=FileSystemLoader(template_dir))
-        
-        # 注册自定义过滤器
-        self.env.filters['tojson'] = self._to_json
+        with CodeGenerator._lock:
+            if CodeGenerator._env is None:
+                # 获取模板目录
+                template_dir = Path(__file__).parent.parent / "templates"
+                env = Environment(loader=FileSystemLoader(template_dir))
+                
+                # 注册自定义过滤器
+                env.filters['tojson'] = self._to_json
+                CodeGenerator._env = env
+        self.env = CodeGenerator._env
     
     def _to_json(self, value):
         """将值转换为JSON字符串，处理特殊字符"""
@@ -30,15 +54,34 @@ class CodeGenerator:
         self, 
         user_code: str, 
         language: ProgrammingLanguage, 
-        test_cases: List[TestCase]
+        test_cases: List[TestCase],
+        stop_on_first_failure: bool = False,
+        time_limit: float = 5.0,
+        comparator: str = "exact",
+        comparator_options: Optional[Dict[str, Any]] = None,
+        output_echo_limit: int = 65536,
+        dataset: bool = False,
+        profile_interval: Optional[float] = None,
+        profile_max_overhead: float = 0.05
     ) -> str:
         """
         生成测试代码
         
+        时间预算、数据集文件路径和执行顺序每次运行都不同，不参与渲染，运行时通过 harness_input 生成的
+        标准输入传给测试代码，因此同一问题的测试代码（数据集模式下除用户代码外的部分）可以缓存。
+        
         Args:
             user_code: 用户代码
             language: 编程语言
-            test_cases: 测试用例列表
+            test_cases: 测试用例列表（按执行顺序排列）
+            stop_on_first_failure: 是否在第一个测试用例失败后停止执行
+            time_limit: 单个测试用例的时间限制（秒）
+            comparator: 输出比较器名称
+            comparator_options: 比较器参数
+            output_echo_limit: 未通过的测试用例返回实际输出的最大长度（JSON 字符数），超过时只返回差异摘要
+            dataset: 为 True 时测试代码通过内存映射读取运行时传入的数据集文件，忽略 test_cases
+            profile_interval: 性能分析的采样间隔（CPU 时间，秒），None 表示不进行性能分析；只有 Python 模板支持
+            profile_max_overhead: 单次采样的耗时与采样间隔之比的上限，超过时加大采样间隔
             
         Returns:
             str: 生成的测试代码
@@ -51,16 +94,96 @@ class CodeGenerator:
         except Exception as exc:
             raise ValueError(f"不支持的编程语言模板: {language.value}, 错误: {str(exc)}")
 
+        render_options = dict(
+            dataset=dataset,
+            stop_on_first_failure=stop_on_first_failure,
+            time_limit=time_limit,
+            comparator=comparator,
+            comparator_options=comparator_options or {},
+            comparator_source=COMPARATOR_SOURCE,
+            output_echo_limit=output_echo_limit,
+            profile_interval=profile_interval,
+            profile_max_overhead=profile_max_overhead
+        )
+        
+        if dataset:
+            # 测试用例不内联在测试代码中，复用预先渲染的前缀和后缀
+            prefix, suffix = self._render_harness(template_name, render_options)
+            return prefix + user_code + suffix
+        
         # 渲染模板
         test_code = template.render(
             user_code=user_code,
-            test_cases=test_cases
+            test_cases=[
+                {"input": tc.input, "expected_output": tc.expected_output}
+                for tc in test_cases
+            ],
+            **render_options
         )
         
         # 打印生成的测试代码用于调试
 
         return test_code
     
+    @staticmethod
+    def harness_input(
+        time_budget: float,
+        dataset_path: Optional[str] = None,
+        case_indices: Optional[List[int]] = None
+    ) -> bytes:
+        """
+        生成测试代码的标准输入，即每次运行不同的参数
+
+        Args:
+            time_budget: 全部测试用例的时间预算（秒）
+            dataset_path: 测试数据集文件路径，generate_test_code 指定 dataset 时必须提供
+            case_indices: 数据集中测试用例的执行顺序
+
+        Returns:
+            bytes: 一行 JSON
+        """
+        options: Dict[str, Any] = {"time_budget": time_budget}
+        if dataset_path is not None:
+            options["dataset_path"] = dataset_path
+            options["case_indices"] = case_indices or []
+        return json.dumps(options).encode() + b"\n"
+    
+    def _render_harness(self, template_name: str, render_options: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        渲染测试代码中用户代码之外的部分
+        
+        Args:
+            template_name: 模板名称
+            render_options: 除用户代码和测试用例外的渲染参数
+            
+        Returns:
+            Tuple[str, str]: (用户代码之前的部分, 用户代码之后的部分)
+        """
+        key = (template_name, json.dumps(
+            {name: value for name, value in render_options.items() if name != "comparator_source"},
+            sort_keys=True,
+            default=str
+        ))
+        with CodeGenerator._lock:
+            cached = CodeGenerator._harness_cache.get(key)
+            if cached is not None:
+                CodeGenerator._harness_cache.move_to_end(key)
+                CodeGenerator._harness_cache_stats["hits"] += 1
+                return cached
+            CodeGenerator._harness_cache_stats["misses"] += 1
+        
+        rendered = self.env.get_template(template_name).render(
+            user_code=USER_CODE_PLACEHOLDER,
+            test_cases=[],
+            **render_options
+        )
+        prefix, suffix = rendered.split(USER_CODE_PLACEHOLDER, 1)
+        with CodeGenerator._lock:
+            CodeGenerator._harness_cache[key] = (prefix, suffix)
+            while len(CodeGenerator._harness_cache) > CodeGenerator._harness_cache_size:
+                CodeGenerator._harness_cache.popitem(last=False)
+        return prefix, suffix
+    
     def wrap_user_code(self, user_code: str, language: ProgrammingLanguage, test_input: Any) -> str:
         """
         包装用户代码，使其能够接收输入并输出结果
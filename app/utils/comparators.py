@@ -0,0 +1,247 @@
+"""
+输出比较器
+
+提供 exact、whitespace、float、unordered、token 五种比较方式。
+本模块只依赖标准库（numpy 可选），源码会被嵌入到测试代码中，在执行用户代码的进程内完成比较，
+因此不能导入 app 包中的其他模块。
+"""
+import re
+import json
+import math
+from collections import Counter
+from itertools import zip_longest
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# 差异摘要中单个值的最大长度
+EXCERPT_LENGTH = 80
+
+_TOKEN_PATTERN = re.compile(r"\S+")
+
+
+def _excerpt(value: Any) -> str:
+    """生成单个值的简短摘要"""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) > EXCERPT_LENGTH:
+        text = text[:EXCERPT_LENGTH] + "..."
+    return repr(text) if isinstance(value, str) else text
+
+
+def _iter_tokens(text: str) -> Iterator[str]:
+    """逐个产生以空白分隔的词，不构建中间列表"""
+    for match in _TOKEN_PATTERN.finditer(text):
+        yield match.group()
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """逐行产生去掉行尾空白的内容，忽略首尾的空白"""
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    while start < end:
+        newline = text.find("\n", start, end)
+        if newline < 0:
+            newline = end
+        yield text[start:newline].rstrip()
+        start = newline + 1
+
+
+def compare_exact(actual: Any, expected: Any, **options) -> Tuple[bool, Optional[str]]:
+    """严格相等比较"""
+    if actual == expected:
+        return True, None
+    if isinstance(actual, str) and isinstance(expected, str):
+        # 指出第一个不同字符的位置
+        position = next(
+            (i for i, (a, e) in enumerate(zip(actual, expected)) if a != e),
+            min(len(actual), len(expected))
+        )
+        return False, (
+            f"第 {position + 1} 个字符不同: 期望 {_excerpt(expected[position:])}，"
+            f"实际 {_excerpt(actual[position:])}"
+        )
+    return False, f"期望 {_excerpt(expected)}，实际 {_excerpt(actual)}"
+
+
+def compare_whitespace(actual: Any, expected: Any, **options) -> Tuple[bool, Optional[str]]:
+    """逐行比较，忽略行尾空白、换行符差异和首尾空行"""
+    if not isinstance(actual, str) or not isinstance(expected, str):
+        return compare_exact(actual, expected)
+    for number, (a, e) in enumerate(zip_longest(_iter_lines(actual), _iter_lines(expected)), 1):
+        if a != e:
+            if e is None:
+                return False, f"第 {number} 行多余: 实际 {_excerpt(a)}"
+            if a is None:
+                return False, f"第 {number} 行缺失: 期望 {_excerpt(e)}"
+            return False, f"第 {number} 行不同: 期望 {_excerpt(e)}，实际 {_excerpt(a)}"
+    return True, None
+
+
+def compare_tokens(actual: Any, expected: Any, **options) -> Tuple[bool, Optional[str]]:
+    """按空白分词后逐词比较，忽略所有空白差异"""
+    if not isinstance(actual, str) or not isinstance(expected, str):
+        return compare_exact(actual, expected)
+    for number, (a, e) in enumerate(zip_longest(_iter_tokens(actual), _iter_tokens(expected)), 1):
+        if a != e:
+            if e is None:
+                return False, f"第 {number} 个词多余: 实际 {_excerpt(a)}"
+            if a is None:
+                return False, f"第 {number} 个词缺失: 期望 {_excerpt(e)}"
+            return False, f"第 {number} 个词不同: 期望 {_excerpt(e)}，实际 {_excerpt(a)}"
+    return True, None
+
+
+def _close(a: float, e: float, rel_tol: float, abs_tol: float) -> bool:
+    return math.isclose(a, e, rel_tol=rel_tol, abs_tol=abs_tol) or (math.isnan(a) and math.isnan(e))
+
+
+def _to_float(token: str) -> Optional[float]:
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def _compare_float_values(actual: Any, expected: Any, rel_tol: float, abs_tol: float) -> bool:
+    """递归比较结构化数据中的数值"""
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return actual == expected
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return _close(float(actual), float(expected), rel_tol, abs_tol)
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        return len(actual) == len(expected) and all(
+            _compare_float_values(a, e, rel_tol, abs_tol) for a, e in zip(actual, expected)
+        )
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return actual.keys() == expected.keys() and all(
+            _compare_float_values(actual[k], expected[k], rel_tol, abs_tol) for k in expected
+        )
+    return actual == expected
+
+
+def compare_float(
+    actual: Any,
+    expected: Any,
+    rel_tol: float = 1e-6,
+    abs_tol: float = 1e-6,
+    **options
+) -> Tuple[bool, Optional[str]]:
+    """
+    数值容差比较
+
+    文本输出按空白分词，数值词按容差比较，其余词严格比较；结构化数据递归比较其中的数值。
+    安装了 numpy 且输出全部为数值时使用向量化比较。
+    """
+    if not isinstance(actual, str) or not isinstance(expected, str):
+        if _compare_float_values(actual, expected, rel_tol, abs_tol):
+            return True, None
+        return False, f"期望 {_excerpt(expected)}，实际 {_excerpt(actual)}（容差 rel={rel_tol}, abs={abs_tol}）"
+
+    if numpy is not None:
+        try:
+            actual_values = numpy.array(actual.split(), dtype=numpy.float64)
+            expected_values = numpy.array(expected.split(), dtype=numpy.float64)
+        except ValueError:
+            # 含有非数值的词，退回逐词比较
+            pass
+        else:
+            if actual_values.shape != expected_values.shape:
+                return False, f"数值个数不同: 期望 {expected_values.size} 个，实际 {actual_values.size} 个"
+            close = numpy.isclose(actual_values, expected_values, rtol=rel_tol, atol=abs_tol, equal_nan=True)
+            # numpy.isclose 的相对容差只基于期望值，补充以较大值为基准的判断
+            close |= numpy.abs(actual_values - expected_values) <= rel_tol * numpy.maximum(
+                numpy.abs(actual_values), numpy.abs(expected_values)
+            )
+            if close.all():
+                return True, None
+            index = int(numpy.argmin(close))
+            return False, (
+                f"第 {index + 1} 个数值不同: 期望 {expected_values[index]!r}，实际 {actual_values[index]!r}"
+                f"（容差 rel={rel_tol}, abs={abs_tol}）"
+            )
+
+    for number, (a, e) in enumerate(zip_longest(_iter_tokens(actual), _iter_tokens(expected)), 1):
+        if a == e:
+            continue
+        if a is not None and e is not None:
+            a_value, e_value = _to_float(a), _to_float(e)
+            if a_value is not None and e_value is not None and _close(a_value, e_value, rel_tol, abs_tol):
+                continue
+        return False, f"第 {number} 个词不同: 期望 {_excerpt(e)}，实际 {_excerpt(a)}（容差 rel={rel_tol}, abs={abs_tol}）"
+    return True, None
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def compare_unordered(actual: Any, expected: Any, **options) -> Tuple[bool, Optional[str]]:
+    """
+    无序比较
+
+    列表按多重集合比较元素；文本输出按多重集合比较各行（忽略行尾空白）。
+    """
+    if isinstance(actual, str) and isinstance(expected, str):
+        actual_items = Counter(_iter_lines(actual))
+        expected_items = Counter(_iter_lines(expected))
+    elif isinstance(actual, (list, tuple)) and isinstance(expected, (list, tuple)):
+        try:
+            # 元素可以排序时直接比较排序结果，与 == 的语义保持一致（例如 1 == 1.0）
+            if sorted(actual) == sorted(expected):
+                return True, None
+        except TypeError:
+            pass
+        actual_items = Counter(_canonical(item) for item in actual)
+        expected_items = Counter(_canonical(item) for item in expected)
+    else:
+        return compare_exact(actual, expected)
+
+    if actual_items == expected_items:
+        return True, None
+    missing = expected_items - actual_items
+    extra = actual_items - expected_items
+    parts = []
+    if missing:
+        parts.append(f"缺少 {sum(missing.values())} 项，例如 {_excerpt(next(iter(missing)))}")
+    if extra:
+        parts.append(f"多出 {sum(extra.values())} 项，例如 {_excerpt(next(iter(extra)))}")
+    return False, "；".join(parts)
+
+
+COMPARATORS = {
+    "exact": compare_exact,
+    "whitespace": compare_whitespace,
+    "float": compare_float,
+    "unordered": compare_unordered,
+    "token": compare_tokens,
+}
+
+
+def compare(
+    actual: Any,
+    expected: Any,
+    comparator: str = "exact",
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    比较实际输出和期望输出
+
+    Args:
+        actual: 实际输出
+        expected: 期望输出
+        comparator: 比较器名称
+        options: 比较器参数，例如 float 比较器的 rel_tol 和 abs_tol
+
+    Returns:
+        Tuple[bool, Optional[str]]: (是否通过, 不通过时的差异摘要)
+
+    Raises:
+        ValueError: 未知的比较器
+    """
+    function = COMPARATORS.get(comparator)
+    if function is None:
+        raise ValueError(f"未知的比较器: {comparator}")
+    return function(actual, expected, **(options or {}))
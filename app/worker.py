@@ -0,0 +1,236 @@
+"""
+代码执行 worker
+
+从任务队列领取执行任务，在本机执行后上报结果。用于 API 节点与执行节点分离部署：
+
+    EXECUTION_MODE=distributed uvicorn app.main:app
+    python -m app.worker --concurrency 8
+"""
+import os
+import time
+import socket
+import asyncio
+import argparse
+import logging
+import traceback
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.services.job_queue import DEADLINE_EXCEEDED_ERROR, Job, JobQueue, get_job_queue, job_notifier, new_worker_id
+from app.services.scheduler import DeadlineExceededError, execution_scheduler
+from app.services.code_execution_service import CodeExecutionService
+from app.services.warmup import warmup_tracker
+from app.services.calibration import speed_calibrator
+from app.executors.sandbox import measure_cpu_time, sandbox_registry
+from app.executors.stages import compile_pool
+from app.executors.affinity import core_allocator
+
+logger = logging.getLogger(__name__)
+
+# 任务参数无效等重新执行也不会成功的错误，其他错误（执行器崩溃、进程启动失败等）重新入队，
+# 由其他 worker 或稍后重试，超过 JOB_MAX_ATTEMPTS 次后任务失败
+PERMANENT_ERRORS = (ValueError, LookupError, TypeError)
+
+
+class ExecutionWorker:
+    """
+    执行 worker，并发处理任务队列中的任务
+
+    只有一个领取循环访问任务队列，有空闲执行槽位时领取任务交给槽位执行；没有任务时等待本进程投递任务的通知
+    （见 JobNotifier）或下一次轮询。
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = 0, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.worker_id = worker_id or new_worker_id()
+        self._active: Set[str] = set()
+        self._stopping: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """停止领取新任务，已领取的任务会执行完毕"""
+        if self._stopping is not None:
+            self._stopping.set()
+            self._wakeup.set()
+
+    async def run(self, embedded: bool = False) -> None:
+        """
+        运行 worker 直到 stop 被调用
+
+        Args:
+            embedded: 是否在 API 进程内运行（本地执行模式下执行异步任务），此时 CPU 绑定、沙箱清理、预热和校准
+                由 API 进程负责，worker 只领取和执行任务
+        """
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        background = []
+        if not embedded:
+            core_allocator.pin_current_process()
+        await self._report_heartbeat()
+        background.append(asyncio.create_task(self._heartbeat_loop()))
+        if not embedded:
+            background.append(asyncio.create_task(sandbox_registry.run_sweeper()))
+            # 预热工具链后再领取任务
+            await CodeExecutionService.warmup(force_local=True)
+            background.append(asyncio.create_task(CodeExecutionService.run_calibration(force_local=True)))
+        # 本进程提交的任务直接唤醒领取循环，API 进程内的 worker 只需低频轮询重新投递的任务
+        poll_interval = settings.JOB_IDLE_POLL_INTERVAL if embedded else settings.JOB_POLL_INTERVAL
+        job_notifier.subscribe(self._wakeup)
+        logger.info("worker %s 已启动，并发数 %d", self.worker_id, self.concurrency)
+        try:
+            await self._claim_loop(poll_interval)
+            await asyncio.gather(*self._running)
+        finally:
+            job_notifier.unsubscribe(self._wakeup)
+            for task in list(self._running) + background:
+                task.cancel()
+            await asyncio.to_thread(self.queue.unregister_worker, self.worker_id)
+            logger.info("worker %s 已停止", self.worker_id)
+
+    async def _report_heartbeat(self) -> None:
+        await asyncio.to_thread(self.queue.register_worker, self.worker_id, {
+            "hostname": socket.gethostname(),
+            "pid": os.getpid(),
+            "concurrency": self.concurrency,
+            "active_jobs": len(self._active),
+            "ready": warmup_tracker.ready,
+            "sandbox": sandbox_registry.report(),
+            "cpu_pinning": core_allocator.report(),
+            "calibration": speed_calibrator.report(),
+            "scheduler": execution_scheduler.report(),
+            "compile": compile_pool.report(),
+        })
+
+    async def _heartbeat_loop(self) -> None:
+        last_purge = time.time()
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+            try:
+                await self._report_heartbeat()
+                # 定期清理过期的已完成任务，保留统计租户 CPU 时间配额所需的任务
+                retention = max(settings.JOB_RETENTION, settings.TENANT_CPU_QUOTA_WINDOW)
+                if time.time() - last_purge >= settings.JOB_RETENTION:
+                    last_purge = time.time()
+                    await asyncio.to_thread(self.queue.purge, last_purge - retention)
+            except Exception:
+                logger.exception("上报 worker 心跳失败")
+
+    async def _claim_loop(self, poll_interval: float) -> None:
+        """
+        有空闲执行槽位时领取任务，每个任务在单独的 asyncio 任务中执行，执行结束后释放槽位
+
+        Args:
+            poll_interval: 没有任务时轮询任务队列的间隔（秒）
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping.is_set():
+            await slots.acquire()
+            if self._stopping.is_set():
+                slots.release()
+                break
+            # 先清除通知再领取，领取期间投递的任务会让下面的等待立即返回
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(
+                    self.queue.claim, self.worker_id, settings.JOB_VISIBILITY_TIMEOUT
+                )
+            except Exception:
+                logger.exception("领取任务失败")
+                job = None
+
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._process(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _process(self, job: Job) -> None:
+        """
+        执行单个任务，执行期间定期续约，结果和消耗的 CPU 时间一起上报；任务被取消或租约丢失时停止执行
+
+        每条结束路径都上报消耗的 CPU 时间。参数无效的任务直接失败，其他异常视为暂时性错误，任务重新入队。
+        """
+        self._active.add(job.id)
+        lease: Dict[str, bool] = {"lost": False}
+        lease_task = None
+        try:
+            with measure_cpu_time() as meter:
+                execution = asyncio.create_task(CodeExecutionService.handle_job(job.kind, job.payload))
+                lease_task = asyncio.create_task(self._keep_lease(job, execution, lease))
+                result = await execution
+        except asyncio.CancelledError:
+            if not lease["lost"]:
+                raise
+            # 沙箱进程已随执行一起结束，任务的状态由取消者或接管的 worker 决定，只补记消耗的 CPU 时间
+            logger.info("任务 %s 已停止执行", job.id)
+            await asyncio.to_thread(self.queue.add_cpu_time, job.id, meter.seconds)
+        except DeadlineExceededError:
+            await asyncio.to_thread(
+                self.queue.fail, job.id, self.worker_id, DEADLINE_EXCEEDED_ERROR, cpu_time=meter.seconds
+            )
+        except Exception as exc:
+            retry = not isinstance(exc, PERMANENT_ERRORS)
+            logger.exception("任务 %s 执行失败%s", job.id, "，重新入队" if retry else "")
+            await asyncio.to_thread(
+                self.queue.fail, job.id, self.worker_id, f"{exc}\n{traceback.format_exc()}",
+                retry=retry, cpu_time=meter.seconds
+            )
+        else:
+            if not await asyncio.to_thread(self.queue.complete, job.id, self.worker_id, result, meter.seconds):
+                logger.warning("任务 %s 的租约已丢失，结果被丢弃", job.id)
+        finally:
+            if lease_task is not None:
+                lease_task.cancel()
+            self._active.discard(job.id)
+
+    async def _keep_lease(self, job: Job, execution: asyncio.Task, lease: Dict[str, bool]) -> None:
+        """
+        定期续约任务，续约失败（任务已被取消或被其他 worker 接管）时停止执行
+
+        Args:
+            job: 任务
+            execution: 执行任务的 asyncio 任务
+            lease: 续约失败时 lost 被设为 True
+        """
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+            try:
+                alive = await asyncio.to_thread(
+                    self.queue.heartbeat, job.id, self.worker_id, settings.JOB_VISIBILITY_TIMEOUT
+                )
+            except Exception:
+                logger.exception("任务 %s 续约失败", job.id)
+                continue
+            if not alive:
+                logger.warning("任务 %s 已被取消或已被其他 worker 接管，停止执行", job.id)
+                lease["lost"] = True
+                execution.cancel()
+                return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="代码执行 worker")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+                        help="并发任务数，默认使用 CPU 核数")
+    parser.add_argument("--worker-id", default=None, help="worker ID，默认自动生成")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = ExecutionWorker(get_job_queue(), concurrency=args.concurrency, worker_id=args.worker_id)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
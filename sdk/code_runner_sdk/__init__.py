@@ -12,12 +12,32 @@ from .core.config import CodeRunnerConfig
 from .models.code_execution import (
     CodeExecutionRequest,
     CodeExecutionResponse,
-    ProgrammingLanguage
+    ProgrammingLanguage,
+    TestCase,
+    TestCaseType,
+    ComparatorType,
+    ResponseDetail,
+    CompileProfile,
+    PriorityClass,
+    DatasetInfo,
+    JobStatus,
+    JobInfo,
+    ProfileReport
 )
 
 __all__ = [
     'CodeRunnerClient',
     'CodeExecutionRequest',
     'CodeExecutionResponse',
-    'ProgrammingLanguage'
+    'ProgrammingLanguage',
+    'TestCase',
+    'TestCaseType',
+    'ComparatorType',
+    'ResponseDetail',
+    'CompileProfile',
+    'PriorityClass',
+    'DatasetInfo',
+    'JobStatus',
+    'JobInfo',
+    'ProfileReport'
 ] 
\ No newline at end of file
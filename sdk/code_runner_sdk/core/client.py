@@ -1,6 +1,8 @@
 """
 Code Runner SDK主客户端模块
 """
+import time
+from dataclasses import asdict
 from typing import Optional, List, Dict, Any
 
 from .config import CodeRunnerConfig
@@ -11,9 +13,20 @@ from ..models.code_execution import (
     ProgrammingLanguage,
     TestCase,
     TestResult,
-    ExecutionStatus
+    ExecutionStatus,
+    ComparatorType,
+    ResponseDetail,
+    CompileProfile,
+    PriorityClass,
+    TestCaseType,
+    DatasetInfo,
+    JobStatus,
+    JobInfo,
+    ProfileFunction,
+    ProfileLine,
+    ProfileReport
 )
-from ..exceptions import ValidationError
+from ..exceptions import APIError, TimeoutError, ValidationError
 
 
 class CodeRunnerClient:
@@ -25,7 +38,8 @@ class CodeRunnerClient:
         port: int = 8000,
         protocol: str = "http",
         api_key: Optional[str] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        response_format: str = "json"
     ):
         """
         初始化Code Runner客户端
@@ -36,13 +50,15 @@ class CodeRunnerClient:
             protocol: 协议（http/https）
             api_key: API密钥
             timeout: 请求超时时间（秒）
+            response_format: 响应编码格式，json 或 msgpack（需要安装 msgpack，服务端未安装时自动退回 json）
         """
         self.config = CodeRunnerConfig(
             host=host,
             port=port,
             protocol=protocol,
             api_key=api_key,
-            timeout=timeout
+            timeout=timeout,
+            response_format=response_format
         )
         self.http_client = HTTPClient(self.config)
     
@@ -51,7 +67,18 @@ class CodeRunnerClient:
         code: str,
         language: ProgrammingLanguage,
         test_cases: Optional[List[TestCase]] = None,
-        problem_id: Optional[str] = None
+        problem_id: Optional[str] = None,
+        dataset_id: Optional[str] = None,
+        stop_on_first_failure: bool = False,
+        time_limit: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        comparator: Optional[ComparatorType] = None,
+        comparator_options: Optional[Dict[str, Any]] = None,
+        response_detail: ResponseDetail = ResponseDetail.FULL,
+        compile_profile: Optional[CompileProfile] = None,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None,
+        profile: bool = False
     ) -> CodeExecutionResponse:
         """
         执行代码
@@ -61,6 +88,19 @@ class CodeRunnerClient:
             language: 编程语言
             test_cases: 测试用例列表
             problem_id: 问题ID
+            dataset_id: 通过 upload_dataset 上传的测试数据集ID，未提供 test_cases 时使用
+            stop_on_first_failure: 第一个测试用例失败后停止执行剩余测试用例
+            time_limit: 单个测试用例的时间限制（秒）
+            time_budget: 整个提交的时间预算（秒）
+            comparator: 输出比较方式
+            comparator_options: 比较器参数，例如 float 比较器的 rel_tol 和 abs_tol
+            response_detail: 响应详细程度，failures_only 只返回未通过的测试用例的输入和输出，
+                verdict_only 只返回各测试用例的结论
+            compile_profile: 编译配置，fast_compile 缩短编译时间，optimized 开启编译优化，
+                debug 包含调试信息；默认由服务端按测试用例数选择
+            priority: 调度优先级，批量评测应使用 batch，避免影响交互式请求
+            deadline: 截止时间（Unix 时间戳，秒），开始执行前已过期时返回 deadline_exceeded 状态
+            profile: 对用户代码进行采样性能分析，结果的 profile 返回热点函数和热点行（只支持 Python 函数测试用例）
             
         Returns:
             CodeExecutionResponse: 代码执行结果
@@ -69,21 +109,164 @@ class CodeRunnerClient:
             ValidationError: 当参数验证失败时
             APIError: 当API调用失败时
         """
+        request = self._build_request(
+            code, language, test_cases, problem_id, dataset_id, stop_on_first_failure, time_limit, time_budget,
+            comparator, comparator_options, response_detail, compile_profile, priority, deadline, profile
+        )
+        response = self.http_client.post(
+            "execute",
+            json_data=asdict(request)
+        )
+        return self._to_response(response)
+    
+    def submit(
+        self,
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Optional[List[TestCase]] = None,
+        problem_id: Optional[str] = None,
+        dataset_id: Optional[str] = None,
+        stop_on_first_failure: bool = False,
+        time_limit: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        comparator: Optional[ComparatorType] = None,
+        comparator_options: Optional[Dict[str, Any]] = None,
+        response_detail: ResponseDetail = ResponseDetail.FULL,
+        compile_profile: Optional[CompileProfile] = None,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None,
+        profile: bool = False
+    ) -> str:
+        """
+        提交异步测试任务，立即返回任务ID，不等待执行结果
+        
+        参数与 execute_code 相同。之后通过 wait 等待结果，或者通过 get_job 查询状态、cancel_job 取消。
+        
+        Returns:
+            str: 任务ID
+            
+        Raises:
+            ValidationError: 当参数验证失败时
+            APIError: 当API调用失败时
+        """
+        request = self._build_request(
+            code, language, test_cases, problem_id, dataset_id, stop_on_first_failure, time_limit, time_budget,
+            comparator, comparator_options, response_detail, compile_profile, priority, deadline, profile
+        )
+        response = self.http_client.post(
+            "jobs",
+            json_data=asdict(request)
+        )
+        return response["job_id"]
+    
+    def get_job(self, job_id: str, wait: float = 0.0) -> JobInfo:
+        """
+        查询异步测试任务
+        
+        Args:
+            job_id: 任务ID
+            wait: 任务未结束时服务端最多等待的秒数（长轮询），应小于请求超时时间
+            
+        Returns:
+            JobInfo: 任务信息
+            
+        Raises:
+            APIError: 当任务不存在或API调用失败时
+        """
+        params = {"wait": wait} if wait > 0 else None
+        return self._to_job_info(self.http_client.get(f"jobs/{job_id}", params=params))
+    
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> CodeExecutionResponse:
+        """
+        等待异步测试任务结束并返回执行结果
+        
+        通过长轮询查询任务状态，每次请求最多等待请求超时时间的一半。
+        
+        Args:
+            job_id: 任务ID
+            timeout: 最长等待时间（秒），None 表示一直等待
+            
+        Returns:
+            CodeExecutionResponse: 执行结果；开始执行前截止时间已过时为 deadline_exceeded 状态
+            
+        Raises:
+            APIError: 当任务失败、被取消或API调用失败时
+            TimeoutError: 超过 timeout 任务仍未结束时
+        """
+        started_at = time.monotonic()
+        long_poll = max(self.config.timeout / 2, 1)
+        while True:
+            remaining = long_poll
+            if timeout is not None:
+                remaining = min(long_poll, timeout - (time.monotonic() - started_at))
+                if remaining <= 0:
+                    raise TimeoutError(f"等待任务结果超时: {job_id}")
+            job = self.get_job(job_id, wait=remaining)
+            if job.result is not None:
+                return job.result
+            if job.status == JobStatus.CANCELLED:
+                raise APIError(f"任务已取消: {job_id}")
+            if job.status.finished:
+                raise APIError(f"任务执行失败: {job.error}")
+    
+    def cancel_job(self, job_id: str) -> JobInfo:
+        """
+        取消异步测试任务
+        
+        排队中的任务不再执行，运行中的任务在服务端下一次续约时停止执行。
+        
+        Args:
+            job_id: 任务ID
+            
+        Returns:
+            JobInfo: 取消后的任务信息
+            
+        Raises:
+            APIError: 当任务不存在、已经结束（状态码 409）或API调用失败时
+        """
+        return self._to_job_info(self.http_client.delete(f"jobs/{job_id}"))
+    
+    @staticmethod
+    def _build_request(
+        code: str,
+        language: ProgrammingLanguage,
+        test_cases: Optional[List[TestCase]],
+        problem_id: Optional[str],
+        dataset_id: Optional[str],
+        stop_on_first_failure: bool,
+        time_limit: Optional[float],
+        time_budget: Optional[float],
+        comparator: Optional[ComparatorType],
+        comparator_options: Optional[Dict[str, Any]],
+        response_detail: ResponseDetail,
+        compile_profile: Optional[CompileProfile],
+        priority: Optional[PriorityClass],
+        deadline: Optional[float],
+        profile: bool
+    ) -> CodeExecutionRequest:
         if not code:
             raise ValidationError("代码不能为空")
             
-        request = CodeExecutionRequest(
+        return CodeExecutionRequest(
             code=code,
             language=language,
             test_cases=test_cases,
-            problem_id=problem_id
-        )
-        
-        response = self.http_client.post(
-            "execute",
-            json_data=request.__dict__
+            problem_id=problem_id,
+            dataset_id=dataset_id,
+            stop_on_first_failure=stop_on_first_failure,
+            time_limit=time_limit,
+            time_budget=time_budget,
+            comparator=comparator,
+            comparator_options=comparator_options,
+            response_detail=response_detail,
+            compile_profile=compile_profile,
+            priority=priority,
+            deadline=deadline,
+            profile=profile
         )
-        
+    
+    @staticmethod
+    def _to_response(response: Dict[str, Any]) -> CodeExecutionResponse:
         # 转换响应数据为CodeExecutionResponse对象
         test_results = []
         if response.get("test_results"):
@@ -91,28 +274,67 @@ class CodeRunnerClient:
                 test_results.append(TestResult(
                     test_case=result["test_case"],
                     passed=result["passed"],
-                    input=result["input"],
-                    expected_output=result["expected_output"],
-                    actual_output=result["actual_output"],
+                    input=result.get("input"),
+                    expected_output=result.get("expected_output"),
+                    actual_output=result.get("actual_output"),
                     execution_time=result["execution_time"],
+                    normalized_time=result.get("normalized_time"),
                     memory_usage=result["memory_usage"],
-                    error=result.get("error")
+                    error=result.get("error"),
+                    status=ExecutionStatus(result["status"]) if result.get("status") else None,
+                    diff=result.get("diff")
                 ))
                 
         return CodeExecutionResponse(
             status=ExecutionStatus(response["status"]),
             test_results=test_results,
-            total_tests=response["total_tests"],
-            passed_tests=response["passed_tests"],
+            total_tests=response.get("total_tests", 0),
+            passed_tests=response.get("passed_tests", 0),
             execution_time=response.get("execution_time"),
+            normalized_time=response.get("normalized_time"),
+            speed_factor=response.get("speed_factor"),
             memory_usage=response.get("memory_usage"),
-            message=response.get("message")
+            message=response.get("message"),
+            stdout=response.get("stdout"),
+            stderr=response.get("stderr"),
+            profile=CodeRunnerClient._to_profile_report(response["profile"]) if response.get("profile") else None
+        )
+    
+    @staticmethod
+    def _to_profile_report(profile: Dict[str, Any]) -> ProfileReport:
+        return ProfileReport(
+            samples=profile["samples"],
+            sample_interval=profile["sample_interval"],
+            total_time=profile["total_time"],
+            overhead_time=profile["overhead_time"],
+            functions=[
+                ProfileFunction(
+                    function=entry["function"],
+                    file=entry.get("file"),
+                    line=entry["line"],
+                    cumulative_time=entry["cumulative_time"],
+                    percent=entry["percent"]
+                )
+                for entry in profile["functions"]
+            ],
+            lines=[
+                ProfileLine(
+                    line=entry["line"],
+                    code=entry.get("code"),
+                    cumulative_time=entry["cumulative_time"],
+                    percent=entry["percent"]
+                )
+                for entry in profile["lines"]
+            ]
         )
     
     def run_code(
         self,
         code: str,
-        language: ProgrammingLanguage
+        language: ProgrammingLanguage,
+        compile_profile: Optional[CompileProfile] = None,
+        priority: Optional[PriorityClass] = None,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         直接运行代码（不需要测试用例）
@@ -120,6 +342,9 @@ class CodeRunnerClient:
         Args:
             code: 要执行的代码
             language: 编程语言
+            compile_profile: 编译配置，默认由服务端选择
+            priority: 调度优先级，默认为 interactive
+            deadline: 截止时间（Unix 时间戳，秒），开始执行前已过期时服务端返回 504
             
         Returns:
             Dict[str, Any]: 包含输出、执行时间和内存使用的字典
@@ -135,6 +360,83 @@ class CodeRunnerClient:
             "run",
             json_data={
                 "code": code,
-                "language": language
+                "language": language,
+                "compile_profile": compile_profile,
+                "priority": priority,
+                "deadline": deadline
             }
-        ) 
\ No newline at end of file
+        )
+
+    def upload_dataset(self, test_cases: List[TestCase]) -> DatasetInfo:
+        """
+        上传测试数据集
+        
+        内容相同的测试用例总是得到相同的数据集ID，之后的 execute_code 调用通过 dataset_id 引用，
+        不需要重复发送测试用例。
+        
+        Args:
+            test_cases: 测试用例列表
+            
+        Returns:
+            DatasetInfo: 测试数据集信息
+            
+        Raises:
+            ValidationError: 当参数验证失败时
+            APIError: 当API调用失败时
+        """
+        if not test_cases:
+            raise ValidationError("测试用例不能为空")
+            
+        response = self.http_client.post(
+            "datasets",
+            json_data={"test_cases": [asdict(tc) for tc in test_cases]}
+        )
+        return self._to_dataset_info(response)
+    
+    def get_dataset(self, dataset_id: str) -> DatasetInfo:
+        """
+        查询测试数据集
+        
+        Args:
+            dataset_id: 数据集ID
+            
+        Returns:
+            DatasetInfo: 测试数据集信息
+            
+        Raises:
+            APIError: 当数据集不存在或API调用失败时
+        """
+        return self._to_dataset_info(self.http_client.get(f"datasets/{dataset_id}"))
+    
+    def delete_dataset(self, dataset_id: str) -> None:
+        """
+        删除测试数据集
+        
+        Args:
+            dataset_id: 数据集ID
+            
+        Raises:
+            APIError: 当数据集不存在或API调用失败时
+        """
+        self.http_client.delete(f"datasets/{dataset_id}")
+    
+    @staticmethod
+    def _to_dataset_info(response: Dict[str, Any]) -> DatasetInfo:
+        return DatasetInfo(
+            dataset_id=response["dataset_id"],
+            count=response["count"],
+            type=TestCaseType(response["type"]),
+            size=response["size"]
+        )
+    
+    @classmethod
+    def _to_job_info(cls, response: Dict[str, Any]) -> JobInfo:
+        return JobInfo(
+            job_id=response["job_id"],
+            status=JobStatus(response["status"]),
+            created_at=response["created_at"],
+            started_at=response.get("started_at"),
+            finished_at=response.get("finished_at"),
+            result=cls._to_response(response["result"]) if response.get("result") else None,
+            error=response.get("error")
+        )
@@ -14,6 +14,8 @@ class CodeRunnerConfig:
     api_version: str = "v1"
     timeout: int = 30
     api_key: Optional[str] = None
+    # 响应编码格式: json 或 msgpack（需要安装 msgpack）
+    response_format: str = "json"
 
     @property
     def base_url(self) -> str:
@@ -7,7 +7,14 @@ import requests
 from requests.exceptions import RequestException, Timeout
 
 from ..core.config import CodeRunnerConfig
-from ..exceptions import APIError, TimeoutError
+from ..exceptions import APIError, TimeoutError, ConfigurationError
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
 
 
 class HTTPClient:
@@ -24,6 +31,12 @@ class HTTPClient:
         self.session = requests.Session()
         if config.api_key:
             self.session.headers.update({"Authorization": f"Bearer {config.api_key}"})
+        if config.response_format == "msgpack":
+            if msgpack is None:
+                raise ConfigurationError("使用 msgpack 响应格式需要安装 msgpack: pip install msgpack")
+            self.session.headers.update({"Accept": f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"})
+        elif config.response_format != "json":
+            raise ConfigurationError(f"不支持的响应格式: {config.response_format}")
     
     def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
         """
@@ -38,10 +51,14 @@ class HTTPClient:
         Raises:
             APIError: 当API返回错误时
         """
+        content_type = response.headers.get("Content-Type", "")
         try:
-            data = response.json()
+            if msgpack is not None and "msgpack" in content_type:
+                data = msgpack.unpackb(response.content, raw=False)
+            else:
+                data = response.json()
         except ValueError:
-            raise APIError(f"无效的JSON响应: {response.text}", response.status_code)
+            raise APIError(f"无效的响应: {response.text}", response.status_code)
             
         if not 200 <= response.status_code < 300:
             raise APIError(
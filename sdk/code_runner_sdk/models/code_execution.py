@@ -28,14 +28,64 @@ class ExecutionStatus(str, Enum):
     TIME_LIMIT_EXCEEDED = "time_limit_exceeded"
     MEMORY_LIMIT_EXCEEDED = "memory_limit_exceeded"
     INTERNAL_ERROR = "internal_error"
+    DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+class ComparatorType(str, Enum):
+    """输出比较方式枚举"""
+    EXACT = "exact"
+    WHITESPACE = "whitespace"
+    FLOAT = "float"
+    UNORDERED = "unordered"
+    TOKEN = "token"
+
+
+class ResponseDetail(str, Enum):
+    """响应详细程度枚举"""
+    FULL = "full"
+    FAILURES_ONLY = "failures_only"
+    VERDICT_ONLY = "verdict_only"
+
+
+class CompileProfile(str, Enum):
+    """编译配置枚举"""
+    FAST_COMPILE = "fast_compile"
+    OPTIMIZED = "optimized"
+    DEBUG = "debug"
+
+
+class PriorityClass(str, Enum):
+    """调度优先级枚举"""
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+class JobStatus(str, Enum):
+    """异步任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class TestCaseType(str, Enum):
+    """测试用例类型枚举"""
+    FUNCTION = "function"
+    STDIN_STDOUT = "stdin_stdout"
 
 
 @dataclass
 class TestCase:
     """测试用例模型"""
-    input: Dict[str, Any]
+    input: Any
     expected_output: Any
     description: Optional[str] = None
+    type: TestCaseType = TestCaseType.FUNCTION
 
 
 @dataclass
@@ -43,12 +93,16 @@ class TestResult:
     """测试结果模型"""
     test_case: int
     passed: bool
-    input: Dict[str, Any]
-    expected_output: Any
-    actual_output: Any
-    execution_time: float
-    memory_usage: float
+    input: Any = None
+    expected_output: Any = None
+    actual_output: Any = None
+    execution_time: float = 0.0
+    # 按执行节点的速度系数归一化的执行时间，节点尚未校准时为 None
+    normalized_time: Optional[float] = None
+    memory_usage: float = 0.0
     error: Optional[str] = None
+    status: Optional[ExecutionStatus] = None
+    diff: Optional[str] = None
 
 
 @dataclass
@@ -58,6 +112,61 @@ class CodeExecutionRequest:
     language: ProgrammingLanguage
     test_cases: Optional[List[TestCase]] = None
     problem_id: Optional[str] = None
+    dataset_id: Optional[str] = None
+    stop_on_first_failure: bool = False
+    time_limit: Optional[float] = None
+    time_budget: Optional[float] = None
+    comparator: Optional[ComparatorType] = None
+    comparator_options: Optional[Dict[str, Any]] = None
+    response_detail: ResponseDetail = ResponseDetail.FULL
+    compile_profile: Optional[CompileProfile] = None
+    priority: Optional[PriorityClass] = None
+    deadline: Optional[float] = None
+    profile: bool = False
+
+
+@dataclass
+class DatasetInfo:
+    """测试数据集信息模型"""
+    dataset_id: str
+    count: int
+    type: TestCaseType
+    size: int
+
+
+@dataclass
+class ProfileFunction:
+    """性能分析的热点函数模型"""
+    function: str
+    # 函数所在的文件名，用户代码中的函数为 None
+    file: Optional[str]
+    # 函数定义所在的行号，用户代码中的函数从用户代码第 1 行算起
+    line: int
+    # 函数在调用栈中时消耗的 CPU 时间（毫秒）
+    cumulative_time: float
+    percent: float
+
+
+@dataclass
+class ProfileLine:
+    """性能分析的热点行模型"""
+    line: int
+    code: Optional[str]
+    # 该行在调用栈中时消耗的 CPU 时间（毫秒）
+    cumulative_time: float
+    percent: float
+
+
+@dataclass
+class ProfileReport:
+    """性能分析结果模型"""
+    samples: int
+    sample_interval: float
+    total_time: float
+    # 采样本身的耗时（毫秒），已从执行时间中扣除
+    overhead_time: float
+    functions: List[ProfileFunction]
+    lines: List[ProfileLine]
 
 
 @dataclass
@@ -69,4 +178,24 @@ class CodeExecutionResponse:
     passed_tests: int = 0
     execution_time: Optional[float] = None
     memory_usage: Optional[float] = None
-    message: Optional[str] = None 
\ No newline at end of file
+    message: Optional[str] = None
+    normalized_time: Optional[float] = None
+    # 执行节点的速度系数，大于 1 表示比参照节点慢
+    speed_factor: Optional[float] = None
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+    # 请求 profile 为 True 时的性能分析结果
+    profile: Optional[ProfileReport] = None
+
+@dataclass
+class JobInfo:
+    """异步任务模型"""
+    job_id: str
+    status: JobStatus
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # 任务成功时为执行结果；开始执行前截止时间已过时为 deadline_exceeded 状态的执行结果
+    result: Optional[CodeExecutionResponse] = None
+    # 任务失败或取消的原因
+    error: Optional[str] = None
@@ -40,4 +40,7 @@ setup(
         "requests>=2.25.0",
         "pydantic>=1.8.0",
     ],
+    extras_require={
+        "msgpack": ["msgpack>=1.0.0"],
+    },
 ) 
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# 测试不预热工具链、不校准，任务队列、数据集、问题登记和各执行器的编译缓存使用临时目录，不写入工作目录下的 ./data；
+# 执行器在导入时创建缓存目录，因此必须在导入 app 之前设置
+_data_dir = tempfile.mkdtemp(prefix="code-runner-tests-")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("CALIBRATION_INTERVAL", "0")
+os.environ.setdefault("SANDBOX_SWEEP_INTERVAL", "0")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_data_dir, "job_queue.db"))
+os.environ.setdefault("DATASET_DIR", os.path.join(_data_dir, "datasets"))
+os.environ.setdefault("PROBLEM_DB_PATH", os.path.join(_data_dir, "problems.db"))
+os.environ.setdefault("PROBLEM_DATA_DIR", os.path.join(_data_dir, "problems"))
+os.environ.setdefault("GO_CACHE_DIR", os.path.join(_data_dir, "go"))
+os.environ.setdefault("SWIFT_MODULE_CACHE_DIR", os.path.join(_data_dir, "swift-module-cache"))
+os.environ.setdefault("CPP_PCH_DIR", os.path.join(_data_dir, "cpp-pch"))
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_data_dir, ignore_errors=True)
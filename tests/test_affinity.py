@@ -0,0 +1,30 @@
+import os
+import sys
+import asyncio
+
+from app.executors import PythonExecutor
+from app.executors.affinity import core_allocator
+
+PRINT_AFFINITY = [sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"]
+
+
+def test_compile_process_not_confined_to_reserved_cores(monkeypatch):
+    allowed = sorted(os.sched_getaffinity(0))
+    # 模拟 pin_current_process 之后的状态：本进程绑定在第一个 CPU 上，编译进程应恢复为全部 CPU
+    monkeypatch.setattr(core_allocator, "enabled", True)
+    monkeypatch.setattr(core_allocator, "reserved_cpus", allowed[:1])
+    monkeypatch.setattr(core_allocator, "allowed_cpus", allowed)
+    assert core_allocator.unpinned_cpus == allowed
+
+    original = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, allowed[:1])
+    try:
+        result = asyncio.run(PythonExecutor()._launch(PRINT_AFFINITY, run_stage=False))
+    finally:
+        os.sched_setaffinity(0, original)
+    assert result["stdout"].strip() == str(allowed)
+
+
+def test_unpinned_cpus_inherit_when_pinning_disabled(monkeypatch):
+    monkeypatch.setattr(core_allocator, "enabled", False)
+    assert core_allocator.unpinned_cpus is None
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.schemas import code_execution as schemas
+from app.executors import PythonExecutor
+from app.services.calibration import SpeedCalibrator
+
+
+def _response(*times):
+    results = [schemas.TestResult(passed=True, execution_time=t, memory_usage=0) for t in times]
+    return schemas.CodeExecutionResponse(
+        status=schemas.ExecutionStatus.SUCCESS, test_results=results, execution_time=sum(times)
+    )
+
+
+def _calibrator(factor, startup):
+    calibrator = SpeedCalibrator()
+    calibrator.languages["python"] = {"speed_factor": factor, "startup_ms": startup}
+    return calibrator
+
+
+def test_function_mode_divides_by_speed_factor():
+    response = _calibrator(2.0, 30.0).apply("python", _response(10.0, 20.0))
+    assert [r.normalized_time for r in response.test_results] == [5.0, 10.0]
+    assert response.normalized_time == 15.0
+
+
+def test_stdin_mode_subtracts_startup_before_normalizing():
+    response = _calibrator(2.0, 30.0).apply("python", _response(50.0, 20.0), stdin_mode=True)
+    # 第二个测试结果比启动时间还短，归一化时间不小于 0
+    assert [r.normalized_time for r in response.test_results] == [10.0, 0.0]
+    assert response.normalized_time == 10.0
+    assert response.speed_factor == 2.0
+
+
+def test_executor_calibrate_reports_startup():
+    calibration, startup = asyncio.run(PythonExecutor().calibrate(runs=3))
+    assert calibration > 0
+    assert startup > 0
@@ -0,0 +1,41 @@
+import asyncio
+
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage
+from app.services.code_execution_service import CodeExecutionService
+from app.services.dataset_store import DatasetStore
+from app.utils.code_generator import CodeGenerator
+
+SOLUTION = """\
+class Solution:
+    def solve(self, x):
+        return x + 1
+"""
+
+
+def test_second_run_of_same_problem_hits_harness_cache(tmp_path):
+    dataset = DatasetStore(str(tmp_path), max_bytes=0).put(
+        [schemas.TestCase(input=i, expected_output=i + 1) for i in range(3)]
+    )
+    stats = CodeGenerator._harness_cache_stats
+
+    async def main():
+        first = await CodeExecutionService.run_tests(SOLUTION, ProgrammingLanguage.PYTHON, dataset, time_limit=2.5)
+        hits = stats["hits"]
+        # 时间预算和数据集硬链接路径每次都不同，不影响测试代码的缓存
+        second = await CodeExecutionService.run_tests(SOLUTION, ProgrammingLanguage.PYTHON, dataset, time_limit=2.5)
+        return first, second, stats["hits"] - hits
+
+    first, second, hits = asyncio.run(main())
+    assert first.status == second.status == ExecutionStatus.SUCCESS
+    assert second.passed_tests == 3
+    assert hits == 1
+
+
+def test_render_independent_of_run_options():
+    generator = CodeGenerator()
+    options = dict(time_limit=1.5, dataset=True)
+    first = generator.generate_test_code(SOLUTION, ProgrammingLanguage.PYTHON, [], **options)
+    second = generator.generate_test_code(SOLUTION, ProgrammingLanguage.PYTHON, [], **options)
+    assert first == second
+    assert CodeGenerator.harness_input(3.0, "/tmp/a.crds", [2, 0]) != CodeGenerator.harness_input(2.9, "/tmp/b.crds", [0])
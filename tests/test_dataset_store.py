@@ -0,0 +1,58 @@
+import os
+import time
+import asyncio
+
+import pytest
+
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage
+from app.services import dataset_store as dataset_module
+from app.services.code_execution_service import CodeExecutionService
+from app.services.dataset_store import PIN_DIR, DatasetStore, pin_dataset
+
+SOLUTION = """\
+class Solution:
+    def solve(self, x):
+        return x + 1
+"""
+
+TEST_CASES = [schemas.TestCase(input=i, expected_output=i + 1) for i in range(3)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path), max_bytes=0)
+
+
+def test_pin_keeps_content_after_delete(store):
+    dataset = store.put(TEST_CASES)
+    with pin_dataset(dataset) as path:
+        store.delete(dataset.id)
+        assert not os.path.exists(dataset.path)
+        with open(path, "rb") as file:
+            assert file.read(4) == b"CRDS"
+    assert not os.path.exists(path)
+
+
+def test_dataset_deleted_before_harness_opens_it(store):
+    # 数据集在 API 进程打开之后、测试代码进程打开之前被淘汰，测试仍然正常执行
+    dataset = store.put(TEST_CASES)
+    store.delete(dataset.id)
+
+    response = asyncio.run(CodeExecutionService.run_tests(SOLUTION, ProgrammingLanguage.PYTHON, dataset))
+    assert response.status == ExecutionStatus.SUCCESS
+    assert response.passed_tests == len(TEST_CASES)
+    assert os.listdir(os.path.join(store.directory, PIN_DIR)) == []
+
+
+def test_evict_removes_stale_pins(store):
+    pin_dir = os.path.join(store.directory, PIN_DIR)
+    os.makedirs(pin_dir)
+    stale = os.path.join(pin_dir, f"{int(time.time()) - dataset_module.PIN_MAX_AGE - 1}.abc.crds")
+    fresh = os.path.join(pin_dir, f"{int(time.time())}.def.crds")
+    for path in (stale, fresh):
+        open(path, "wb").close()
+
+    store.evict()
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage
+from app.services.code_execution_service import CodeExecutionService
+
+# 第二个测试用例执行期间测试进程直接退出
+CRASHING_SOLUTION = """\
+import os
+
+class Solution:
+    def solve(self, x):
+        if x == 1:
+            os._exit(3)
+        return x + 1
+"""
+
+TEST_CASES = [schemas.TestCase(input=i, expected_output=i + 1) for i in range(4)]
+
+
+def _run(**options):
+    return asyncio.run(CodeExecutionService.run_tests(
+        CRASHING_SOLUTION, ProgrammingLanguage.PYTHON, TEST_CASES, **options
+    ))
+
+
+def test_crash_attributed_to_running_case_and_remaining_cases_resume():
+    response = _run()
+    assert response.status == ExecutionStatus.SUCCESS
+    assert response.total_tests == 4
+    assert [r.test_case for r in response.test_results] == [1, 2, 3, 4]
+    assert [r.passed for r in response.test_results] == [True, False, True, True]
+    crashed = response.test_results[1]
+    assert crashed.status == ExecutionStatus.RUNTIME_ERROR
+    assert "退出码: 3" in crashed.error
+    assert response.passed_tests == 3
+    assert response.message is None
+
+
+def test_crash_with_stop_on_first_failure_skips_remaining_cases():
+    response = _run(stop_on_first_failure=True)
+    assert [r.passed for r in response.test_results] == [True, False]
+    assert response.test_results[1].status == ExecutionStatus.RUNTIME_ERROR
+    assert "已跳过剩余 2 个测试用例" in response.message
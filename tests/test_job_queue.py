@@ -0,0 +1,32 @@
+import pytest
+
+from app.schemas.code_execution import JobStatus
+from app.services.job_queue import SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_job_status_round_trips_as_schema_enum(queue):
+    job_id = queue.enqueue("run_tests", {"code": ""})
+    job = queue.get(job_id)
+    assert job.status is JobStatus.QUEUED
+    assert not job.finished
+
+    claimed = queue.claim("worker-1", visibility_timeout=30)
+    assert claimed.id == job_id and claimed.status is JobStatus.RUNNING
+
+    assert queue.complete(job_id, "worker-1", {"status": "success"}, cpu_time=0.5)
+    job = queue.get(job_id)
+    assert job.status is JobStatus.SUCCEEDED
+    assert job.finished
+    assert job.cpu_time == 0.5
+
+
+def test_cancelled_job_is_finished(queue):
+    job_id = queue.enqueue("run_tests", {"code": ""})
+    assert queue.cancel(job_id)
+    assert queue.get(job_id).status is JobStatus.CANCELLED
+    assert queue.get(job_id).finished
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.problem_store import problem_store
+
+ALICE = {"Authorization": "Bearer key-alice"}
+BOB = {"Authorization": "Bearer key-bob"}
+
+TEST_CASES = [{"input": "1\n", "expected_output": "1\n", "type": "stdin_stdout"}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "API_KEYS", {"key-alice": "alice", "key-bob": "bob"})
+    return TestClient(app)
+
+
+def _problem(problem_id):
+    return {
+        "id": problem_id,
+        "title": "echo",
+        "description": "echo the input",
+        "difficulty": "easy",
+        "function_signature": {},
+        "test_cases": TEST_CASES,
+    }
+
+
+def test_problem_owner_checked_on_update_and_delete(client):
+    response = client.post("/problems", json=_problem("owned-problem"), headers=ALICE)
+    assert response.status_code == 201
+    assert response.json()["owner"] == "alice"
+
+    assert client.put("/problems/owned-problem", json=_problem("owned-problem"), headers=BOB).status_code == 403
+    assert client.delete("/problems/owned-problem", headers=BOB).status_code == 403
+    assert client.get("/problems/owned-problem", headers=BOB).status_code == 200
+
+    assert client.put("/problems/owned-problem", json=_problem("owned-problem"), headers=ALICE).status_code == 200
+    assert client.delete("/problems/owned-problem", headers=ALICE).status_code == 200
+
+
+def test_invalid_api_key_rejected(client):
+    headers = {"Authorization": "Bearer wrong"}
+    assert client.get("/problems", headers=headers).status_code == 401
+    assert client.post("/code/datasets", json={"test_cases": TEST_CASES}, headers=headers).status_code == 401
+
+
+def test_shared_dataset_kept_until_all_owners_delete(client):
+    dataset_id = client.post("/code/datasets", json={"test_cases": TEST_CASES}, headers=ALICE).json()["dataset_id"]
+    assert client.post("/code/datasets", json={"test_cases": TEST_CASES}, headers=BOB).json()["dataset_id"] == dataset_id
+
+    assert client.delete(f"/code/datasets/{dataset_id}", headers=ALICE).status_code == 200
+    # bob 也上传过相同的数据集，alice 删除后仍然保留，且 alice 不能再次删除
+    assert client.get(f"/code/datasets/{dataset_id}", headers=BOB).status_code == 200
+    assert client.delete(f"/code/datasets/{dataset_id}", headers=ALICE).status_code == 403
+
+    assert client.delete(f"/code/datasets/{dataset_id}", headers=BOB).status_code == 200
+    assert client.get(f"/code/datasets/{dataset_id}", headers=BOB).status_code == 404
+
+
+def test_rejected_writes_leave_no_test_data(client):
+    data_dir = problem_store.datasets.directory
+    assert client.post("/problems", json=_problem("guarded-problem"), headers=ALICE).status_code == 201
+    before = set(os.listdir(data_dir))
+
+    other_cases = [{"input": "2\n", "expected_output": "2\n", "type": "stdin_stdout"}]
+    assert client.put(
+        "/problems/guarded-problem", json={**_problem("guarded-problem"), "test_cases": other_cases}, headers=BOB
+    ).status_code == 403
+    assert client.post(
+        "/problems", json={**_problem("guarded-problem"), "test_cases": other_cases}, headers=ALICE
+    ).status_code == 409
+    assert set(os.listdir(data_dir)) == before
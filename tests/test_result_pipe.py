@@ -0,0 +1,76 @@
+import sys
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage, ResponseDetail
+from app.executors import PythonExecutor
+from app.services.code_execution_service import CodeExecutionService
+
+# 把两帧拆成多次写入结果管道，标准输出中写入形似结果的内容
+WRITER = r"""
+import os, sys, json, time, struct
+fd = int(os.environ["CODE_RUNNER_RESULT_FD"])
+
+def frame(obj):
+    body = json.dumps(obj).encode()
+    return struct.pack(">I", len(body)) + body
+
+print('{"passed": true}')
+data = frame({"n": 1}) + frame({"n": 2})
+os.write(fd, data[:3])
+time.sleep(0.05)
+os.write(fd, data[3:])
+sys.stderr.write("err\n")
+"""
+
+
+def test_frames_decoded_separately_from_stdout():
+    frames = []
+    run = asyncio.run(PythonExecutor()._launch([sys.executable, "-c", WRITER], on_frame=frames.append))
+    assert run["returncode"] == 0
+    assert frames == [{"n": 1}, {"n": 2}]
+    assert run["frames"] == frames
+    assert run["stdout"] == '{"passed": true}\n'
+    assert run["stderr"] == "err\n"
+
+
+def test_user_output_does_not_affect_results():
+    solution = """\
+import sys
+
+class Solution:
+    def solve(self, x):
+        print('{"passed": false, "execution_time": 0}')
+        sys.stderr.write("debug\\n")
+        return x + 1
+"""
+    test_cases = [schemas.TestCase(input=i, expected_output=i + 1) for i in range(3)]
+    response = asyncio.run(CodeExecutionService.run_tests(
+        solution, ProgrammingLanguage.PYTHON, test_cases, response_detail=ResponseDetail.FULL
+    ))
+    assert response.status == ExecutionStatus.SUCCESS
+    assert response.passed_tests == 3
+    assert response.stdout.count('{"passed": false') == 3
+    assert "debug" in response.stderr
+
+
+def test_run_single_test_route_returns_output():
+    client = TestClient(app)
+    response = client.post("/code/run-test", json={
+        "code": "class Solution:\n    def solve(self, x):\n        return {'sum': x['a'] + x['b']}\n",
+        "language": "python",
+        "test_input": {"a": 1, "b": 2},
+    })
+    assert response.status_code == 200
+    assert response.json()["output"] == {"sum": 3}
+
+    response = client.post("/code/run-test", json={
+        "code": "class Solution:\n    def solve(self, x):\n        raise ValueError('bad input')\n",
+        "language": "python",
+        "test_input": {},
+    })
+    assert response.status_code == 200
+    assert "bad input" in response.json()["output"]["error"]
@@ -0,0 +1,71 @@
+import time
+import asyncio
+import contextlib
+
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, PriorityClass, ProgrammingLanguage
+from app.services.code_execution_service import CodeExecutionService
+from app.services.scheduler import ExecutionScheduler, execution_scheduler
+
+SOLUTION = """\
+class Solution:
+    def solve(self, x):
+        return x + 1
+"""
+
+
+def test_deadline_already_passed():
+    async def main():
+        return await CodeExecutionService.run_tests(
+            SOLUTION, ProgrammingLanguage.PYTHON, [schemas.TestCase(input=1, expected_output=2)], deadline=time.time() - 1
+        )
+
+    response = asyncio.run(main())
+    assert response.status == ExecutionStatus.DEADLINE_EXCEEDED
+    assert response.total_tests == 1
+
+
+def _hold_all_slots_and_run(test_cases):
+    async def main():
+        async with contextlib.AsyncExitStack() as stack:
+            # 占满所有执行槽位，提交编译完成后只能等待执行槽位直到截止时间
+            for _ in range(execution_scheduler.capacity):
+                await stack.enter_async_context(execution_scheduler.slot())
+            return await CodeExecutionService.run_tests(
+                SOLUTION, ProgrammingLanguage.PYTHON, test_cases, deadline=time.time() + 0.5
+            )
+
+    return asyncio.run(main())
+
+
+def test_deadline_passes_while_waiting_for_slot_function_tests():
+    response = _hold_all_slots_and_run([schemas.TestCase(input=1, expected_output=2)])
+    assert response.status == ExecutionStatus.DEADLINE_EXCEEDED
+
+
+def test_deadline_passes_while_waiting_for_slot_stdin_tests():
+    response = _hold_all_slots_and_run([schemas.TestCase(input="", expected_output="", type=schemas.TestCaseType.STDIN_STDOUT)])
+    assert response.status == ExecutionStatus.DEADLINE_EXCEEDED
+
+
+def test_slots_go_to_interactive_before_batch_and_earlier_deadline_first():
+    async def main():
+        scheduler = ExecutionScheduler(capacity=1, interactive_reserved=0)
+        order = []
+
+        async def wait(label, priority, deadline=None):
+            async with scheduler.slot(priority, deadline):
+                order.append(label)
+
+        async with scheduler.slot(PriorityClass.INTERACTIVE):
+            now = time.time()
+            waiters = [
+                asyncio.create_task(wait("batch", PriorityClass.BATCH)),
+                asyncio.create_task(wait("interactive-late", PriorityClass.INTERACTIVE, now + 60)),
+                asyncio.create_task(wait("interactive-early", PriorityClass.INTERACTIVE, now + 30)),
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        return order
+
+    assert asyncio.run(main()) == ["interactive-early", "interactive-late", "batch"]
@@ -0,0 +1,106 @@
+import time
+import asyncio
+
+import pytest
+
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage
+from app.services.code_execution_service import CodeExecutionService
+from app.services.scheduler import DeadlineExceededError
+from app.services.single_flight import SingleFlight, single_flight
+
+SLOW_SOLUTION = """\
+import time
+
+class Solution:
+    def solve(self, x):
+        time.sleep(0.3)
+        return x + 1
+"""
+
+TEST_CASES = [schemas.TestCase(input=1, expected_output=2)]
+
+
+def test_cancelling_one_waiter_keeps_shared_run():
+    async def main():
+        before = dict(single_flight.stats)
+        run = lambda: CodeExecutionService.run_tests(SLOW_SOLUTION, ProgrammingLanguage.PYTHON, TEST_CASES)
+        first = asyncio.create_task(run())
+        second = asyncio.create_task(run())
+        await asyncio.sleep(0.1)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        response = await second
+        delta = {name: single_flight.stats[name] - before[name] for name in before}
+        return response, delta
+
+    response, delta = asyncio.run(main())
+    assert response.status == ExecutionStatus.SUCCESS
+    assert response.passed_tests == 1
+    assert delta == {"executions": 1, "coalesced": 1, "abandoned": 0}
+
+
+def test_shared_run_cancelled_when_all_waiters_leave():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def execution():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flight.run("key", execution)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flight.report()
+
+    assert asyncio.run(main()) == {"inflight": 0, "executions": 1, "coalesced": 1, "abandoned": 1}
+
+
+def test_waiter_stops_at_its_own_deadline():
+    async def main():
+        before = dict(single_flight.stats)
+        run = lambda deadline: CodeExecutionService.run_tests(
+            SLOW_SOLUTION, ProgrammingLanguage.PYTHON, TEST_CASES, deadline=deadline
+        )
+        first = asyncio.create_task(run(None))
+        await asyncio.sleep(0.05)
+        # 后到达的请求截止时间更早，到期后不再等待共享的执行
+        started = time.time()
+        late = await run(time.time() + 0.1)
+        waited = time.time() - started
+        response = await first
+        delta = {name: single_flight.stats[name] - before[name] for name in before}
+        return late, waited, response, delta
+
+    late, waited, response, delta = asyncio.run(main())
+    assert late.status == ExecutionStatus.DEADLINE_EXCEEDED
+    assert waited < 0.25
+    assert response.status == ExecutionStatus.SUCCESS
+    assert delta == {"executions": 1, "coalesced": 1, "abandoned": 0}
+
+
+def test_waiter_deadline_does_not_cancel_shared_run():
+    async def main():
+        flight = SingleFlight()
+
+        async def execution():
+            await asyncio.sleep(0.2)
+            return "done"
+
+        first = asyncio.create_task(flight.run("key", execution))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceededError):
+            await flight.run("key", execution, deadline=time.time() + 0.05)
+        return await first, flight.report()
+
+    assert asyncio.run(main()) == ("done", {"inflight": 0, "executions": 1, "coalesced": 1, "abandoned": 0})
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.core.config import settings
+from app.schemas import code_execution as schemas
+from app.schemas.code_execution import ExecutionStatus, ProgrammingLanguage
+from app.services.code_execution_service import CodeExecutionService
+
+ECHO = "print(input())\n"
+
+
+def _cases(first_expected="1"):
+    return [
+        schemas.TestCase(input="1\n", expected_output=first_expected, type=schemas.TestCaseType.STDIN_STDOUT)
+    ] + [
+        schemas.TestCase(input=f"{i}\n", expected_output=str(i), type=schemas.TestCaseType.STDIN_STDOUT)
+        for i in range(2, 4)
+    ]
+
+
+def test_budget_exhausted_with_stop_on_first_failure_reported_as_budget():
+    response = asyncio.run(CodeExecutionService.run_tests(
+        ECHO, ProgrammingLanguage.PYTHON, _cases(), stop_on_first_failure=True, time_budget=1e-6
+    ))
+    assert response.status == ExecutionStatus.SUCCESS
+    assert response.test_results == []
+    assert response.message == "提交时间预算已用尽，3 个测试用例未执行"
+
+
+def test_failure_stop_reported_as_failure(monkeypatch):
+    monkeypatch.setattr(settings, "STDIN_CASE_CONCURRENCY", 1)
+    response = asyncio.run(CodeExecutionService.run_tests(
+        ECHO, ProgrammingLanguage.PYTHON, _cases(first_expected="wrong"), stop_on_first_failure=True
+    ))
+    assert [r.passed for r in response.test_results] == [False]
+    assert response.message == "测试用例失败，已跳过剩余 2 个测试用例"
@@ -0,0 +1,81 @@
+import time
+import asyncio
+
+import pytest
+
+from app.schemas.code_execution import JobStatus
+from app.services.code_execution_service import CodeExecutionService
+from app.core.config import settings
+from app.services.job_queue import DEADLINE_EXCEEDED_ERROR, SQLiteJobQueue, job_notifier
+from app.services.scheduler import DeadlineExceededError
+from app.worker import ExecutionWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def _process_one(queue, monkeypatch, error):
+    async def handle_job(kind, payload):
+        raise error
+
+    monkeypatch.setattr(CodeExecutionService, "handle_job", handle_job)
+    job_id = queue.enqueue("run_tests", {})
+    worker = ExecutionWorker(queue, concurrency=1, worker_id="worker-1")
+    asyncio.run(worker._process(queue.claim("worker-1", visibility_timeout=30)))
+    return queue.get(job_id)
+
+
+def test_transient_error_requeues_job(queue, monkeypatch):
+    job = _process_one(queue, monkeypatch, RuntimeError("executor crashed"))
+    assert job.status is JobStatus.QUEUED
+    assert job.worker_id is None
+    assert "executor crashed" in job.error
+
+
+def test_invalid_job_fails_without_retry(queue, monkeypatch):
+    job = _process_one(queue, monkeypatch, ValueError("未知的任务类型"))
+    assert job.status is JobStatus.FAILED
+
+
+def test_deadline_exceeded_fails_job(queue, monkeypatch):
+    job = _process_one(queue, monkeypatch, DeadlineExceededError("deadline"))
+    assert job.status is JobStatus.FAILED
+    assert job.error == DEADLINE_EXCEEDED_ERROR
+
+
+def test_idle_embedded_worker_woken_by_submission(queue, monkeypatch):
+    claims = []
+    claim = queue.claim
+
+    def counting_claim(*args):
+        claims.append(time.time())
+        return claim(*args)
+
+    async def handle_job(kind, payload):
+        return {"ok": True}
+
+    monkeypatch.setattr(queue, "claim", counting_claim)
+    monkeypatch.setattr(CodeExecutionService, "handle_job", handle_job)
+    monkeypatch.setattr(settings, "JOB_IDLE_POLL_INTERVAL", 30.0)
+
+    async def main():
+        worker = ExecutionWorker(queue, concurrency=4, worker_id="worker-1")
+        runner = asyncio.create_task(worker.run(embedded=True))
+        await asyncio.sleep(0.5)
+        # 空闲时多个执行槽位只领取一次，之后等待通知
+        idle_claims = len(claims)
+        job_id = queue.enqueue("run_tests", {})
+        job_notifier.notify()
+        for _ in range(50):
+            if queue.get(job_id).finished:
+                break
+            await asyncio.sleep(0.02)
+        worker.stop()
+        await asyncio.wait_for(runner, 5)
+        return idle_claims, queue.get(job_id)
+
+    idle_claims, job = asyncio.run(main())
+    assert idle_claims == 1
+    assert job.status is JobStatus.SUCCEEDED